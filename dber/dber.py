@@ -1,5 +1,9 @@
+import abc
+import functools
+import threading
 import time
 
+from contextlib import contextmanager
 from typing import Iterable
 
 
@@ -32,656 +36,3019 @@ def inSql(*items):
     return f" in ({','.join(sqlItems)}) "
 
 
-class DB(object):
+class QueryCache(object):
     """
-    数据库基类
+    查询结果缓存：TTL过期 + LRU淘汰，写操作按表名失效（线程安全）
     """
+    # 元数据查询（information_schema、sqlite_master）的表标记，DDL语句执行后失效
+    SCHEMA_TABLE = "__schema__"
+    # 无法解析表名的查询标记，任何写操作都会失效
+    ANY_TABLE = "*"
 
-    def __init__(self, connection, dbType: str = None,
-                 debug: bool = False) -> None:
-        self.__closed = False
-        self.__debug = debug
-        self.__dbType = dbType
-        self.__connection = connection
-        self.select("select 1")
+    import re
+    __tablePattern = re.compile(r"\b(?:join|into|update|table|exists|truncate)\s+([`\"\w.]+)", re.I)
+    __fromPattern = re.compile(r"\bfrom\s+(.+?)(?=\bwhere\b|\bgroup\b|\border\b|\blimit\b|\bhaving\b|\bunion\b"
+                               r"|\b(?:left|right|inner|outer|cross|natural)?\s*join\b|\)|;|$)", re.I | re.S)
+    __ddlPattern = re.compile(r"^\s*(?:create|alter|drop|truncate|rename)\b", re.I | re.M)
+    __schemaPattern = re.compile(r"\b(?:information_schema|sqlite_master|sqlite_schema)\b", re.I)
+    del re
 
-    def select(self, sql, *parameters, limit: int = 0, hump: bool = True, **kwargs) -> list[dict]:
+    def __init__(self, maxSize: int = 1024, ttl: float = 60) -> None:
         """
-        查询数据
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param limit: 结果限制
-        :param hump: 转驼峰
-        :param kwargs: 其他属性
-        :return: 字典列表
+        查询结果缓存
+        :param maxSize: 最大缓存条数
+        :param ttl: 缓存有效期（秒），小于等于0不过期
         """
-        st = time.time()
-        sql = self.__sql(sql)
-        parameters = self.__parameters(*parameters)
-        cursor = self.getConnection().cursor()
-        try:
-            if limit < 1:
-                cursor.execute(sql, parameters, **kwargs)
-                dataRows = list(cursor.fetchall())
-            else:
-                if not sql.__contains__(" limit ") and not sql.__contains__(" LIMIT "):
-                    if sql.__contains__(";"):
-                        sql = sql.replace(";", f" limit {limit};")
-                    else:
-                        sql = f"{sql} limit {limit}"
-                cursor.execute(sql, parameters, **kwargs)
-                dataRows = cursor.fetchmany(limit)
-            if hump and dataRows:
-                for i in range(0, len(dataRows)):
-                    dataRows[i] = self.__humpRow(dataRows[i])
-                return dataRows
-            return dataRows
-        finally:
-            self.__printSql(sql, parameters, st)
-            cursor.close()
+        import collections
+        if maxSize < 1:
+            raise ValueError(f"query cache maxSize must be greater than 0 : {maxSize}")
+        self.__maxSize = maxSize
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+        # key -> (过期时间, 表名集合, 结果)
+        self.__entries = collections.OrderedDict()
+        # 表名 -> key集合
+        self.__tableKeys = {}
+        # 每次失效递增，用于丢弃查询期间发生过失效的结果
+        self.__generation = 0
+        # 当前线程未提交事务涉及的表
+        self.__pending = threading.local()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
 
-    def selectOne(self, sql, *parameters, hump: bool = True) -> dict:
+    def get(self, key):
         """
-        查询一行数据
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param hump: 转驼峰
-        :return: 数据行字典
+        获取缓存
+        :param key: 缓存key
+        :return: (是否命中, 结果)
         """
-        st = time.time()
-        sql = self.__sql(sql)
-        parameters = self.__parameters(*parameters)
-        cursor = self.getConnection().cursor()
-        try:
-            cursor.execute(sql, parameters)
-            result = cursor.fetchone()
-            if result:
-                row = dict(result)
-                if not hump:
-                    return row
-                return self.__humpRow(row)
-        finally:
-            self.__printSql(sql, parameters, st)
-            cursor.close()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > time.time():
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return True, entry[2]
+                self.__remove(key)
+            self.__misses += 1
+            return False, None
 
-    def selectTable(self, table, columns: str = "*", where: str = "1 = 1", limit: int = 0, hump: bool = True,
-                    **conditions):
+    def put(self, key, sql: str, value, generation: int = None):
         """
-        查询数据
-        :param table: 表名
-        :param columns: 查询的字段，默认所有字段
-        :param where: where条件
-        :param limit: 返回数据行限制
-        :param hump: 是否转驼峰
-        :param conditions: where条件
-        :return: 列表字典
+        写入缓存
+        :param key: 缓存key
+        :param sql: 查询SQL，用于解析依赖的表
+        :param value: 查询结果
+        :param generation: 查询开始时的版本号，期间发生过失效则不缓存
+        :return:
         """
-        if not (where.__contains__("where ") or where.__contains__("WHERE ")):
-            where = f"where {where}"
-        sql = ""
-        sql += f"select {columns} from {table} {where}"
-        for key in conditions.keys():
-            value = conditions[key]
-            if isinstance(value, (int, float)):
-                sql += f" and {key} = {conditions[key]}"
-            else:
-                sql += f" and {key} = '{conditions[key]}'"
-        return self.select(sql, (), limit=limit, hump=hump)
+        tables = QueryCache.tables(sql)
+        if QueryCache.__schemaPattern.search(sql):
+            tables.add(QueryCache.SCHEMA_TABLE)
+        if not tables:
+            tables.add(QueryCache.ANY_TABLE)
+        expireTime = self.__ttl and self.__ttl > 0 and time.time() + self.__ttl or None
+        with self.__lock:
+            if generation is not None and generation != self.__generation:
+                return
+            if key in self.__entries:
+                self.__remove(key)
+            self.__entries[key] = (expireTime, tables, value)
+            for table in tables:
+                self.__tableKeys.setdefault(table, set()).add(key)
+            while len(self.__entries) > self.__maxSize:
+                self.__remove(next(iter(self.__entries)))
+                self.__evictions += 1
 
-    def callbackResultSet(self, sql, *parameters, callback=None, **kwargs):
+    def generation(self) -> int:
         """
-        回调处理查询结果集
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param callback: 回调函数 fun(row)
-        :param kwargs: 其他配置
+        当前版本号
         :return:
         """
-        if not callback:
-            raise RuntimeError("callback fun not found")
-        st = time.time()
-        sql = self.__sql(sql)
-        parameters = self.__parameters(*parameters)
-        cursor = self.getConnection().cursor()
-        try:
-            cursor.execute(sql, parameters, **kwargs)
-            while True:
-                try:
-                    row = cursor.__next__()
-                    callback(self.__humpRow(row))
-                except StopIteration:
-                    break
-        finally:
-            self.__printSql(sql, parameters, st)
-            cursor.close()
+        return self.__generation
 
-    def executeScript(self, sqlScript: str, *params, commit=True, **variables):
+    def invalidateSql(self, sql: str, pending: bool = False):
         """
-        执行SQL脚本
-        :param sqlScript: sql脚本
-        :param commit: 自动提交
+        按写操作SQL涉及的表失效缓存，无法解析表名时清空缓存
+        :param sql: 写操作SQL
+        :param pending: 事务未提交，提交或回滚时再次失效
         :return:
         """
-        try:
-            sqlScript = sqlScript.format_map(variables)
-        except:
-            pass
-
-        st = time.time()
-        cursor = self.getConnection().cursor()
-        try:
-            res = cursor.executescript(sqlScript, *params)
-            if commit or commit > 0:
-                self.commit()
-            return res
-        finally:
-            self.__printSql(sqlScript, None, st)
-            cursor.close()
+        tables = QueryCache.tables(sql)
+        if QueryCache.__ddlPattern.search(sql):
+            tables.add(QueryCache.SCHEMA_TABLE)
+        if not tables:
+            self.invalidate()
+            return
+        self.invalidate(tables)
+        if pending:
+            pendingTables = getattr(self.__pending, "tables", None)
+            if pendingTables is None:
+                pendingTables = self.__pending.tables = set()
+            pendingTables.update(tables)
 
-    def executeScriptFile(self, sqlScriptFilePath: str, *params, commit=True, **variables):
+    def flushPending(self):
         """
-        执行SQL脚本文件
-        :param sqlScriptFilePath: sql脚本文件路径
-        :param commit: 自动提交
+        事务提交或回滚后，再次失效当前线程事务涉及的表
         :return:
         """
-        import os
-        if os.path.exists(sqlScriptFilePath) and os.path.isfile(sqlScriptFilePath):
-            with open(sqlScriptFilePath, 'r') as f:
-                sqlScript = f.read()
-            if sqlScript and len(sqlScript) > 0:
-                return self.executeScript(sqlScript, *params, commit, **variables)
+        pendingTables = getattr(self.__pending, "tables", None)
+        if pendingTables:
+            self.__pending.tables = None
+            self.invalidate(pendingTables)
 
-    def execute(self, sql, *parameters, commit=True, **kwargs):
+    def invalidate(self, tables: Iterable[str] = None):
         """
-        执行SQL
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
+        失效缓存
+        :param tables: 表名，None表示清空所有缓存
         :return:
         """
-        st = time.time()
-        sql = self.__sql(sql)
-        parameters = self.__parameters(*parameters)
-        cursor = self.getConnection().cursor()
-        try:
-            res = cursor.execute(sql, parameters, **kwargs)
-            if commit or commit > 0:
-                self.commit()
-            return res
-        finally:
-            self.__printSql(sql, parameters, st)
-            cursor.close()
+        with self.__lock:
+            self.__generation += 1
+            self.__invalidations += 1
+            if tables is None:
+                self.__entries.clear()
+                self.__tableKeys.clear()
+                return
+            keys = set(self.__tableKeys.get(QueryCache.ANY_TABLE, ()))
+            for table in tables:
+                keys.update(self.__tableKeys.get(table, ()))
+            for key in keys:
+                self.__remove(key)
 
-    def update(self, sql, *parameters, commit=True, **kwargs):
+    def clear(self):
         """
-        更新数据
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
+        清空缓存
         :return:
         """
-        return self.execute(sql, *parameters, commit=commit, **kwargs)
+        self.invalidate()
 
-    def insert(self, sql, *parameters, commit=True, **kwargs):
+    def size(self) -> int:
         """
-        插入数据
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
+        缓存条数
         :return:
         """
-        return self.execute(sql, *parameters, commit=commit, **kwargs)
+        return len(self.__entries)
 
-    def insertBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+    def stats(self) -> dict:
         """
-        批量插入
-        :param sql: SQL语句
-        :param rows: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
-        :return:
+        缓存统计
+        :return: {"hits", "misses", "hitRate", "size", "evictions", "invalidations"}
         """
-        st = time.time()
-        sql = self.__sql(sql)
-        cursor = self.__connection.cursor()
-        try:
-            cursor.executemany(sql, rows, **kwargs)
-            if commit or commit > 0:
-                self.commit()
-        finally:
-            self.__printSql(sql, rows, st)
-            cursor.close()
+        total = self.__hits + self.__misses
+        return {"hits": self.__hits, "misses": self.__misses, "hitRate": total and self.__hits / total or 0.0,
+                "size": len(self.__entries), "evictions": self.__evictions, "invalidations": self.__invalidations}
 
-    def replace(self, sql, *parameters, commit=True, **kwargs):
+    @staticmethod
+    def tables(sql: str) -> set:
         """
-        替换数据（插入或按唯一键更新）
+        解析SQL涉及的表名（小写，去掉库名和引号）
         :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
-        :return:
+        :return: 表名集合
         """
-        return self.execute(sql, *parameters, commit=commit, **kwargs)
+        names = QueryCache.__tablePattern.findall(sql)
+        for fromClause in QueryCache.__fromPattern.findall(sql):
+            for item in fromClause.split(","):
+                item = item.strip()
+                if item and not item.startswith("("):
+                    names.append(item.split()[0])
+        tables = set()
+        for name in names:
+            name = name.strip('`"').split(".")[-1].strip('`"').lower()
+            if name and name not in ("select", "if", "not", "exists"):
+                tables.add(name)
+        return tables
 
-    def replaceBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+    def __remove(self, key):
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            for table in entry[1]:
+                keys = self.__tableKeys.get(table)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.__tableKeys[table]
+
+
+class SqlMetrics(object):
+    """
+    SQL执行指标：按SQL指纹（参数、字面量替换为?）统计耗时直方图、行数、错误数，记录慢SQL（线程安全）
+    """
+    # 耗时直方图桶上限（毫秒）
+    BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+    import re
+    __stringPattern = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+    __numberPattern = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+    __inPattern = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+    __spacePattern = re.compile(r"\s+")
+    del re
+
+    def __init__(self, slowThreshold: float = 1.0, sink=None, maxFingerprints: int = 1000,
+                 maxSlowQueries: int = 100) -> None:
         """
-        批量插入
+        SQL执行指标
+        :param slowThreshold: 慢SQL阈值（秒），小于等于0不记录
+        :param sink: 事件回调 fun(event)，event: {"sql", "fingerprint", "seconds", "rows", "error", "slow", "parameters"}
+        :param maxFingerprints: 最多统计的SQL指纹数，超出后归入"<other>"
+        :param maxSlowQueries: 保留最近的慢SQL条数
+        """
+        import collections
+        self.__slowThreshold = slowThreshold
+        self.__sink = sink
+        self.__maxFingerprints = maxFingerprints
+        self.__lock = threading.Lock()
+        self.__stats = {}
+        self.__slowQueries = collections.deque(maxlen=maxSlowQueries)
+
+    def record(self, sql, parameters, seconds: float, rows: int = -1, error: BaseException = None):
+        """
+        记录一次执行
         :param sql: SQL语句
-        :param rows: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
+        :param parameters: SQL参数
+        :param seconds: 耗时（秒）
+        :param rows: 返回或影响的行数
+        :param error: 执行异常
         :return:
         """
-        return self.insertBatch(sql, rows, commit, **kwargs)
+        if not sql:
+            return
+        import bisect
+        fingerprint = SqlMetrics.fingerprint(sql)
+        ms = seconds * 1000
+        slow = 0 < self.__slowThreshold <= seconds
+        bucket = bisect.bisect_left(SqlMetrics.BUCKETS, ms)
+        if slow:
+            parameters = SqlMetrics.__compact(parameters)
+        with self.__lock:
+            stat = self.__stats.get(fingerprint)
+            if stat is None:
+                if len(self.__stats) >= self.__maxFingerprints:
+                    fingerprint = "<other>"
+                    stat = self.__stats.get(fingerprint)
+                if stat is None:
+                    stat = self.__stats[fingerprint] = {"count": 0, "errors": 0, "rows": 0, "slow": 0,
+                                                        "totalMs": 0.0, "minMs": ms, "maxMs": ms,
+                                                        "buckets": [0] * len(SqlMetrics.BUCKETS)}
+            stat["count"] += 1
+            stat["totalMs"] += ms
+            stat["minMs"] = min(stat["minMs"], ms)
+            stat["maxMs"] = max(stat["maxMs"], ms)
+            stat["buckets"][bucket] += 1
+            if rows is not None and rows > 0:
+                stat["rows"] += rows
+            if error is not None:
+                stat["errors"] += 1
+            if slow:
+                stat["slow"] += 1
+                self.__slowQueries.append({"time": time.time(), "sql": sql, "parameters": parameters,
+                                           "seconds": seconds, "rows": rows,
+                                           "error": error is not None and repr(error) or None})
+        if self.__sink:
+            event = {"sql": sql, "fingerprint": fingerprint, "seconds": seconds, "rows": rows,
+                     "error": error, "slow": slow}
+            if slow:
+                event["parameters"] = parameters
+            self.__sink(event)
 
-    def delete(self, sql, *parameters, commit=True, **kwargs):
+    def snapshot(self) -> dict:
         """
-        删除数据
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param commit: 是否自动提交
-        :param kwargs: 其他配置
+        统计快照：{fingerprint: {"count", "errors", "rows", "slow", "totalMs", "avgMs", "minMs", "maxMs",
+        "p50Ms", "p95Ms", "p99Ms", "buckets"}}，分位数按直方图桶上限估算
         :return:
         """
-        return self.execute(sql, *parameters, commit=commit, **kwargs)
+        with self.__lock:
+            stats = {fingerprint: dict(stat, buckets=list(stat["buckets"])) for fingerprint, stat in
+                     self.__stats.items()}
+        for stat in stats.values():
+            stat["avgMs"] = stat["totalMs"] / stat["count"]
+            for name, percent in (("p50Ms", 0.5), ("p95Ms", 0.95), ("p99Ms", 0.99)):
+                stat[name] = SqlMetrics.__percentile(stat, percent)
+            stat["buckets"] = {str(SqlMetrics.BUCKETS[i]): count for i, count in enumerate(stat["buckets"]) if count}
+        return stats
 
-    def clear(self, table, commit=True, **kwargs):
+    def slowQueries(self) -> list:
         """
-        清空表数据
-        :param table: 表名
-        :param commit: 自动提交
-        :param kwargs: 其他配置
+        最近的慢SQL（包含参数）
         :return:
         """
-        if self.__dbType == 'mysql':
-            self.execute(f"TRUNCATE TABLE {table}", commit=commit, **kwargs)
-        else:
-            self.execute(f"DELETE FROM {table}", commit=commit, **kwargs)
+        with self.__lock:
+            return list(self.__slowQueries)
 
-    def drop(self, table, commit=True, **kwargs):
+    def reset(self):
         """
-        删除表
-        :param table: 表名
-        :param commit: 自动提交
-        :param kwargs: 其他配置
+        清空统计
         :return:
         """
-        self.execute(f"DROP TABLE IF EXISTS {table}", commit=commit, **kwargs)
+        with self.__lock:
+            self.__stats.clear()
+            self.__slowQueries.clear()
 
-    def count(self, table, where: str = None):
+    @staticmethod
+    def loggingSink(name: str = "dber", level: int = None, slowLevel: int = None):
         """
-        统计表的行数
-        :param table: 表名
-        :param where: 额外条件
-        :return: 其他配置
+        日志输出：普通SQL按level输出（None不输出），慢SQL和异常按slowLevel输出
+        :param name: logger名称
+        :param level: 普通SQL日志级别，默认DEBUG
+        :param slowLevel: 慢SQL和异常日志级别，默认WARNING
+        :return: 事件回调
         """
-        sql = f"SELECT COUNT(1) AS cnt FROM {table}"
-        if where and len(where) > 0:
-            if not (where.__contains__("where ") or where.__contains__("WHERE ")):
-                sql = f"{sql} WHERE {where}"
-            else:
-                sql = f"{sql} {where}"
-        return self.getColumnIntValue(sql, defValue=0)
+        import logging
+        logger = logging.getLogger(name)
+        level = level is None and logging.DEBUG or level
+        slowLevel = slowLevel is None and logging.WARNING or slowLevel
 
-    def getColumnValue(self, sql, *parameters, column: str = None, defValue=None):
+        def sink(event):
+            ms = round(event["seconds"] * 1000, 3)
+            if event["error"] is not None:
+                logger.log(slowLevel, "SQL error [%sms]: %s , error : %r", ms, event["sql"], event["error"])
+            elif event["slow"]:
+                logger.log(slowLevel, "Slow SQL [%sms]: %s , params : %s", ms, event["sql"], event.get("parameters"))
+            elif logger.isEnabledFor(level):
+                logger.log(level, "SQL [%sms]: %s", ms, event["sql"])
+
+        return sink
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def fingerprint(sql: str) -> str:
         """
-        查询字段的值
+        SQL指纹：字符串和数字字面量替换为?，IN列表合并，空白归一，转小写
         :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param column: 查询的字段值
-        :param defValue: 默认值
         :return:
         """
-        if column and len(column) > 0:
-            row = self.selectOne(sql, *parameters)
-            if row and row.__contains__(column):
-                return row[column]
-        else:
-            row = self.selectOne(sql, *parameters, hump=False)
-            if row and len(row) == 1:
-                for cn in row:
-                    return row[cn]
-            else:
-                raise RuntimeError(f"There are multiple columns, but did not specify the only one : {set(row.keys())}")
-        return defValue
+        sql = SqlMetrics.__stringPattern.sub("?", sql)
+        sql = SqlMetrics.__numberPattern.sub("?", sql)
+        sql = SqlMetrics.__inPattern.sub("(?+)", sql)
+        return SqlMetrics.__spacePattern.sub(" ", sql).strip().lower()
 
-    def getColumnFloatValue(self, sql, *parameters, column: str = None, defValue: float = None) -> float:
+    @staticmethod
+    def __compact(parameters, limit: int = 20):
         """
-        查询字段的值
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param column: 查询的字段值
-        :param defValue: 默认值
-        :return:
+        慢SQL只保留前limit个参数，避免批量操作的参数常驻内存
         """
-        value = self.getColumnValue(sql, *parameters, column=column, defValue=defValue)
-        if value:
-            return float(value)
+        if isinstance(parameters, (list, tuple)):
+            if len(parameters) > limit:
+                return list(parameters[:limit]) + [f"...({len(parameters) - limit} more)"]
+            return parameters
+        if parameters is None or isinstance(parameters, (str, int, float, bytes)):
+            return parameters
+        return repr(parameters)
 
-    def getColumnBoolValue(self, sql, *parameters, column: str = None, defValue: bool = None) -> bool:
+    @staticmethod
+    def __percentile(stat: dict, percent: float) -> float:
+        target = stat["count"] * percent
+        accumulated = 0
+        for i, count in enumerate(stat["buckets"]):
+            accumulated += count
+            if count and accumulated >= target:
+                return min(SqlMetrics.BUCKETS[i], stat["maxMs"])
+        return stat["maxMs"]
+
+
+class MetadataCatalog(object):
+    """
+    Mysql元数据目录：按库一次查询加载全部表和字段并建立索引，TTL过期或执行DDL后懒加载刷新（线程安全）
+    """
+    import re
+    __ddlPattern = re.compile(r"^\s*(?:create|alter|drop|truncate|rename)\b", re.I | re.M)
+    del re
+
+    __databaseSql = "select distinct table_schema from information_schema.tables"
+    __tableSql = ("select table_name,table_comment,create_time,update_time,table_rows,data_length,index_length,"
+                  "auto_increment from information_schema.tables where table_schema = ?")
+    __columnSql = ("select table_name as catalog_table,column_name,data_type,column_type,is_nullable,column_key,"
+                   "column_comment,column_default,extra from information_schema.columns "
+                   "where table_schema = ? order by table_name, ordinal_position")
+
+    def __init__(self, db, ttl: float = 300) -> None:
         """
-        查询字段的值
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param column: 查询的字段值
-        :param defValue: 默认值
-        :return:
+        元数据目录
+        :param db: 数据库
+        :param ttl: 元数据有效期（秒），小于等于0不过期
         """
-        value = self.getColumnValue(sql, *parameters, column=column, defValue=defValue)
-        if value:
-            if isinstance(value, str):
-                if value in ('False', 'false', '0'):
-                    return False
-                if value in ('True', 'true', '1'):
-                    return True
-                raise ValueError("转换bool类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
-            if isinstance(value, (int, bool, float)):
-                return bool(value)
-            raise ValueError("转换bool类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
+        self.__db = db
+        self.__ttl = ttl
+        self.__lock = threading.RLock()
+        # 库名 -> (过期时间, 表信息列表, {表名: 字段信息列表}, {小写表名: 表名})
+        self.__schemas = {}
+        # (过期时间, 库名列表)
+        self.__databases = None
+        self.__hits = 0
+        self.__loads = 0
+        self.__invalidations = 0
 
-    def getColumnIntValue(self, sql, *parameters, column: str = None, defValue: int = None) -> int:
+    def databases(self) -> list[str]:
         """
-        查询字段的值
-        :param sql: SQL语句
-        :param parameters: SQL占位符参数
-        :param column: 查询的字段值
-        :param defValue: 默认值
+        所有数据库名称
         :return:
         """
-        value = self.getColumnFloatValue(sql, *parameters, column=column, defValue=defValue)
-        if value:
-            return int(value)
+        with self.__lock:
+            if self.__databases is None or self.__expired(self.__databases[0]):
+                rows = self.__db.select(MetadataCatalog.__databaseSql, hump=False, cache=False)
+                self.__databases = (self.__expireTime(), [next(iter(row.values())) for row in rows])
+                self.__loads += 1
+            else:
+                self.__hits += 1
+            return list(self.__databases[1])
 
-    def callProc(self, procName: str, args):
+    def tables(self, database: str) -> list[dict]:
         """
-        调用存储过程
-        :param procName: 存储过程名称
-        :param args: 存储过程参数
+        数据库下所有表信息
+        :param database: 数据库名
         :return:
         """
-        st = time.time()
-        cursor = self.getConnection().cursor()
-        try:
-            cursor.callproc(procName, args)
-        finally:
-            self.__printSql(f"call proc : {procName}, args: {args}", st)
-            cursor.close()
+        return [dict(table) for table in self.__schema(database)[1]]
 
-    def getConnection(self):
+    def tableNames(self, database: str) -> list[str]:
         """
-        连接是否关闭
+        数据库下所有表名称
+        :param database: 数据库名
         :return:
         """
-        if self.isClosed():
-            raise RuntimeError("Database connection is closed")
-        return self.__connection
+        return list(self.__schema(database)[2])
 
-    def commit(self):
+    def columns(self, database: str, table: str) -> list[dict]:
         """
-        提交事务
+        表的字段信息，按字段顺序
+        :param database: 数据库名
+        :param table: 表名
         :return:
         """
-        if not self.isClosed():
-            self.__connection.commit()
+        return [dict(column) for column in self.__columns(database, table)]
 
-    def rollback(self):
+    def column(self, database: str, table: str, column: str) -> dict:
         """
-        回滚事务
-        :return:
+        表的字段信息
+        :param database: 数据库名
+        :param table: 表名
+        :param column: 字段名
+        :return: 字段不存在时为None
         """
-        if not self.isClosed():
-            self.__connection.rollback()
+        for info in self.__columns(database, table):
+            if info.get("column_name", info.get("COLUMN_NAME")) == column:
+                return dict(info)
 
-    def isClosed(self) -> bool:
+    def invalidate(self, database: str = None):
         """
-        连接是否关闭
+        失效元数据，下次访问时重新加载
+        :param database: 数据库名，默认失效全部
         :return:
         """
-        return self.__closed
+        with self.__lock:
+            if database is None:
+                self.__schemas.clear()
+                self.__databases = None
+            else:
+                self.__schemas.pop(database, None)
+            self.__invalidations += 1
 
-    def close(self):
+    def invalidateSql(self, sql: str) -> bool:
         """
-        关闭连接
-        :return:
+        执行的SQL包含DDL时失效全部元数据
+        :param sql: 执行的SQL
+        :return: 是否失效
         """
-        if not self.isClosed():
-            self.commit()
-            self.__connection.close()
-            self.__closed = True
-            if self.__debug:
-                print(f"成功关闭DB：{self}, close conn: {self.__connection}")
+        if sql and MetadataCatalog.__ddlPattern.search(sql):
+            self.invalidate()
+            return True
+        return False
 
-    def enableDebug(self):
+    def stats(self) -> dict:
         """
-        启用debug能力
+        统计信息：命中、加载、失效次数和已加载的库
         :return:
         """
-        self.__debug = True
+        with self.__lock:
+            return {"hits": self.__hits, "loads": self.__loads, "invalidations": self.__invalidations,
+                    "databases": list(self.__schemas)}
 
-    def disableDebug(self):
+    def __columns(self, database: str, table: str) -> list:
+        schema = self.__schema(database)
+        columns = schema[2].get(table)
+        if columns is None:
+            columns = schema[2].get(schema[3].get(table.lower()), ())
+        return columns
+
+    def __schema(self, database: str):
+        with self.__lock:
+            schema = self.__schemas.get(database)
+            if schema is not None and not self.__expired(schema[0]):
+                self.__hits += 1
+                return schema
+            tables = self.__db.select(MetadataCatalog.__tableSql, database, cache=False)
+            columns = {}
+            for table in tables:
+                columns[table.get("table_name", table.get("TABLE_NAME"))] = []
+            for column in self.__db.select(MetadataCatalog.__columnSql, database, cache=False):
+                table = column.pop("catalog_table")
+                column.pop("catalogTable", None)
+                columns.setdefault(table, []).append(column)
+            schema = (self.__expireTime(), tables, columns, {table.lower(): table for table in columns})
+            self.__schemas[database] = schema
+            self.__loads += 1
+            return schema
+
+    def __expireTime(self):
+        return self.__ttl and self.__ttl > 0 and time.time() + self.__ttl or None
+
+    @staticmethod
+    def __expired(expireTime) -> bool:
+        return expireTime is not None and expireTime <= time.time()
+
+
+class SqlScript(object):
+    """
+    流式SQL脚本：分块读取文件并逐条切分语句（处理引号、注释和DELIMITER命令），内存占用与脚本大小无关；
+    执行时连续的同一表INSERT ... VALUES合并为一条多行INSERT，每N条语句提交一次
+    """
+    import re
+    __insertPattern = re.compile(r"^(INSERT\s+(?:IGNORE\s+)?INTO\s+[`\"\w.]+\s*(?:\([^()]*\))?\s*VALUES)\s*(\(.*\))$",
+                                 re.I | re.S)
+    __literalPattern = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"", re.S)
+    # VALUES之后还有其他子句（ON DUPLICATE KEY、ON CONFLICT、RETURNING等）的INSERT不能合并
+    __tailPattern = re.compile(r"\)\s*[a-z]", re.I)
+    __spacePattern = re.compile(r"\s+")
+    __textPattern = re.compile(r"\S")
+    del re
+
+    def __init__(self, source, delimiter: str = ";", dialect: str = "mysql", encoding: str = "utf-8",
+                 chunkSize: int = 1 << 20) -> None:
         """
-         禁止debug能力
-         :return:
-         """
-        self.__debug = False
+        流式SQL脚本
+        :param source: 文件路径或文件对象（SQL文本可以用io.StringIO包装）
+        :param delimiter: 初始语句分隔符，脚本中可以用 DELIMITER 命令修改
+        :param dialect: mysql（支持#注释和反斜杠转义）或sqlite
+        :param encoding: 文件编码
+        :param chunkSize: 每次读取的字符数
+        """
+        if not delimiter:
+            raise ValueError("delimiter must not be empty")
+        self.__source = source
+        self.__delimiter = delimiter
+        self.__mysql = dialect == 'mysql'
+        self.__encoding = encoding
+        self.__chunkSize = max(chunkSize, 64)
 
-    def getDatabaseType(self):
+    def statements(self):
         """
-        获取数据库类型
-        :return:
+        逐条切分语句，注释被移除（Mysql的 /*! */ 可执行注释保留）
+        :return: 语句生成器
         """
-        return self.__dbType
+        file = self.__source
+        close = isinstance(file, str)
+        if close:
+            file = open(file, 'r', encoding=self.__encoding)
+        try:
+            yield from self.__tokenize(file)
+        finally:
+            if close:
+                file.close()
 
-    def __printSql(self, sql, params, st):
+    def run(self, connection, commitEvery: int = 1000, batchSize: int = 500, maxBatchBytes: int = 1 << 20,
+            stopOnError: bool = True, progress=None, onStatement=None, record=None, commit=None) -> dict:
         """
-        打印执行的SQL语句
-        :param sql: 执行SQL
-        :param st: 开始处理的时间
-        :return:
+        在连接上执行脚本
+        :param connection: DB-API连接
+        :param commitEvery: 每执行多少条语句提交一次
+        :param batchSize: 合并为一条多行INSERT的最大语句数，小于等于1不合并
+        :param maxBatchBytes: 合并后INSERT语句的最大长度（字符），需小于Mysql的max_allowed_packet
+        :param stopOnError: 语句执行失败时是否停止（已提交的部分不会回滚）
+        :param progress: 进度回调 fun(stats)，每次提交后调用
+        :param onStatement: 每次执行后回调 fun(event)，event: {"index", "sql", "statements", "seconds", "rows", "error"}
+        :param record: 执行记录回调 fun(sql, st, rows, error)
+        :param commit: 提交函数，默认为connection.commit
+        :return: 统计信息 {"statements", "executes", "errors", "commits", "seconds", "statementsPerSec", "slowest"}
         """
-        if sql and self.__debug:
-            ct = (time.time() - st)
-            if ct > 1:
-                ct = f"{round(ct, 3)}s"
-            else:
-                ct = f"{round(ct * 1000, 3)}ms"
-            if params:
-                print(f"===> ExecuteSQL[{ct}]: {sql} ， params : {params}")
-            else:
-                print(f"===> ExecuteSQL[{ct}]: {sql}")
+        import heapq
+        st = time.time()
+        stats = {"statements": 0, "executes": 0, "errors": 0, "commits": 0, "seconds": 0.0,
+                 "statementsPerSec": 0.0, "slowest": []}
+        # 自动提交模式的sqlite3连接（isolation_level=None）需要显式开启事务
+        explicitBegin = getattr(connection, "isolation_level", "") is None
+        slowest = []
+        uncommitted = 0
+        prefix = None
+        values = []
+        valuesSize = 0
 
-    def __parameters(self, *parameters):
-        params = []
-        if parameters:
-            for param in parameters:
-                if not param:
-                    continue
-                if isinstance(param, bool):
-                    raise ValueError(f"sql parameters value type is not support : {type(param)}")
-                elif isinstance(param, (str, int, float)):
-                    params.append(param)
-                elif isinstance(param, (list, tuple, set)):
-                    params.extend(param)
-                else:
-                    raise ValueError(f"sql parameters value type is not support : {type(param)}")
-        return params
+        commitFun = commit or connection.commit
 
-    def __sql(self, sql) -> str:
-        if self.__dbType == 'mysql':
-            sql = sql.replace("?", "%s")
-        elif self.__dbType == 'sqlite':
-            sql = sql.replace("%s", "?").replace("%d", "?")
-        else:
-            sql = sql
-        return sql
+        def commitWindow():
+            nonlocal uncommitted
+            commitFun()
+            uncommitted = 0
+            stats["commits"] += 1
+            stats["seconds"] = time.time() - st
+            stats["statementsPerSec"] = stats["seconds"] > 0 and stats["statements"] / stats["seconds"] or 0.0
+            if progress:
+                progress(dict(stats, slowest=None))
 
-    def __del__(self):
-        self.close()
-        del self.__connection
+        def execute(sql: str, count: int):
+            nonlocal uncommitted
+            if explicitBegin and not connection.in_transaction:
+                connection.execute("BEGIN")
+            executeSt = time.time()
+            rows = -1
+            error = None
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql)
+                rows = cursor.rowcount
+            except Exception as e:
+                error = e
+                stats["errors"] += 1
+                if stopOnError:
+                    raise
+            finally:
+                cursor.close()
+                seconds = time.time() - executeSt
+                index = stats["executes"]
+                stats["executes"] += 1
+                shortSql = len(sql) > 200 and f"{sql[:200]}..." or sql
+                heapq.heappush(slowest, (seconds, index, shortSql))
+                if len(slowest) > 10:
+                    heapq.heappop(slowest)
+                if record:
+                    record(shortSql, executeSt, rows, error)
+                if onStatement:
+                    onStatement({"index": index, "sql": shortSql, "statements": count, "seconds": seconds,
+                                 "rows": rows, "error": error})
+            stats["statements"] += count
+            uncommitted += count
+            if uncommitted >= commitEvery:
+                commitWindow()
 
-    @staticmethod
-    def __str2Hump(columnName):
-        arr = filter(None, columnName.lower().split('_'))
-        res = ''
-        for item in arr:
-            res = res + item[0].upper() + item[1:]
-        res = res[0].lower() + res[1:]
-        return res
+        def flush():
+            nonlocal prefix, values, valuesSize
+            if values:
+                execute(f"{prefix} {','.join(values)}", len(values))
+            prefix = None
+            values = []
+            valuesSize = 0
 
-    @staticmethod
-    def __humpRow(row) -> dict:
-        if row:
-            newRow = dict(row)
-            for key in row.keys():
-                newRow[DB.__str2Hump(key)] = row[key]
-            return newRow
+        for statement in self.statements():
+            match = batchSize > 1 and SqlScript.__insertPattern.match(statement)
+            if match and not SqlScript.__tailPattern.search(SqlScript.__literalPattern.sub("''", match.group(2))):
+                statementPrefix = SqlScript.__spacePattern.sub(" ", match.group(1))
+                if statementPrefix != prefix or len(values) >= batchSize \
+                        or valuesSize + len(match.group(2)) > maxBatchBytes:
+                    flush()
+                    prefix = statementPrefix
+                values.append(match.group(2))
+                valuesSize += len(match.group(2)) + 1
+                continue
+            flush()
+            execute(statement, 1)
+        flush()
+        if uncommitted or explicitBegin and connection.in_transaction:
+            commitWindow()
+        stats["seconds"] = time.time() - st
+        stats["statementsPerSec"] = stats["seconds"] > 0 and stats["statements"] / stats["seconds"] or 0.0
+        stats["slowest"] = [{"index": index, "sql": sql, "seconds": seconds}
+                            for seconds, index, sql in sorted(slowest, reverse=True)]
+        return stats
 
+    def __tokenize(self, file):
+        delimiter = self.__delimiter
+        special = self.__specialPattern(delimiter)
+        buf = ""
+        pos = 0
+        eof = False
+        parts = []
+        hasText = False
 
-class SQLite(DB):
-    def __init__(self, database, debug: bool = False) -> None:
-        """
-        SQLite3数据库
-        :param database:
-        :param debug:
-        """
-        import sqlite3
-        self.__database = database
-        self.__debug = debug
-        self.__connection = sqlite3.connect(database)
-        self.__connection.row_factory = self.__dict_factory
-        super().__init__(self.__connection, debug=self.__debug, dbType='sqlite')
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = file.read(self.__chunkSize)
+            if isinstance(chunk, bytes):
+                chunk = chunk.decode(self.__encoding)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
 
-    def getBusinessDatabaseNames(self) -> list[str]:
+        fill()
+        while True:
+            if not hasText:
+                # 语句开头：跳过空白，识别 DELIMITER 命令
+                match = SqlScript.__textPattern.search(buf, pos)
+                if match is None:
+                    if eof:
+                        break
+                    pos = len(buf)
+                    fill()
+                    continue
+                pos = match.start()
+                if len(buf) - pos < 10 and not eof:
+                    fill()
+                    continue
+                if buf[pos:pos + 10].lower() == "delimiter " or buf[pos:pos + 10].lower() == "delimiter\t":
+                    end = buf.find("\n", pos)
+                    if end < 0 and not eof:
+                        fill()
+                        continue
+                    end = end < 0 and len(buf) or end
+                    delimiter = buf[pos + 10:end].strip()
+                    if not delimiter:
+                        raise ValueError("DELIMITER command without delimiter")
+                    special = self.__specialPattern(delimiter)
+                    pos = end
+                    continue
+            match = special.search(buf, pos)
+            if match is None:
+                if eof:
+                    parts.append(buf[pos:])
+                    break
+                # 保留结尾可能是注释、分隔符开头的字符，读取更多数据后重新匹配
+                safe = len(buf) - max(len(delimiter), 3)
+                if safe > pos:
+                    text = buf[pos:safe]
+                    parts.append(text)
+                    hasText = hasText or bool(text.strip())
+                    pos = safe
+                fill()
+                continue
+            start = match.start()
+            token = match.group()
+            if start > pos:
+                text = buf[pos:start]
+                parts.append(text)
+                hasText = hasText or bool(text.strip())
+                pos = start
+            if token == delimiter:
+                statement = "".join(parts).strip()
+                if statement:
+                    yield statement
+                parts = []
+                hasText = False
+                pos = start + len(delimiter)
+            elif token in ("'", '"', "`"):
+                end = self.__quoteEnd(buf, start + 1, token, eof)
+                if end < 0:
+                    fill()
+                    continue
+                parts.append(buf[start:end])
+                hasText = True
+                pos = end
+            elif token == "/*":
+                end = buf.find("*/", start + 2)
+                if end < 0:
+                    if not eof:
+                        fill()
+                        continue
+                    end = len(buf) - 2
+                if buf.startswith("/*!", start):
+                    parts.append(buf[start:end + 2])
+                    hasText = True
+                else:
+                    parts.append(" ")
+                pos = end + 2
+            else:
+                # -- 注释需要后跟空白，# 注释只用于Mysql
+                if token == "--" and start + 2 >= len(buf) and not eof:
+                    fill()
+                    continue
+                if token == "--" and start + 2 < len(buf) and not buf[start + 2].isspace():
+                    parts.append(token)
+                    hasText = True
+                    pos = start + 2
+                    continue
+                end = buf.find("\n", start)
+                if end < 0:
+                    if not eof:
+                        fill()
+                        continue
+                    end = len(buf)
+                parts.append(" ")
+                pos = end
+        statement = "".join(parts).strip()
+        if statement:
+            yield statement
+
+    def __specialPattern(self, delimiter: str):
+        import re
+        tokens = [r"'", r'"', r"`", r"/\*", r"--", re.escape(delimiter)]
+        if self.__mysql:
+            tokens.append(r"#")
+        return re.compile("|".join(tokens))
+
+    def __quoteEnd(self, buf: str, index: int, quote: str, eof: bool) -> int:
         """
-        获取业务数据库名称
-        :return:
+        查找字符串的结束位置，支持重复引号和Mysql的反斜杠转义
+        :return: 结束引号之后的位置，需要读取更多数据时为-1
         """
-        return self.getDatabaseNames()
+        while True:
+            end = buf.find(quote, index)
+            if self.__mysql and quote != "`":
+                backslash = buf.find("\\", index)
+                if 0 <= backslash and (end < 0 or backslash < end):
+                    if backslash + 1 >= len(buf):
+                        return eof and len(buf) or -1
+                    index = backslash + 2
+                    continue
+            if end < 0:
+                return eof and len(buf) or -1
+            if end + 1 >= len(buf) and not eof:
+                return -1
+            if buf.startswith(quote, end + 1):
+                index = end + 2
+                continue
+            return end + 1
 
-    def getDatabaseNames(self) -> list[str]:
-        """
-         获取所有数据库名称
-         :return:
-         """
-        return ["main"]
 
-    def getTables(self, tables=None) -> list[dict]:
-        return self.select("select distinct tbl_name as table_name, sql from sqlite_master "
-                           f"where type = 'table' and tbl_name {inSql(tables)}")
+class CallbackError(RuntimeError):
+    """
+    并行回调结果集的聚合异常
+    """
 
-    def getTableNames(self) -> list[str]:
+    def __init__(self, message: str, errors: list, stats: dict) -> None:
         """
-        获取所有数据库名称
-        :return:
+        :param message: 异常信息
+        :param errors: [(行序号, 异常)]，批量回调时为批次第一行的序号
+        :param stats: 统计信息
         """
-        rows = self.select("select distinct tbl_name from sqlite_master where type = 'table'", hump=False)
-        databaseNames = []
-        if rows:
-            for row in rows:
-                databaseNames.append(row['tbl_name'])
-        return databaseNames
-
-    @staticmethod
-    def __dict_factory(cursor, row):
-        d = {}
-        for idx, col in enumerate(cursor.description):
-            d[col[0]] = row[idx]
-        return d
+        super().__init__(message)
+        self.errors = errors
+        self.stats = stats
 
 
-class MySQL(DB):
+def _callbackRows(callback, rows):
     """
-    Mysql数据库
+    在工作线程（进程）中逐行回调，单行异常不影响同一批次的其他行
+    :return: (回调返回值列表, [(批次内行序号, 异常)])
     """
+    results = []
+    errors = []
+    for i, row in enumerate(rows):
+        try:
+            results.append(callback(row))
+        except Exception as e:
+            results.append(None)
+            errors.append((i, e))
+    return results, errors
 
-    def __init__(self, host="localhost", port: int = 3306, username="root", password="", database="information_schema",
-                 charset: str = "utf8mb4",
-                 debug: bool = False,
-                 **config) -> None:
-        import pymysql
-        from pymysql.constants import CLIENT
-
-        self.__host = host
-        self.__username = username
-        self.__password = password
-        self.__database = database
-        self.__charset = charset
-        self.__debug = debug
 
-        # 支持多条语句执行
-        # https://stackoverflow.com/questions/58544640/pymysql-unable-to-execute-multiple-queries
-        if config.__contains__("client_flag"):
-            config['client_flag'] |= CLIENT.MULTI_STATEMENTS
-        else:
-            config['client_flag'] = CLIENT.MULTI_STATEMENTS
+class CircuitOpenError(RuntimeError):
+    """
+    熔断器打开时快速失败的异常
+    """
 
-        self.__connection = pymysql.connect(host=host, port=port, user=username, password=password, database=database,
-                                            charset=charset, cursorclass=pymysql.cursors.DictCursor, **config)
-        super().__init__(self.__connection, debug=self.__debug, dbType='mysql')
 
-    def executeScript(self, sqlScript: str, *params, commit=True, **variables):
-        try:
-            sqlScript = sqlScript.format_map(variables)
-        except:
-            pass
-        return self.execute(sqlScript, *params, commit=commit)
+class CircuitBreaker(object):
+    """
+    熔断器：连续失败达到阈值后打开，打开期间直接失败（不再等待连接超时），
+    resetTimeout秒后半开，放行一次尝试，成功则关闭，失败则重新打开
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
 
-    def setDatabase(self, database: str):
-        self.__connection.select_db(database)
-        self.__database = database or self.__database
+    def __init__(self, failureThreshold: int = 5, resetTimeout: float = 10.0) -> None:
+        """
+        熔断器
+        :param failureThreshold: 打开熔断器的连续失败次数
+        :param resetTimeout: 打开后多久（秒）放行一次尝试
+        """
+        if failureThreshold < 1:
+            raise ValueError(f"failureThreshold must be greater than 0 : {failureThreshold}")
+        self.__failureThreshold = failureThreshold
+        self.__resetTimeout = resetTimeout
+        self.__lock = threading.Lock()
+        self.__state = CircuitBreaker.CLOSED
+        self.__failures = 0
+        self.__openedAt = 0.0
+        self.__trial = False
+        self.__opens = 0
+        self.__rejected = 0
 
-    def getBusinessDatabaseNames(self) -> list[str]:
+    def allow(self):
         """
-        获取业务数据库名称
+        请求放行，熔断器打开（或半开且已有尝试进行中）时抛出CircuitOpenError
         :return:
         """
-        databaseNames = self.getDatabaseNames()
-        if databaseNames:
-            databaseNames.remove("information_schema")
-            databaseNames.remove("performance_schema")
-            databaseNames.remove("test")
-            databaseNames.remove("mysql")
-            databaseNames.remove("sys")
-        return databaseNames
+        with self.__lock:
+            if self.__state == CircuitBreaker.CLOSED:
+                return
+            if self.__state == CircuitBreaker.OPEN and time.time() - self.__openedAt >= self.__resetTimeout:
+                self.__state = CircuitBreaker.HALF_OPEN
+                self.__trial = False
+            if self.__state == CircuitBreaker.HALF_OPEN and not self.__trial:
+                self.__trial = True
+                return
+            self.__rejected += 1
+            remaining = max(self.__resetTimeout - (time.time() - self.__openedAt), 0)
+        raise CircuitOpenError(f"circuit breaker is {self.__state}, retry after {remaining:.1f}s")
 
-    def getDatabaseNames(self) -> list[str]:
+    def success(self):
         """
-        获取所有数据库名称
+        记录一次成功，关闭熔断器
         :return:
         """
-        rows = self.select("select distinct table_schema from information_schema.tables", hump=False)
-        databaseNames = []
-        if rows:
-            for row in rows:
-                databaseNames.append(row['table_schema'])
-        return databaseNames
+        with self.__lock:
+            self.__failures = 0
+            self.__trial = False
+            self.__state = CircuitBreaker.CLOSED
 
-    def getTables(self, database: str = None) -> list[dict]:
+    def failure(self):
         """
-        获取数据库下所有表信息
-        :param database: 数据库名，默认为连接的数据库
+        记录一次失败，连续失败达到阈值或半开尝试失败时打开熔断器
         :return:
         """
-        if not database:
-            database = self.__database
-        return self.select(
-            "select table_name,table_comment,create_time,update_time,table_rows,data_length,index_length,auto_increment "
-            "from information_schema.tables "
-            f"where table_schema = '{database}'")
+        with self.__lock:
+            self.__failures += 1
+            self.__trial = False
+            if self.__state == CircuitBreaker.HALF_OPEN or (self.__state == CircuitBreaker.CLOSED and
+                                                            self.__failures >= self.__failureThreshold):
+                self.__state = CircuitBreaker.OPEN
+                self.__openedAt = time.time()
+                self.__opens += 1
 
-    def getTableNames(self, database: str = None, lower=True) -> list[str]:
+    def getState(self) -> str:
         """
-        获取数据库下所有表名称
-        :param database: 数据库名，默认为连接的数据库
-        :param lower: 表明是否小写
+        熔断器状态：closed、open、half_open
+        :return:
+        """
+        with self.__lock:
+            if self.__state == CircuitBreaker.OPEN and time.time() - self.__openedAt >= self.__resetTimeout:
+                return CircuitBreaker.HALF_OPEN
+            return self.__state
+
+    def stats(self) -> dict:
+        """
+        统计信息：状态、连续失败次数、打开次数、快速失败次数
+        :return:
+        """
+        state = self.getState()
+        with self.__lock:
+            return {"state": state, "failures": self.__failures, "opens": self.__opens, "rejected": self.__rejected}
+
+
+class DB(object):
+    """
+    数据库基类
+    """
+    # 不缓存占位符转换结果的超长SQL（脚本、拼接的大SQL）
+    __maxCachedSqlLength = 8192
+    __scalarTypes = frozenset((str, int, float))
+    # Mysql是否支持行别名形式的upsert，第一次upsert时按服务端版本确定
+    __upsertRowAlias = None
+
+    def __init__(self, connection, dbType: str = None,
+                 debug: bool = False) -> None:
+        self.__closed = False
+        self.__debug = debug
+        self.__dbType = dbType
+        self.__connection = connection
+        self.__queryCache = None
+        self.__metrics = None
+        # 批量提交配置 (maxStatements, maxDelay)，以及线程内待提交的写操作状态
+        self.__writeBatch = None
+        self.__pending = threading.local()
+        self.select("select 1")
+
+    def select(self, sql, *parameters, limit: int = 0, hump: bool = True, humpOnly: bool = False,
+               cache: bool = True, **kwargs) -> list[dict]:
+        """
+        查询数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param limit: 结果限制
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param cache: 启用查询缓存时是否使用缓存
+        :param kwargs: 其他属性
+        :return: 字典列表
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        queryCache = cache and not kwargs and self.__queryCache or None
+        if queryCache is not None:
+            cacheKey = ("select", sql, tuple(parameters), limit, hump, humpOnly)
+            hit, dataRows = queryCache.get(cacheKey)
+            if hit:
+                return [dict(row) for row in dataRows]
+            generation = queryCache.generation()
+        dataRows = error = None
+        self.__flushOverdue()
+        cursor = self.getConnection().cursor()
+        try:
+            if limit < 1:
+                cursor.execute(sql, parameters, **kwargs)
+                dataRows = cursor.fetchall()
+            else:
+                if not sql.__contains__(" limit ") and not sql.__contains__(" LIMIT "):
+                    if sql.__contains__(";"):
+                        sql = sql.replace(";", f" limit {limit};")
+                    else:
+                        sql = f"{sql} limit {limit}"
+                cursor.execute(sql, parameters, **kwargs)
+                dataRows = cursor.fetchmany(limit)
+            dataRows = self.__dictRows(cursor, dataRows, hump, humpOnly)
+            if queryCache is not None:
+                queryCache.put(cacheKey, sql, [dict(row) for row in dataRows], generation)
+            return dataRows
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__printSql(sql, parameters, st, dataRows is not None and len(dataRows) or 0, error)
+            cursor.close()
+
+    def iterSelect(self, sql, *parameters, chunkSize: int = 0, fetchSize: int = 1000, hump: bool = True,
+                   humpOnly: bool = False, **kwargs):
+        """
+        流式查询数据，使用服务端游标（Mysql为SSDictCursor），内存占用与结果集大小无关
+        注意：Mysql迭代结束前不能在同一连接上执行其他SQL
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param chunkSize: 大于0时按块返回数据行列表，否则逐行返回
+        :param fetchSize: 逐行返回时每次从游标拉取的行数
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param kwargs: 其他属性
+        :return: 数据行字典（或数据行字典列表）生成器
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        rowCount = 0
+        error = None
+        self.__flushOverdue()
+        cursor = self.__cursor(stream=True)
+        try:
+            cursor.execute(sql, parameters, **kwargs)
+            size = chunkSize > 0 and chunkSize or max(fetchSize, 1)
+            while True:
+                dataRows = cursor.fetchmany(size)
+                if not dataRows:
+                    break
+                rowCount += len(dataRows)
+                dataRows = self.__dictRows(cursor, dataRows, hump, humpOnly)
+                if chunkSize > 0:
+                    yield dataRows
+                else:
+                    yield from dataRows
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__printSql(sql, parameters, st, rowCount, error)
+            cursor.close()
+
+    def selectColumns(self, sql, *parameters, mode: str = "list", hump: bool = False, **kwargs) -> dict:
+        """
+        列式查询：直接从游标元组构建每一列，不创建每行的字典
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param mode: 列数据类型：list、array（数值列为array.array）、numpy（numpy.ndarray）
+        :param hump: 字段名转驼峰
+        :param kwargs: 其他属性
+        :return: {字段名: 列数据}
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        dataRows = error = None
+        self.__flushOverdue()
+        cursor = self.__cursor(tuples=True)
+        try:
+            cursor.execute(sql, parameters, **kwargs)
+            dataRows = cursor.fetchall()
+            names = self.__columnNames(cursor, hump)
+            return self.__columnar(names, dataRows, mode)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__printSql(sql, parameters, st, dataRows is not None and len(dataRows) or 0, error)
+            cursor.close()
+
+    def iterSelectColumns(self, sql, *parameters, chunkSize: int = 100000, mode: str = "list", hump: bool = False,
+                          **kwargs):
+        """
+        分块列式流式查询：使用服务端游标，每块返回一份列式数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param chunkSize: 每块的行数
+        :param mode: 列数据类型：list、array（数值列为array.array）、numpy（numpy.ndarray）
+        :param hump: 字段名转驼峰
+        :param kwargs: 其他属性
+        :return: {字段名: 列数据} 生成器
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        rowCount = 0
+        error = None
+        self.__flushOverdue()
+        cursor = self.__cursor(stream=True, tuples=True)
+        try:
+            cursor.execute(sql, parameters, **kwargs)
+            names = self.__columnNames(cursor, hump)
+            while True:
+                dataRows = cursor.fetchmany(max(chunkSize, 1))
+                if not dataRows:
+                    break
+                rowCount += len(dataRows)
+                yield self.__columnar(names, dataRows, mode)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__printSql(sql, parameters, st, rowCount, error)
+            cursor.close()
+
+    @staticmethod
+    def __columnNames(cursor, hump: bool) -> tuple:
+        names = tuple(description[0] for description in cursor.description or ())
+        return hump and DB.__humpKeys(names) or names
+
+    def selectOne(self, sql, *parameters, hump: bool = True, humpOnly: bool = False, cache: bool = True) -> dict:
+        """
+        查询一行数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param cache: 启用查询缓存时是否使用缓存
+        :return: 数据行字典
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        queryCache = cache and self.__queryCache or None
+        if queryCache is not None:
+            cacheKey = ("selectOne", sql, tuple(parameters), hump, humpOnly)
+            hit, row = queryCache.get(cacheKey)
+            if hit:
+                return row and dict(row)
+            generation = queryCache.generation()
+        row = error = None
+        self.__flushOverdue()
+        cursor = self.getConnection().cursor()
+        try:
+            cursor.execute(sql, parameters)
+            result = cursor.fetchone()
+            if result:
+                row = self.__dictRows(cursor, [result], hump, humpOnly)[0]
+            if queryCache is not None:
+                queryCache.put(cacheKey, sql, row and dict(row), generation)
+            return row
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__printSql(sql, parameters, st, row and 1 or 0, error)
+            cursor.close()
+
+    def selectTable(self, table, columns: str = "*", where: str = "1 = 1", limit: int = 0, hump: bool = True,
+                    humpOnly: bool = False, **conditions):
+        """
+        查询数据
+        :param table: 表名
+        :param columns: 查询的字段，默认所有字段
+        :param where: where条件
+        :param limit: 返回数据行限制
+        :param hump: 是否转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param conditions: where条件
+        :return: 列表字典
+        """
+        if not (where.__contains__("where ") or where.__contains__("WHERE ")):
+            where = f"where {where}"
+        sql = ""
+        sql += f"select {columns} from {table} {where}"
+        for key in conditions.keys():
+            value = conditions[key]
+            if isinstance(value, (int, float)):
+                sql += f" and {key} = {conditions[key]}"
+            else:
+                sql += f" and {key} = '{conditions[key]}'"
+        return self.select(sql, (), limit=limit, hump=hump, humpOnly=humpOnly)
+
+    def selectIn(self, sql, values: Iterable, *parameters, chunkSize: int = 1024, tempTableThreshold: int = 0,
+                 limit: int = 0, hump: bool = True, humpOnly: bool = False, cache: bool = True) -> list[dict]:
+        """
+        IN列表查询：SQL中的{in}替换为参数化的 in (?,?,...)，占位符数量按2的幂分档（不足时重复最后一个值），
+        相同档位的SQL文本相同，可以复用预编译语句和查询缓存；值超过chunkSize时分块查询并合并结果，
+        超过tempTableThreshold时写入临时表，改为 in (select v from 临时表) 一次查询
+        如：db.selectIn("select * from t_user where id {in} and status = ?", ids, 1)
+        :param sql: 包含{in}标记的SQL语句
+        :param values: IN列表的值，会去重
+        :param parameters: SQL中其他占位符的参数，按出现顺序
+        :param chunkSize: 每次查询的最大IN值数量
+        :param tempTableThreshold: 值的数量超过该阈值时使用临时表，小于等于0不使用
+        :param limit: 合并后的结果限制
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param cache: 启用查询缓存时是否使用缓存
+        :return: 字典列表
+        """
+        values = DB.__inValues(values)
+        if not values:
+            return []
+        prefix, suffix, before, after = DB.__splitIn(sql, parameters)
+        if 0 < tempTableThreshold < len(values):
+            with self.__inTempTable(values) as table:
+                return self.select(f"{prefix}in (select v from {table}){suffix}", before, after, limit=limit,
+                                   hump=hump, humpOnly=humpOnly, cache=False)
+        rows = []
+        for chunk, inList in DB.__inChunks(values, chunkSize):
+            rows.extend(self.select(f"{prefix}{inList}{suffix}", before, chunk, after, limit=limit and limit - len(rows),
+                                    hump=hump, humpOnly=humpOnly, cache=cache))
+            if 0 < limit <= len(rows):
+                break
+        return rows
+
+    def executeIn(self, sql, values: Iterable, *parameters, chunkSize: int = 1024, commit=True, **kwargs) -> int:
+        """
+        IN列表写操作（delete/update），SQL中的{in}替换为参数化的 in (?,?,...)，值超过chunkSize时分块执行，
+        最后一块执行后按commit提交
+        :param sql: 包含{in}标记的SQL语句
+        :param values: IN列表的值，会去重
+        :param parameters: SQL中其他占位符的参数，按出现顺序
+        :param chunkSize: 每次执行的最大IN值数量
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return: 影响的行数
+        """
+        values = DB.__inValues(values)
+        if not values:
+            return 0
+        prefix, suffix, before, after = DB.__splitIn(sql, parameters)
+        chunks = list(DB.__inChunks(values, chunkSize))
+        rowCount = 0
+        for i, (chunk, inList) in enumerate(chunks):
+            result = self.execute(f"{prefix}{inList}{suffix}", before, chunk, after,
+                                  commit=i == len(chunks) - 1 and commit, **kwargs)
+            # pymysql返回影响的行数，sqlite3返回游标
+            rowCount += isinstance(result, int) and result or max(getattr(result, "rowcount", 0) or 0, 0)
+        return rowCount
+
+    @staticmethod
+    def __inValues(values) -> list:
+        """
+        去重并保持顺序
+        """
+        if isinstance(values, (str, bytes)):
+            values = [values]
+        values = list(dict.fromkeys(values))
+        for value in values:
+            if isinstance(value, bool) or not isinstance(value, (str, int, float, bytes)):
+                raise ValueError(f"in item value type is not support : {type(value)}")
+        return values
+
+    @staticmethod
+    def __splitIn(sql: str, parameters: list):
+        """
+        按{in}标记拆分SQL和参数
+        :return: (标记前的SQL, 标记后的SQL, 标记前的参数, 标记后的参数)
+        """
+        index = sql.find("{in}")
+        if index < 0:
+            raise ValueError(f"in marker {{in}} not found in sql : {sql}")
+        # 以列表传递，保留0、空字符串等参数
+        params = []
+        for param in parameters:
+            if isinstance(param, (list, tuple)):
+                params.extend(param)
+            else:
+                params.append(param)
+        prefix = sql[:index]
+        count = prefix.count("?") + prefix.count("%s") + prefix.count("%d")
+        return prefix, sql[index + 4:], params[:count], params[count:]
+
+    @staticmethod
+    def __inChunks(values: list, chunkSize: int):
+        """
+        分块并按2的幂补齐：(补齐后的值, in占位符SQL)
+        """
+        if chunkSize < 1:
+            raise ValueError(f"chunkSize must be greater than 0 : {chunkSize}")
+        for i in range(0, len(values), chunkSize):
+            chunk = values[i:i + chunkSize]
+            size = min(1 << (len(chunk) - 1).bit_length(), chunkSize)
+            if size > len(chunk):
+                chunk = chunk + [chunk[-1]] * (size - len(chunk))
+            yield chunk, DB.__inList(size)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def __inList(size: int) -> str:
+        return f"in ({','.join('?' * size)})"
+
+    @contextmanager
+    def __inTempTable(self, values: list):
+        """
+        IN值写入当前连接的临时表，结束后删除
+        :return: 临时表名
+        """
+        table = f"dber_in_{threading.get_ident()}_{id(values)}"
+        if all(isinstance(value, int) for value in values):
+            columnType = "bigint"
+        elif all(isinstance(value, (int, float)) for value in values):
+            columnType = "double"
+        else:
+            columnType = "varchar(768)"
+        temporary = self.__dbType == 'mysql' and "TEMPORARY" or "TEMP"
+        placeholder = self.__dbType == 'mysql' and "%s" or "?"
+        cursor = self.getConnection().cursor()
+        try:
+            cursor.execute(f"CREATE {temporary} TABLE {table} (v {columnType} PRIMARY KEY)")
+            cursor.executemany(f"INSERT INTO {table} (v) VALUES ({placeholder})", [(value,) for value in values])
+            yield table
+        finally:
+            try:
+                cursor.execute(f"DROP {self.__dbType == 'mysql' and 'TEMPORARY ' or ''}TABLE IF EXISTS {table}")
+            finally:
+                cursor.close()
+
+    def scanTable(self, table, key: str = "id", columns: str = "*", where: str = None, pageSize: int = 1000,
+                  start=None, prefetch: bool = False, hump: bool = True, humpOnly: bool = False, **conditions):
+        """
+        按主键（或有索引的字段）分页扫描表：where key > ? order by key limit pageSize，
+        每页的代价与页码无关
+        :param table: 表名
+        :param key: 分页字段，需要唯一且有索引
+        :param columns: 查询的字段，默认所有字段
+        :param where: 额外where条件
+        :param pageSize: 每页行数
+        :param start: 起始位置（不包含），默认从头开始
+        :param prefetch: 后台线程预取下一页（需要线程安全的DB，如PooledDB）
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param conditions: 等值条件
+        :return: 数据行字典列表（每页）生成器
+        """
+        if pageSize < 1:
+            raise ValueError(f"pageSize must be greater than 0 : {pageSize}")
+        if columns.strip() != "*" and key not in [column.strip() for column in columns.split(",")]:
+            columns = f"{key},{columns}"
+        filters = []
+        filterParameters = []
+        if where:
+            if where.strip().lower().startswith("where "):
+                where = where.strip()[6:]
+            filters.append(f"({where})")
+        for column, value in conditions.items():
+            filters.append(f"{column} = ?")
+            filterParameters.append(value)
+        rowKey = hump and humpOnly and DB.__humpKeys((key,))[0] or key
+
+        def fetch(lastKey):
+            pageFilters = list(filters)
+            pageParameters = list(filterParameters)
+            if lastKey is not None:
+                pageFilters.append(f"{key} > ?")
+                pageParameters.append(lastKey)
+            sql = f"select {columns} from {table}"
+            if pageFilters:
+                sql = f"{sql} where {' and '.join(pageFilters)}"
+            sql = f"{sql} order by {key} limit {int(pageSize)}"
+            return self.select(sql, pageParameters, hump=hump, humpOnly=humpOnly, cache=False)
+
+        executor = None
+        if prefetch:
+            if self.isThreadSafe():
+                from concurrent.futures import ThreadPoolExecutor
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dber-scan")
+            elif self.__debug:
+                print(f"prefetch is not supported by {self}, scan table {table} without prefetch")
+        try:
+            page = fetch(start)
+            while page:
+                nextPage = None
+                if len(page) >= pageSize and executor:
+                    nextPage = executor.submit(fetch, page[-1][rowKey])
+                yield page
+                if len(page) < pageSize:
+                    break
+                page = nextPage and nextPage.result() or fetch(page[-1][rowKey])
+        finally:
+            if executor:
+                executor.submit(self.release)
+                executor.shutdown(wait=True)
+
+    def callbackResultSet(self, sql, *parameters, callback=None, humpOnly: bool = False, **kwargs):
+        """
+        回调处理查询结果集
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param callback: 回调函数 fun(row)
+        :param humpOnly: 只保留驼峰字段
+        :param kwargs: 其他配置
+        :return:
+        """
+        if not callback:
+            raise RuntimeError("callback fun not found")
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        rowCount = 0
+        error = None
+        self.__flushOverdue()
+        cursor = self.getConnection().cursor()
+        try:
+            cursor.execute(sql, parameters, **kwargs)
+            humpKeys = names = None
+            while True:
+                try:
+                    row = cursor.__next__()
+                    if humpKeys is None:
+                        names = not isinstance(row, dict) and self.__columnNames(cursor, False) or None
+                        humpKeys = DB.__humpKeys(names or tuple(row.keys()))
+                    if names:
+                        row = dict(zip(names, row))
+                    rowCount += 1
+                    callback(self._humpRow(row, humpKeys, humpOnly))
+                except StopIteration:
+                    break
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__printSql(sql, parameters, st, rowCount, error)
+            cursor.close()
+
+    def parallelCallbackResultSet(self, sql, *parameters, callback=None, batch: bool = False, workers: int = 4,
+                                  executor="thread", fetchSize: int = 1000, maxInFlight: int = 0,
+                                  ordered: bool = False, onResult=None, stopOnError: bool = False,
+                                  humpOnly: bool = False, **kwargs) -> dict:
+        """
+        并行回调处理查询结果集：按fetchSize分批从服务端游标读取，交给线程池或进程池处理，
+        处理中的批次数量有上限，回调较慢时游标读取不会被阻塞，也不会无限占用内存
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param callback: 回调函数，逐行 fun(row)，batch=True时按批 fun(rows)；进程池时需要可序列化（模块级函数）
+        :param batch: 是否按批回调
+        :param workers: 线程（进程）数
+        :param executor: thread（线程池）、process（进程池）或 concurrent.futures.Executor 实例
+        :param fetchSize: 每批的行数
+        :param maxInFlight: 最多同时处理的批次数量，默认为workers的2倍
+        :param ordered: onResult是否按结果集顺序接收结果，否则按完成顺序
+        :param onResult: 在调用线程中接收每批结果 fun(result)，逐行回调时为该批每行返回值的列表
+        :param stopOnError: 出现回调异常后停止读取后续数据
+        :param humpOnly: 只保留驼峰字段
+        :param kwargs: 其他配置
+        :return: 统计信息 {"rows", "batches", "errors", "seconds", "rowsPerSec"}，有回调异常时抛出CallbackError
+        """
+        import collections
+        from concurrent import futures
+        if not callback:
+            raise RuntimeError("callback fun not found")
+        if fetchSize < 1:
+            raise ValueError(f"fetchSize must be greater than 0 : {fetchSize}")
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        maxInFlight = maxInFlight > 0 and maxInFlight or max(workers, 1) * 2
+        pool, shutdown = DB.__executor(executor, workers)
+        stats = {"rows": 0, "batches": 0, "errors": 0, "seconds": 0.0, "rowsPerSec": 0.0}
+        errors = []
+        # 处理中的批次：future -> 批次第一行的序号，按提交顺序
+        inFlight = collections.OrderedDict()
+
+        def complete(future):
+            offset = inFlight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append((offset, e))
+                return
+            if not batch:
+                result, rowErrors = result
+                errors.extend((offset + i, e) for i, e in rowErrors)
+            if onResult:
+                onResult(result)
+
+        def drain(limit: int):
+            while len(inFlight) > limit:
+                if ordered:
+                    future = next(iter(inFlight))
+                    futures.wait([future])
+                    complete(future)
+                else:
+                    done = futures.wait(inFlight, return_when=futures.FIRST_COMPLETED)[0]
+                    for future in [future for future in inFlight if future in done]:
+                        complete(future)
+
+        error = None
+        self.__flushOverdue()
+        cursor = self.__cursor(stream=True)
+        try:
+            cursor.execute(sql, parameters, **kwargs)
+            while not (stopOnError and errors):
+                dataRows = cursor.fetchmany(fetchSize)
+                if not dataRows:
+                    break
+                dataRows = self.__dictRows(cursor, dataRows, True, humpOnly)
+                if batch:
+                    future = pool.submit(callback, dataRows)
+                else:
+                    future = pool.submit(_callbackRows, callback, dataRows)
+                inFlight[future] = stats["rows"]
+                stats["rows"] += len(dataRows)
+                stats["batches"] += 1
+                drain(maxInFlight - 1)
+            drain(0)
+        except BaseException as e:
+            error = e
+            for future in inFlight:
+                future.cancel()
+            raise
+        finally:
+            if shutdown:
+                pool.shutdown(wait=True)
+            self.__printSql(sql, parameters, st, stats["rows"], error)
+            cursor.close()
+        stats["errors"] = len(errors)
+        stats["seconds"] = time.time() - st
+        stats["rowsPerSec"] = stats["seconds"] > 0 and stats["rows"] / stats["seconds"] or 0.0
+        if errors:
+            errors.sort(key=lambda item: item[0])
+            raise CallbackError(f"{len(errors)} callback errors, first at row {errors[0][0]} : {errors[0][1]!r}",
+                                errors, stats)
+        return stats
+
+    @staticmethod
+    def __executor(executor, workers: int):
+        """
+        :return: (执行器, 是否需要关闭)
+        """
+        from concurrent import futures
+        if executor == "thread":
+            return futures.ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="dber-callback"), True
+        if executor == "process":
+            return futures.ProcessPoolExecutor(max_workers=max(workers, 1)), True
+        if isinstance(executor, futures.Executor):
+            return executor, False
+        raise ValueError(f"callback executor is not support : {executor}")
+
+    def executeScript(self, sqlScript: str, *params, commit=True, **variables):
+        """
+        执行SQL脚本，SQLite的executescript会先隐式提交未提交的写操作，因此不能在transaction()内使用
+        :param sqlScript: sql脚本
+        :param commit: 自动提交
+        :return:
+        """
+        if self.__dbType == 'sqlite' and getattr(self.__pending, "depth", 0) > 0:
+            raise RuntimeError("executeScript() commits implicitly in SQLite and cannot be used inside transaction()")
+        try:
+            sqlScript = sqlScript.format_map(variables)
+        except:
+            pass
+
+        st = time.time()
+        error = None
+        committed = False
+        cursor = self.getConnection().cursor()
+        try:
+            res = cursor.executescript(sqlScript, *params)
+            committed = self.__commitWrite(commit)
+            return res
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.__queryCache is not None:
+                self.__queryCache.invalidateSql(sqlScript, pending=not committed)
+            self.__printSql(sqlScript, None, st, -1, error)
+            cursor.close()
+
+    def executeScriptFile(self, sqlScriptFilePath: str, *params, commit=True, **variables):
+        """
+        执行SQL脚本文件
+        :param sqlScriptFilePath: sql脚本文件路径
+        :param commit: 自动提交
+        :return:
+        """
+        import os
+        if os.path.exists(sqlScriptFilePath) and os.path.isfile(sqlScriptFilePath):
+            with open(sqlScriptFilePath, 'r') as f:
+                sqlScript = f.read()
+            if sqlScript and len(sqlScript) > 0:
+                return self.executeScript(sqlScript, *params, commit, **variables)
+
+    def runScript(self, source, delimiter: str = ";", commitEvery: int = 1000, batchSize: int = 500,
+                  maxBatchBytes: int = 1 << 20, stopOnError: bool = True, progress=None, onStatement=None,
+                  encoding: str = "utf-8") -> dict:
+        """
+        流式执行SQL脚本文件：分块读取并逐条执行（处理引号、注释和DELIMITER命令），连续的同一表
+        INSERT ... VALUES 合并为多行INSERT执行，每commitEvery条语句提交一次，适合导入大的转储文件；
+        与executeScript不同，不做变量替换，也不参与transaction()
+        :param source: 文件路径或文件对象（SQL文本可以用io.StringIO包装）
+        :param delimiter: 初始语句分隔符
+        :param commitEvery: 每执行多少条语句提交一次
+        :param batchSize: 合并为一条多行INSERT的最大语句数，小于等于1不合并
+        :param maxBatchBytes: 合并后INSERT语句的最大长度（字符）
+        :param stopOnError: 语句执行失败时是否停止，停止时回滚未提交的语句
+        :param progress: 进度回调 fun(stats)，每次提交后调用
+        :param onStatement: 每次执行后回调 fun(event)，event: {"index", "sql", "statements", "seconds", "rows", "error"}
+        :param encoding: 文件编码
+        :return: 统计信息 {"statements", "executes", "errors", "commits", "seconds", "statementsPerSec", "slowest"}
+        """
+        script = SqlScript(source, delimiter=delimiter, dialect=self.__dbType, encoding=encoding)
+        try:
+            return script.run(self.getConnection(), commitEvery=commitEvery, batchSize=batchSize,
+                              maxBatchBytes=maxBatchBytes, stopOnError=stopOnError, progress=progress,
+                              onStatement=onStatement, commit=self.commit,
+                              record=lambda sql, st, rows, error: self.__printSql(sql, None, st, rows, error))
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            if self.__queryCache is not None:
+                self.__queryCache.invalidate()
+
+    def execute(self, sql, *parameters, commit=True, **kwargs):
+        """
+        执行SQL
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        parameters = self._parameters(*parameters)
+        error = None
+        committed = False
+        cursor = self.getConnection().cursor()
+        try:
+            res = cursor.execute(sql, parameters, **kwargs)
+            committed = self.__commitWrite(commit)
+            return res
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.__queryCache is not None:
+                self.__queryCache.invalidateSql(sql, pending=not committed)
+            self.__printSql(sql, parameters, st, cursor.rowcount, error)
+            cursor.close()
+
+    def update(self, sql, *parameters, commit=True, **kwargs):
+        """
+        更新数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        return self.execute(sql, *parameters, commit=commit, **kwargs)
+
+    def insert(self, sql, *parameters, commit=True, **kwargs):
+        """
+        插入数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        return self.execute(sql, *parameters, commit=commit, **kwargs)
+
+    def insertBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+        """
+        批量插入
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        st = time.time()
+        sql = self.__sql(sql)
+        error = None
+        committed = False
+        cursor = self.getConnection().cursor()
+        try:
+            cursor.executemany(sql, rows, **kwargs)
+            committed = self.__commitWrite(commit)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.__queryCache is not None:
+                self.__queryCache.invalidateSql(sql, pending=not committed)
+            self.__printSql(sql, rows, st, cursor.rowcount, error)
+            cursor.close()
+
+    def replace(self, sql, *parameters, commit=True, **kwargs):
+        """
+        替换数据（插入或按唯一键更新）
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        return self.execute(sql, *parameters, commit=commit, **kwargs)
+
+    def replaceBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+        """
+        批量插入
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        return self.insertBatch(sql, rows, commit, **kwargs)
+
+    def upsert(self, table: str, rows: Iterable, keys, updateColumns: Iterable[str] = None,
+               columns: Iterable[str] = None, chunkSize: int = 1000, commit=True, **kwargs) -> int:
+        """
+        插入或按唯一键更新：Mysql使用 INSERT ... ON DUPLICATE KEY UPDATE（8.0.19+使用行别名 AS new，
+        VALUES()自8.0.20起弃用），SQLite使用 INSERT ... ON CONFLICT(keys) DO UPDATE（需要SQLite 3.24+），
+        与REPLACE INTO不同，冲突时原地更新指定字段，不会删除旧行、重建索引或消耗自增id
+        :param table: 表名
+        :param rows: 数据行，字典或与columns顺序一致的元组
+        :param keys: 唯一键字段（SQLite的冲突字段），字符串或列表
+        :param updateColumns: 冲突时更新的字段，默认为除唯一键外的全部字段，为空列表时冲突的行保持不变
+        :param columns: 字段名，元组行时必须指定，字典行默认为第一行的键
+        :param chunkSize: 每批executemany的行数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return: 处理的行数
+        """
+        if chunkSize < 1:
+            raise ValueError(f"chunkSize must be greater than 0 : {chunkSize}")
+        keys = isinstance(keys, str) and (keys,) or tuple(keys)
+        rowCount = 0
+        sql = None
+        chunk = []
+        for row in rows:
+            if sql is None:
+                if columns is None:
+                    if not isinstance(row, dict):
+                        raise ValueError("columns must be specified when rows are not dict")
+                    columns = row.keys()
+                columns = tuple(columns)
+                update = tuple(column for column in columns if column not in keys) \
+                    if updateColumns is None else tuple(updateColumns)
+                sql = DB.__upsertSql(self.__dbType, table, columns, keys, update,
+                                     self.__dbType == 'mysql' and self.__isRowAliasSupported())
+            chunk.append(isinstance(row, dict) and tuple(row[column] for column in columns) or row)
+            if len(chunk) >= chunkSize:
+                self.insertBatch(sql, chunk, commit=commit, **kwargs)
+                rowCount += len(chunk)
+                chunk = []
+        if chunk:
+            self.insertBatch(sql, chunk, commit=commit, **kwargs)
+            rowCount += len(chunk)
+        return rowCount
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def __upsertSql(dbType: str, table: str, columns: tuple, keys: tuple, updateColumns: tuple,
+                    rowAlias: bool = False) -> str:
+        """
+        按数据库类型生成upsert语句
+        """
+        sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join('?' * len(columns))})"
+        if dbType == 'mysql':
+            # 没有需要更新的字段时用 key = key 忽略冲突，不同于INSERT IGNORE，不会吞掉其他错误
+            if not updateColumns:
+                return f"{sql} ON DUPLICATE KEY UPDATE {keys[0]} = {keys[0]}"
+            if rowAlias:
+                assignments = [f"{column} = new.{column}" for column in updateColumns]
+                return f"{sql} AS new ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+            assignments = [f"{column} = VALUES({column})" for column in updateColumns]
+            return f"{sql} ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+        if dbType == 'sqlite':
+            if not updateColumns:
+                return f"{sql} ON CONFLICT({','.join(keys)}) DO NOTHING"
+            assignments = [f"{column} = excluded.{column}" for column in updateColumns]
+            return f"{sql} ON CONFLICT({','.join(keys)}) DO UPDATE SET {', '.join(assignments)}"
+        raise ValueError(f"upsert is not support database type : {dbType}")
+
+    def __isRowAliasSupported(self) -> bool:
+        """
+        Mysql 8.0.19+ 支持 INSERT ... AS new ON DUPLICATE KEY UPDATE col = new.col，MariaDB不支持
+        """
+        if self.__upsertRowAlias is None:
+            import re
+            version = self.getConnection().get_server_info()
+            match = re.match(r"(\d+)\.(\d+)\.(\d+)", version)
+            self.__upsertRowAlias = "mariadb" not in version.lower() and match is not None \
+                and tuple(map(int, match.groups())) >= (8, 0, 19)
+        return self.__upsertRowAlias
+
+    def bulkInsert(self, sql, rows: Iterable[Iterable], chunkSize: int = 1000, chunkBytes: int = 0,
+                   synchronous: str = None, progress=None, **kwargs) -> dict:
+        """
+        分块批量插入：每块一次executemany并提交，某一块失败时回滚该块，rows支持生成器且不会整体加载到内存
+        Mysql的INSERT/REPLACE ... VALUES语句由pymysql改写为多行VALUES (...),(...)发送
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :param chunkSize: 每块的行数
+        :param chunkBytes: 每块的估算字节数上限，大于0时生效
+        :param synchronous: SQLite导入期间使用的PRAGMA synchronous（如OFF、NORMAL），结束后恢复
+        :param progress: 进度回调 fun(stats)，每块提交后调用
+        :param kwargs: 其他配置
+        :return: 统计信息 {"rows", "chunks", "seconds", "rowsPerSec"}
+        """
+        sql = self.__sql(sql)
+
+        def load(chunk):
+            st = time.time()
+            error = None
+            committed = False
+            cursor = self.getConnection().cursor()
+            try:
+                cursor.executemany(sql, chunk, **kwargs)
+                # 每块直接提交（不经过批量提交），之后某一块失败时回滚不影响已提交的块；transaction()内延迟提交
+                if getattr(self.__pending, "depth", 0):
+                    self.__commitWrite(True)
+                else:
+                    self.commit()
+                    committed = True
+            except BaseException as e:
+                error = e
+                # 失败的块回滚；transaction()内由事务回滚
+                if not getattr(self.__pending, "depth", 0):
+                    self.rollback()
+                raise
+            finally:
+                if self.__queryCache is not None:
+                    self.__queryCache.invalidateSql(sql, pending=not committed)
+                self.__printSql(sql, f"{len(chunk)} rows", st, len(chunk), error)
+                cursor.close()
+
+        if not (synchronous and self.__dbType == 'sqlite'):
+            return self.__bulkLoad(rows, load, chunkSize, chunkBytes, progress)
+        oldSynchronous = self.__pragma("PRAGMA synchronous")
+        self.__pragma(f"PRAGMA synchronous = {synchronous}")
+        try:
+            return self.__bulkLoad(rows, load, chunkSize, chunkBytes, progress)
+        finally:
+            self.__pragma(f"PRAGMA synchronous = {oldSynchronous}")
+
+    def delete(self, sql, *parameters, commit=True, **kwargs):
+        """
+        删除数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        return self.execute(sql, *parameters, commit=commit, **kwargs)
+
+    def clear(self, table, commit=True, **kwargs):
+        """
+        清空表数据
+        :param table: 表名
+        :param commit: 自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        if self.__dbType == 'mysql':
+            self.execute(f"TRUNCATE TABLE {table}", commit=commit, **kwargs)
+        else:
+            self.execute(f"DELETE FROM {table}", commit=commit, **kwargs)
+
+    def drop(self, table, commit=True, **kwargs):
+        """
+        删除表
+        :param table: 表名
+        :param commit: 自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        self.execute(f"DROP TABLE IF EXISTS {table}", commit=commit, **kwargs)
+
+    def count(self, table, where: str = None):
+        """
+        统计表的行数
+        :param table: 表名
+        :param where: 额外条件
+        :return: 其他配置
+        """
+        sql = f"SELECT COUNT(1) AS cnt FROM {table}"
+        if where and len(where) > 0:
+            if not (where.__contains__("where ") or where.__contains__("WHERE ")):
+                sql = f"{sql} WHERE {where}"
+            else:
+                sql = f"{sql} {where}"
+        return self.getColumnIntValue(sql, defValue=0)
+
+    def getColumnValue(self, sql, *parameters, column: str = None, defValue=None):
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        if column and len(column) > 0:
+            row = self.selectOne(sql, *parameters)
+            if row and row.__contains__(column):
+                return row[column]
+        else:
+            row = self.selectOne(sql, *parameters, hump=False)
+            if row and len(row) == 1:
+                for cn in row:
+                    return row[cn]
+            else:
+                raise RuntimeError(f"There are multiple columns, but did not specify the only one : {set(row.keys())}")
+        return defValue
+
+    def getColumnFloatValue(self, sql, *parameters, column: str = None, defValue: float = None) -> float:
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        value = self.getColumnValue(sql, *parameters, column=column, defValue=defValue)
+        if value:
+            return float(value)
+
+    def getColumnBoolValue(self, sql, *parameters, column: str = None, defValue: bool = None) -> bool:
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        value = self.getColumnValue(sql, *parameters, column=column, defValue=defValue)
+        if value:
+            if isinstance(value, str):
+                if value in ('False', 'false', '0'):
+                    return False
+                if value in ('True', 'true', '1'):
+                    return True
+                raise ValueError("转换bool类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
+            if isinstance(value, (int, bool, float)):
+                return bool(value)
+            raise ValueError("转换bool类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
+
+    def getColumnIntValue(self, sql, *parameters, column: str = None, defValue: int = None) -> int:
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        value = self.getColumnFloatValue(sql, *parameters, column=column, defValue=defValue)
+        if value:
+            return int(value)
+
+    def callProc(self, procName: str, args):
+        """
+        调用存储过程
+        :param procName: 存储过程名称
+        :param args: 存储过程参数
+        :return:
+        """
+        st = time.time()
+        error = None
+        cursor = self.getConnection().cursor()
+        try:
+            cursor.callproc(procName, args)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.__queryCache is not None:
+                self.__queryCache.invalidate()
+            self.__printSql(f"call proc : {procName}", args, st, -1, error)
+            cursor.close()
+
+    def getConnection(self):
+        """
+        连接是否关闭
+        :return:
+        """
+        if self.isClosed():
+            raise RuntimeError("Database connection is closed")
+        return self.__connection
+
+    def commit(self):
+        """
+        提交事务
+        :return:
+        """
+        if not self.isClosed():
+            self.__connection.commit()
+            self.__clearPending()
+            if self.__queryCache is not None:
+                self.__queryCache.flushPending()
+
+    def rollback(self):
+        """
+        回滚事务
+        :return:
+        """
+        if not self.isClosed():
+            self.__connection.rollback()
+            self.__clearPending()
+            if self.__queryCache is not None:
+                self.__queryCache.flushPending()
+
+    def enableWriteBatching(self, maxStatements: int = 100, maxDelay: float = 0.05):
+        """
+        启用批量提交：commit=True的写操作不再逐条提交，当前线程累计maxStatements条写操作
+        或距第一条未提交的写操作超过maxDelay秒时一次提交；maxDelay在当前线程的下一次读写操作时检查，
+        没有后台定时提交（连接属于当前线程），线程空闲前需要调用flush()，
+        剩余的写操作在flush()、commit()、release()或close()时提交
+        :param maxStatements: 每次提交的最大写操作数量
+        :param maxDelay: 未提交写操作的最长延迟（秒）
+        :return:
+        """
+        if maxStatements < 1:
+            raise ValueError(f"maxStatements must be greater than 0 : {maxStatements}")
+        self.__writeBatch = (maxStatements, maxDelay)
+
+    def disableWriteBatching(self):
+        """
+        禁用批量提交，并提交当前线程未提交的写操作
+        :return:
+        """
+        self.__writeBatch = None
+        self.flush()
+
+    def flush(self):
+        """
+        提交当前线程批量提交中未提交的写操作，transaction()内调用时无效
+        :return:
+        """
+        if getattr(self.__pending, "depth", 0) == 0 and self.getPendingWrites() > 0:
+            self.commit()
+
+    def getPendingWrites(self) -> int:
+        """
+        当前线程未提交的写操作数量
+        :return:
+        """
+        return getattr(self.__pending, "count", 0)
+
+    @contextmanager
+    def transaction(self):
+        """
+        事务：with db.transaction()，代码块内的写操作延迟提交，正常退出时一次提交，异常时回滚；
+        嵌套使用时加入外层事务
+        :return: 数据库
+        """
+        pending = self.__pending
+        pending.depth = getattr(pending, "depth", 0) + 1
+        try:
+            yield self
+        except BaseException:
+            pending.depth -= 1
+            if pending.depth == 0:
+                self.rollback()
+            raise
+        pending.depth -= 1
+        if pending.depth == 0:
+            self.commit()
+
+    def isClosed(self) -> bool:
+        """
+        连接是否关闭
+        :return:
+        """
+        return self.__closed
+
+    def isThreadSafe(self) -> bool:
+        """
+        是否可以在多个线程中同时使用
+        :return:
+        """
+        return False
+
+    def isUpsertSupported(self) -> bool:
+        """
+        是否支持upsert：Mysql，或SQLite 3.24+
+        :return:
+        """
+        if self.__dbType == 'mysql':
+            return True
+        if self.__dbType == 'sqlite':
+            import sqlite3
+            return sqlite3.sqlite_version_info >= (3, 24, 0)
+        return False
+
+    def release(self):
+        """
+        释放当前线程占用的连接，连接池模式下归还连接
+        :return:
+        """
+        pass
+
+    def close(self):
+        """
+        关闭连接
+        :return:
+        """
+        if not self.isClosed():
+            self.commit()
+            self.__connection.close()
+            self.__closed = True
+            if self.__debug:
+                print(f"成功关闭DB：{self}, close conn: {self.__connection}")
+
+    def enableQueryCache(self, maxSize: int = 1024, ttl: float = 60, cache: QueryCache = None) -> QueryCache:
+        """
+        启用查询结果缓存：select/selectOne（包括count、getColumnValue、元数据查询）按SQL和参数缓存，
+        execute/insert/update/delete/clear/drop等写操作按表名失效
+        :param maxSize: 最大缓存条数
+        :param ttl: 缓存有效期（秒）
+        :param cache: 使用已有的查询缓存（多个库共享），此时忽略maxSize和ttl
+        :return: 查询缓存
+        """
+        self.__queryCache = cache if cache is not None else QueryCache(maxSize=maxSize, ttl=ttl)
+        return self.__queryCache
+
+    def disableQueryCache(self):
+        """
+        禁用查询结果缓存
+        :return:
+        """
+        self.__queryCache = None
+
+    def getQueryCache(self) -> QueryCache:
+        """
+        获取查询结果缓存，未启用时为None
+        :return:
+        """
+        return self.__queryCache
+
+    def getQueryCacheStats(self) -> dict:
+        """
+        查询缓存统计：命中、未命中等
+        :return:
+        """
+        if self.__queryCache is not None:
+            return self.__queryCache.stats()
+
+    def enableMetrics(self, slowThreshold: float = 1.0, sink=None, metrics: "SqlMetrics" = None,
+                      **config) -> "SqlMetrics":
+        """
+        启用SQL执行指标统计：按SQL指纹统计耗时直方图、行数、错误数，记录慢SQL
+        :param slowThreshold: 慢SQL阈值（秒）
+        :param sink: 事件回调 fun(event)，可使用 SqlMetrics.loggingSink()
+        :param metrics: 使用已有的指标统计（多个库共享），此时忽略其他参数
+        :param config: 其他配置，见 SqlMetrics
+        :return: 指标统计
+        """
+        self.__metrics = metrics if metrics is not None else SqlMetrics(slowThreshold=slowThreshold, sink=sink,
+                                                                        **config)
+        return self.__metrics
+
+    def disableMetrics(self):
+        """
+        禁用SQL执行指标统计
+        :return:
+        """
+        self.__metrics = None
+
+    def getMetrics(self) -> "SqlMetrics":
+        """
+        获取SQL执行指标统计，未启用时为None
+        :return:
+        """
+        return self.__metrics
+
+    def enableDebug(self):
+        """
+        启用debug能力
+        :return:
+        """
+        self.__debug = True
+
+    def disableDebug(self):
+        """
+         禁止debug能力
+         :return:
+         """
+        self.__debug = False
+
+    def getDatabaseType(self):
+        """
+        获取数据库类型
+        :return:
+        """
+        return self.__dbType
+
+    def __printSql(self, sql, params, st, rows: int = -1, error: BaseException = None):
+        """
+        打印执行的SQL语句，启用指标统计时记录耗时
+        :param sql: 执行SQL
+        :param st: 开始处理的时间
+        :param rows: 返回或影响的行数
+        :param error: 执行异常
+        :return:
+        """
+        if self.__metrics is not None:
+            self.__metrics.record(sql, params, time.time() - st, rows, error)
+        if sql and self.__debug:
+            ct = (time.time() - st)
+            if ct > 1:
+                ct = f"{round(ct, 3)}s"
+            else:
+                ct = f"{round(ct * 1000, 3)}ms"
+            if params:
+                print(f"===> ExecuteSQL[{ct}]: {sql} ， params : {params}")
+            else:
+                print(f"===> ExecuteSQL[{ct}]: {sql}")
+
+    def __commitWrite(self, commit) -> bool:
+        """
+        写操作后提交，批量提交或transaction()内延迟提交
+        :param commit: 写操作的commit参数
+        :return: 是否已提交
+        """
+        pending = self.__pending
+        if not (commit or commit > 0):
+            pending.dirty = True
+            return False
+        if getattr(pending, "depth", 0) > 0:
+            pending.count = getattr(pending, "count", 0) + 1
+            return False
+        writeBatch = self.__writeBatch
+        if writeBatch is None:
+            self.commit()
+            return True
+        count = pending.count = getattr(pending, "count", 0) + 1
+        if count == 1:
+            pending.since = time.time()
+        if count >= writeBatch[0] or time.time() - pending.since >= writeBatch[1]:
+            self.commit()
+            return True
+        return False
+
+    def __pragma(self, sql: str):
+        """
+        在原始游标上执行PRAGMA，不经过查询缓存、指标统计和写操作计数
+        :return: 第一行第一列的值
+        """
+        cursor = self.getConnection().cursor()
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        if row is None:
+            return None
+        return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+    def __flushOverdue(self):
+        """
+        读操作前提交当前线程超过maxDelay的批量写操作
+        """
+        pending = self.__pending
+        writeBatch = self.__writeBatch
+        if writeBatch is not None and getattr(pending, "count", 0) and not getattr(pending, "depth", 0) \
+                and time.time() - pending.since >= writeBatch[1]:
+            self.commit()
+
+    def __clearPending(self):
+        self.__pending.count = 0
+        self.__pending.dirty = False
+
+    @staticmethod
+    def _parameters(*parameters):
+        """
+        展开SQL占位符参数，AsyncMySQL共用
+        """
+        # 热点路径：参数全部是非空的str/int/float时直接返回
+        for param in parameters:
+            if param.__class__ not in DB.__scalarTypes or not param:
+                break
+        else:
+            return list(parameters)
+        params = []
+        if parameters:
+            for param in parameters:
+                if not param:
+                    continue
+                if isinstance(param, bool):
+                    raise ValueError(f"sql parameters value type is not support : {type(param)}")
+                elif isinstance(param, (str, int, float)):
+                    params.append(param)
+                elif isinstance(param, (list, tuple, set)):
+                    params.extend(param)
+                else:
+                    raise ValueError(f"sql parameters value type is not support : {type(param)}")
+        return params
+
+    def __bulkLoad(self, rows, load, chunkSize: int, chunkBytes: int, progress) -> dict:
+        """
+        分块导入
+        :param rows: 数据行（支持生成器）
+        :param load: 导入一块数据的函数 fun(chunk)
+        :return: 统计信息
+        """
+        if chunkSize < 1:
+            raise ValueError(f"chunkSize must be greater than 0 : {chunkSize}")
+        st = time.time()
+        stats = {"rows": 0, "chunks": 0, "seconds": 0.0, "rowsPerSec": 0.0}
+        chunk = []
+        size = 0
+        for row in rows:
+            chunk.append(row)
+            if chunkBytes > 0:
+                size += DB.__estimateSize(row)
+            if len(chunk) >= chunkSize or (chunkBytes > 0 and size >= chunkBytes):
+                self.__loadChunk(chunk, load, stats, st, progress)
+                chunk = []
+                size = 0
+        if chunk:
+            self.__loadChunk(chunk, load, stats, st, progress)
+        return stats
+
+    @staticmethod
+    def __loadChunk(chunk, load, stats, st, progress):
+        load(chunk)
+        stats["rows"] += len(chunk)
+        stats["chunks"] += 1
+        stats["seconds"] = time.time() - st
+        stats["rowsPerSec"] = stats["seconds"] > 0 and stats["rows"] / stats["seconds"] or 0.0
+        if progress:
+            progress(dict(stats))
+
+    @staticmethod
+    def __estimateSize(row) -> int:
+        size = 0
+        for value in row:
+            if isinstance(value, (str, bytes, bytearray)):
+                size += len(value) + 3
+            else:
+                size += 8
+        return size
+
+    def __cursor(self, stream: bool = False, tuples: bool = False):
+        connection = self.getConnection()
+        if self.__dbType == 'mysql' and (stream or tuples):
+            import pymysql
+            if tuples:
+                return connection.cursor(stream and pymysql.cursors.SSCursor or pymysql.cursors.Cursor)
+            return connection.cursor(pymysql.cursors.SSDictCursor)
+        cursor = connection.cursor()
+        if tuples and self.__dbType == 'sqlite':
+            cursor.row_factory = None
+        return cursor
+
+    @staticmethod
+    def __columnar(names, rows, mode: str) -> dict:
+        """
+        数据行元组转列式数据
+        :param names: 字段名
+        :param rows: 数据行（元组）
+        :param mode: list、array或numpy
+        :return: {字段名: 列数据}
+        """
+        if rows and not isinstance(rows[0], (tuple, list)):
+            rows = [tuple(row.values()) for row in rows]
+        columns = rows and list(zip(*rows)) or [()] * len(names)
+        return {name: DB.__typedColumn(column, mode) for name, column in zip(names, columns)}
+
+    @staticmethod
+    def __typedColumn(column: tuple, mode: str):
+        """
+        数值列使用类型化缓冲区：全部为int时使用int64，int/float混合时使用float64
+        """
+        if mode == "list":
+            return list(column)
+        types = set(map(type, column))
+        if mode == "array":
+            import array
+            try:
+                if types <= {int}:
+                    return array.array('q', column)
+                if types <= {int, float}:
+                    return array.array('d', column)
+            except OverflowError:
+                pass
+            return list(column)
+        if mode == "numpy":
+            import numpy
+            numbers = types - {type(None)}
+            try:
+                if types <= {int}:
+                    return numpy.array(column, dtype=numpy.int64)
+                if numbers and numbers <= {int, float}:
+                    return numpy.array([numpy.nan if value is None else value for value in column]
+                                       if type(None) in types else column, dtype=numpy.float64)
+            except OverflowError:
+                pass
+            return numpy.array(column, dtype=object)
+        raise ValueError(f"columnar mode is not support : {mode}")
+
+    def __sql(self, sql) -> str:
+        if len(sql) > DB.__maxCachedSqlLength:
+            return DB._rewriteSql.__wrapped__(self.__dbType, sql)
+        return DB._rewriteSql(self.__dbType, sql)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _rewriteSql(dbType, sql) -> str:
+        """
+        占位符转换，按SQL文本缓存
+        """
+        if dbType == 'mysql':
+            sql = sql.replace("?", "%s")
+        elif dbType == 'sqlite':
+            sql = sql.replace("%s", "?").replace("%d", "?")
+        return sql
+
+    def __del__(self):
+        self.close()
+        del self.__connection
+
+    @staticmethod
+    def __str2Hump(columnName):
+        arr = filter(None, columnName.lower().split('_'))
+        res = ''
+        for item in arr:
+            res = res + item[0].upper() + item[1:]
+        res = res[0].lower() + res[1:]
+        return res
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def __humpKeys(columns: tuple) -> tuple:
+        """
+        字段名 -> 驼峰字段名映射，按结果集的字段元组缓存
+        """
+        return tuple(DB.__str2Hump(column) for column in columns)
+
+    @staticmethod
+    def _humpRow(row, humpKeys: tuple = None, humpOnly: bool = False) -> dict:
+        if row:
+            if humpKeys is None:
+                humpKeys = DB.__humpKeys(tuple(row.keys()))
+            if humpOnly:
+                return dict(zip(humpKeys, row.values()))
+            newRow = dict(row)
+            newRow.update(zip(humpKeys, row.values()))
+            return newRow
+
+    @staticmethod
+    def __dictRows(cursor, rows, hump: bool, humpOnly: bool = False) -> list:
+        """
+        数据行转字典列表，兼容字典行与元组行（包括sqlite3.Row），转驼峰时同一结果集只计算一次字段映射
+        """
+        if not rows:
+            return list(rows)
+        if isinstance(rows[0], dict):
+            return hump and DB._humpRows(rows, humpOnly) or list(rows)
+        names = DB.__columnNames(cursor, False)
+        if not hump:
+            return [dict(zip(names, row)) for row in rows]
+        humpKeys = DB.__humpKeys(names)
+        if humpOnly:
+            return [dict(zip(humpKeys, row)) for row in rows]
+        newRows = []
+        for row in rows:
+            newRow = dict(zip(names, row))
+            newRow.update(zip(humpKeys, row))
+            newRows.append(newRow)
+        return newRows
+
+    @staticmethod
+    def _humpRows(rows, humpOnly: bool = False) -> list:
+        """
+        批量转驼峰，同一结果集只计算一次字段映射
+        """
+        humpKeys = DB.__humpKeys(tuple(rows[0].keys()))
+        if humpOnly:
+            return [dict(zip(humpKeys, row.values())) for row in rows]
+        newRows = []
+        for row in rows:
+            newRow = dict(row)
+            newRow.update(zip(humpKeys, row.values()))
+            newRows.append(newRow)
+        return newRows
+
+
+class SQLite(DB):
+    # 性能配置：PRAGMA设置 + 行工厂（dict：Python字典工厂；tuple：C层元组，由DB统一转字典；row：sqlite3.Row）
+    PROFILES = {
+        # 可靠写入：WAL + FULL同步，每次提交都落盘
+        "durable": {"journal_mode": "WAL", "synchronous": "FULL", "busy_timeout": 5000, "foreign_keys": "ON"},
+        # 读多写少：WAL + NORMAL同步，大页缓存与内存映射，临时表放内存
+        "read_heavy": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -64000,
+                       "mmap_size": 268435456, "temp_store": "MEMORY", "busy_timeout": 5000,
+                       "rowFactory": "tuple"},
+        # 批量导入：关闭同步，日志放内存，崩溃时可能损坏数据库，仅用于可重建的数据
+        "bulk_load": {"journal_mode": "MEMORY", "synchronous": "OFF", "cache_size": -256000,
+                      "temp_store": "MEMORY", "rowFactory": "tuple"},
+    }
+
+    def __init__(self, database, debug: bool = False, cachedStatements: int = 256, profile: str = None,
+                 pragmas: dict = None, rowFactory: str = None) -> None:
+        """
+        SQLite3数据库
+        :param database:
+        :param debug:
+        :param cachedStatements: 连接缓存的预编译语句数量
+        :param profile: 性能配置：durable、read_heavy、bulk_load，见 SQLite.PROFILES
+        :param pragmas: 额外的PRAGMA设置，覆盖profile，如 {"cache_size": -64000}
+        :param rowFactory: 行工厂：dict（默认）、tuple、row，覆盖profile
+        """
+        import sqlite3
+        self.__database = database
+        self.__debug = debug
+        self.__connection = sqlite3.connect(database, cached_statements=cachedStatements)
+        try:
+            SQLite.configure(self.__connection, profile, pragmas, rowFactory)
+        except BaseException:
+            self.__connection.close()
+            raise
+        super().__init__(self.__connection, debug=self.__debug, dbType='sqlite')
+
+    @staticmethod
+    def configure(connection, profile: str = None, pragmas: dict = None, rowFactory: str = None):
+        """
+        按性能配置设置连接的PRAGMA与行工厂
+        :param connection: sqlite3连接
+        :param profile: 性能配置名称
+        :param pragmas: 额外的PRAGMA设置
+        :param rowFactory: 行工厂：dict、tuple、row
+        :return: 连接
+        """
+        import sqlite3
+        if profile is not None and profile not in SQLite.PROFILES:
+            raise ValueError(f"sqlite profile is not support : {profile}")
+        settings = dict(profile and SQLite.PROFILES[profile] or {})
+        settings.update(pragmas or {})
+        rowFactory = rowFactory or settings.pop("rowFactory", None) or "dict"
+        settings.pop("rowFactory", None)
+        if rowFactory == "dict":
+            connection.row_factory = SQLite.__dict_factory
+        elif rowFactory == "tuple":
+            connection.row_factory = None
+        elif rowFactory == "row":
+            connection.row_factory = sqlite3.Row
+        else:
+            raise ValueError(f"sqlite row factory is not support : {rowFactory}")
+        # journal_mode需要最先设置
+        for name in sorted(settings, key=lambda key: key != "journal_mode"):
+            connection.execute(f"PRAGMA {name} = {settings[name]}").close()
+        return connection
+
+    def getPragmas(self, *names) -> dict:
+        """
+        查询当前连接的PRAGMA值
+        :param names: PRAGMA名称，默认为性能配置涉及的全部PRAGMA
+        :return: {名称: 值}
+        """
+        names = names or sorted({name for settings in SQLite.PROFILES.values() for name in settings} - {"rowFactory"})
+        pragmas = {}
+        for name in names:
+            row = self.selectOne(f"PRAGMA {name}", hump=False, cache=False)
+            pragmas[name] = next(iter(row.values())) if row else None
+        return pragmas
+
+    def getBusinessDatabaseNames(self) -> list[str]:
+        """
+        获取业务数据库名称
+        :return:
+        """
+        return self.getDatabaseNames()
+
+    def getDatabaseNames(self) -> list[str]:
+        """
+         获取所有数据库名称
+         :return:
+         """
+        return ["main"]
+
+    def getTables(self, tables=None) -> list[dict]:
+        return self.select("select distinct tbl_name as table_name, sql from sqlite_master "
+                           f"where type = 'table' and tbl_name {inSql(tables)}")
+
+    def getTableNames(self) -> list[str]:
+        """
+        获取所有数据库名称
+        :return:
+        """
+        rows = self.select("select distinct tbl_name from sqlite_master where type = 'table'", hump=False)
+        databaseNames = []
+        if rows:
+            for row in rows:
+                databaseNames.append(row['tbl_name'])
+        return databaseNames
+
+    @staticmethod
+    def __dict_factory(cursor, row):
+        d = {}
+        for idx, col in enumerate(cursor.description):
+            d[col[0]] = row[idx]
+        return d
+
+
+class MySQL(DB):
+    """
+    Mysql数据库
+    """
+    __catalog = None
+    # 自动重连配置 (retries, backoff, maxBackoff, pingIdle)、熔断器和统计
+    __reconnect = None
+    __breaker = None
+    __broken = False
+    __lastUsed = 0.0
+    # 连接断开的错误码：无法连接、服务端断开、查询中断开、连接被kill、空闲超时断开
+    __connectionErrorCodes = frozenset((2002, 2003, 2006, 2013, 2055, 1927, 4031))
+
+    def __init__(self, host="localhost", port: int = 3306, username="root", password="", database="information_schema",
+                 charset: str = "utf8mb4",
+                 debug: bool = False,
+                 **config) -> None:
+        import pymysql
+        from pymysql.constants import CLIENT
+
+        self.__host = host
+        self.__username = username
+        self.__password = password
+        self.__database = database
+        self.__charset = charset
+        self.__debug = debug
+
+        # 支持多条语句执行
+        # https://stackoverflow.com/questions/58544640/pymysql-unable-to-execute-multiple-queries
+        if config.__contains__("client_flag"):
+            config['client_flag'] |= CLIENT.MULTI_STATEMENTS
+        else:
+            config['client_flag'] = CLIENT.MULTI_STATEMENTS
+
+        self.__creator = lambda: pymysql.connect(host=host, port=port, user=username, password=password,
+                                                 database=self.__database, charset=charset,
+                                                 cursorclass=pymysql.cursors.DictCursor, **config)
+        self.__connection = self.__creator()
+        super().__init__(self.__connection, debug=self.__debug, dbType='mysql')
+
+    def select(self, sql, *parameters, **kwargs) -> list[dict]:
+        return self.__call("select", True, sql, *parameters, **kwargs)
+
+    def selectOne(self, sql, *parameters, **kwargs) -> dict:
+        return self.__call("selectOne", True, sql, *parameters, **kwargs)
+
+    def selectColumns(self, sql, *parameters, **kwargs) -> dict:
+        return self.__call("selectColumns", True, sql, *parameters, **kwargs)
+
+    def insertBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+        return self.__call("insertBatch", False, sql, rows, commit=commit, **kwargs)
+
+    def execute(self, sql, *parameters, commit=True, **kwargs):
+        """
+        执行SQL，启用元数据缓存时DDL语句执行后失效元数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 是否自动提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        try:
+            return self.__call("execute", False, sql, *parameters, commit=commit, **kwargs)
+        finally:
+            if self.__catalog is not None:
+                self.__catalog.invalidateSql(sql)
+
+    def executeScript(self, sqlScript: str, *params, commit=True, **variables):
+        try:
+            sqlScript = sqlScript.format_map(variables)
+        except:
+            pass
+        return self.execute(sqlScript, *params, commit=commit)
+
+    def runScript(self, source, **kwargs) -> dict:
+        try:
+            return super().runScript(source, **kwargs)
+        finally:
+            if self.__catalog is not None:
+                self.__catalog.invalidate()
+
+    def enableReconnect(self, retries: int = 3, backoff: float = 0.1, maxBackoff: float = 2.0,
+                        pingIdle: float = 30.0, failureThreshold: int = 5, resetTimeout: float = 10.0) -> CircuitBreaker:
+        """
+        启用连接健康管理：连接空闲超过pingIdle秒时先ping，断开则重新连接；
+        select/selectOne/selectColumns（包括count、元数据查询）遇到连接断开时重连并按指数退避重试，
+        有未提交的写操作（commit=False、transaction()内、批量提交未提交）时不重试；写操作不重试，
+        下一次操作时重新连接；连续失败达到阈值后熔断，熔断期间直接抛出CircuitOpenError，
+        建议同时配置较短的connect_timeout、read_timeout，避免服务端不可用时长时间等待
+        :param retries: 读操作的最大重试次数
+        :param backoff: 第一次重试前的等待时间（秒），之后每次翻倍
+        :param maxBackoff: 重试等待时间上限（秒）
+        :param pingIdle: 连接空闲多久（秒）后使用前先ping，小于等于0不ping
+        :param failureThreshold: 打开熔断器的连续失败次数
+        :param resetTimeout: 熔断后多久（秒）放行一次尝试
+        :return: 熔断器
+        """
+        self.__connectionStats = {"connectionErrors": 0, "retries": 0, "reconnects": 0, "reconnectFailures": 0,
+                                  "pings": 0, "pingFailures": 0, "failFast": 0, "lastError": None,
+                                  "lastReconnectTime": None}
+        self.__statsLock = threading.Lock()
+        self.__breaker = CircuitBreaker(failureThreshold=failureThreshold, resetTimeout=resetTimeout)
+        self.__reconnect = (max(retries, 0), backoff, maxBackoff, pingIdle)
+        self.__lastUsed = time.time()
+        return self.__breaker
+
+    def disableReconnect(self):
+        """
+        禁用连接健康管理，已检测到断开的连接在下一次操作时仍会重新连接
+        :return:
+        """
+        self.__reconnect = None
+        self.__breaker = None
+
+    def getConnectionStats(self) -> dict:
+        """
+        连接健康统计：连接错误、重试、重连（失败）、ping（失败）、熔断快速失败次数，最近的错误和重连时间，熔断器状态
+        :return:
+        """
+        if self.__breaker is None:
+            return {}
+        with self.__statsLock:
+            stats = dict(self.__connectionStats)
+        stats["breaker"] = self.__breaker.stats()
+        return stats
+
+    def isConnected(self) -> bool:
+        """
+        连接是否可用：未关闭且没有检测到断开（不发送ping）
+        :return:
+        """
+        if self.isClosed() or self.__broken:
+            return False
+        connection = self._DB__connection
+        return connection is None or getattr(connection, "open", True)
+
+    def close(self):
+        """
+        关闭连接，连接已断开时不再提交
+        :return:
+        """
+        if self.__broken and not self.isClosed():
+            self._DB__closed = True
+            return
+        super().close()
+
+    def resetConnection(self):
+        """
+        丢弃当前连接（未提交的写操作丢失），下一次操作时重新连接
+        :return:
+        """
+        self.__broken = True
+        self._DB__clearPending()
+        try:
+            self.__connection.close()
+        except Exception:
+            pass
+
+    def getConnection(self):
+        """
+        获取连接：连接已断开（包括禁用连接健康管理之前检测到的断开）时重新连接，
+        启用连接健康管理时连接空闲超过pingIdle秒且ping失败也重新连接
+        :return:
+        """
+        connection = super().getConnection()
+        reconnect = self.__reconnect
+        if reconnect is not None and not self.__broken and 0 < reconnect[3] < time.time() - self.__lastUsed:
+            self.__count("pings")
+            try:
+                connection.ping(reconnect=False)
+            except Exception as e:
+                self.__count("pingFailures", e)
+                if self.__uncommitted():
+                    self.resetConnection()
+                    raise RuntimeError(f"Database connection lost with uncommitted writes : {e!r}") from e
+                self.__broken = True
+        if self.__broken:
+            connection = self.__connect()
+        self.__lastUsed = time.time()
+        return connection
+
+    def __connect(self):
+        try:
+            connection = self.__creator()
+        except Exception as e:
+            self.__count("reconnectFailures", e)
+            raise
+        try:
+            self.__connection.close()
+        except Exception:
+            pass
+        self.__connection = self._DB__connection = connection
+        self.__broken = False
+        self.__count("reconnects")
+        if self.__reconnect is not None:
+            with self.__statsLock:
+                self.__connectionStats["lastReconnectTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return connection
+
+    def __call(self, method: str, retry: bool, *args, **kwargs):
+        """
+        调用DB的方法，启用连接健康管理时经过熔断器，连接断开时重置连接，读操作按指数退避重试
+        """
+        breaker = self.__breaker
+        if breaker is None:
+            return getattr(super(), method)(*args, **kwargs)
+        import random
+        attempt = 0
+        while True:
+            try:
+                breaker.allow()
+            except CircuitOpenError:
+                self.__count("failFast")
+                raise
+            try:
+                result = getattr(super(), method)(*args, **kwargs)
+            except BaseException as e:
+                if not MySQL.__isConnectionError(e):
+                    breaker.success()
+                    raise
+                breaker.failure()
+                self.__count("connectionErrors", e)
+                uncommitted = self.__uncommitted()
+                self.resetConnection()
+                retries, backoff, maxBackoff, pingIdle = self.__reconnect or (0, 0, 0, 0)
+                if not retry or uncommitted or attempt >= retries:
+                    raise
+                time.sleep(min(backoff * (1 << attempt), maxBackoff) * random.uniform(0.5, 1.0))
+                attempt += 1
+                self.__count("retries")
+                continue
+            breaker.success()
+            return result
+
+    def __uncommitted(self) -> bool:
+        pending = self._DB__pending
+        return bool(getattr(pending, "depth", 0) or getattr(pending, "count", 0) or getattr(pending, "dirty", False))
+
+    def __count(self, name: str, error: BaseException = None):
+        if self.__reconnect is None:
+            return
+        with self.__statsLock:
+            self.__connectionStats[name] += 1
+            if error is not None:
+                self.__connectionStats["lastError"] = repr(error)
+
+    @staticmethod
+    def __isConnectionError(e: BaseException) -> bool:
+        import pymysql
+        if isinstance(e, pymysql.err.InterfaceError):
+            return True
+        if isinstance(e, pymysql.err.OperationalError):
+            return bool(e.args) and e.args[0] in MySQL.__connectionErrorCodes
+        return isinstance(e, ConnectionError)
+
+    def enableMetadataCache(self, ttl: float = 300) -> MetadataCatalog:
+        """
+        启用元数据缓存：getDatabaseNames、getTables、getTableNames、getTableColumns、getColumnInfo
+        从内存中的元数据目录返回，每个库的表和字段各一次查询加载，TTL过期或执行DDL后重新加载
+        :param ttl: 元数据有效期（秒）
+        :return: 元数据目录
+        """
+        self.__catalog = MetadataCatalog(self, ttl=ttl)
+        return self.__catalog
+
+    def disableMetadataCache(self):
+        """
+        禁用元数据缓存
+        :return:
+        """
+        self.__catalog = None
+
+    def getMetadataCatalog(self) -> MetadataCatalog:
+        """
+        获取元数据目录，未启用时为None
+        :return:
+        """
+        return self.__catalog
+
+    def loadData(self, table: str, rows: Iterable[Iterable], columns: Iterable[str] = None,
+                 chunkSize: int = 100000, chunkBytes: int = 0, progress=None) -> dict:
+        """
+        使用 LOAD DATA LOCAL INFILE 分块导入数据，每块写入临时文件后导入并提交
+        需要连接参数 local_infile=True 且服务端开启 local_infile
+        :param table: 表名
+        :param rows: 数据行（支持生成器），字段顺序与columns一致
+        :param columns: 字段名，默认为表的所有字段；值为bytes的字段以十六进制导入并用UNHEX还原，
+                        未指定字段名时包含bytes值的块改用批量插入
+        :param chunkSize: 每块的行数
+        :param chunkBytes: 每块的估算字节数上限，大于0时生效
+        :param progress: 进度回调 fun(stats)，每块提交后调用
+        :return: 统计信息 {"rows", "chunks", "seconds", "rowsPerSec"}
+        """
+        import os
+        import tempfile
+        columns = columns and list(columns)
+
+        def load(chunk):
+            # 二进制字段（值为bytes）按十六进制写入文件，导入时 SET col = UNHEX(@var) 还原
+            binary = {i for row in chunk for i, value in enumerate(row) if isinstance(value, (bytes, bytearray))}
+            if binary and not columns:
+                # 未指定字段名时无法用SET还原二进制字段，改为批量插入
+                placeholders = ','.join('?' * len(chunk[0]))
+                return self.insertBatch(f"INSERT INTO {table} VALUES ({placeholders})", chunk)
+            columnSql = ""
+            if columns:
+                names = [i in binary and f"@v{i}" or column for i, column in enumerate(columns)]
+                columnSql = f" ({','.join(names)})"
+                if binary:
+                    columnSql += " SET " + ','.join(f"{columns[i]} = UNHEX(@v{i})" for i in sorted(binary))
+            fd, path = tempfile.mkstemp(prefix="dber_", suffix=".tsv")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                    for row in chunk:
+                        f.write("\t".join(MySQL.__loadDataValue(value, i in binary) for i, value in enumerate(row)))
+                        f.write("\n")
+                sql = (f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' INTO TABLE {table} CHARACTER SET utf8mb4 "
+                       "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n'"
+                       f"{columnSql}")
+                self.execute(sql)
+            finally:
+                os.remove(path)
+
+        return self._DB__bulkLoad(rows, load, chunkSize, chunkBytes, progress)
+
+    @staticmethod
+    def __loadDataValue(value, binary: bool = False) -> str:
+        if value is None:
+            return "\\N"
+        if binary:
+            return (value if isinstance(value, (bytes, bytearray)) else str(value).encode('utf-8')).hex()
+        if isinstance(value, bool):
+            return value and "1" or "0"
+        return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+
+    def setDatabase(self, database: str):
+        self.__connection.select_db(database)
+        self.__database = database or self.__database
+
+    def getBusinessDatabaseNames(self) -> list[str]:
+        """
+        获取业务数据库名称
+        :return:
+        """
+        databaseNames = self.getDatabaseNames()
+        if databaseNames:
+            databaseNames.remove("information_schema")
+            databaseNames.remove("performance_schema")
+            databaseNames.remove("test")
+            databaseNames.remove("mysql")
+            databaseNames.remove("sys")
+        return databaseNames
+
+    def getDatabaseNames(self) -> list[str]:
+        """
+        获取所有数据库名称
+        :return:
+        """
+        if self.__catalog is not None:
+            return self.__catalog.databases()
+        rows = self.select("select distinct table_schema from information_schema.tables", hump=False)
+        databaseNames = []
+        if rows:
+            for row in rows:
+                databaseNames.append(row['table_schema'])
+        return databaseNames
+
+    def getTables(self, database: str = None) -> list[dict]:
+        """
+        获取数据库下所有表信息
+        :param database: 数据库名，默认为连接的数据库
+        :return:
+        """
+        if not database:
+            database = self.__database
+        if self.__catalog is not None:
+            return self.__catalog.tables(database)
+        return self.select(
+            "select table_name,table_comment,create_time,update_time,table_rows,data_length,index_length,auto_increment "
+            "from information_schema.tables "
+            f"where table_schema = '{database}'")
+
+    def getTableNames(self, database: str = None, lower=True) -> list[str]:
+        """
+        获取数据库下所有表名称
+        :param database: 数据库名，默认为连接的数据库
+        :param lower: 表明是否小写
         :return:
         """
         if not database:
             database = self.__database
+        if self.__catalog is not None:
+            return [lower and tb.lower() or tb for tb in self.__catalog.tableNames(database)]
         tableInfos = self.select(
             f"select table_name from information_schema.tables where table_schema = '{database}'", hump=False)
         tableNames = []
@@ -691,53 +3058,1864 @@ class MySQL(DB):
                 tableNames.append(lower and tb.lower() or tb)
         return tableNames
 
-    def getTableColumns(self, table: str, database: str = None) -> list[str]:
+    def getTableColumns(self, table: str, database: str = None) -> list[str]:
+        """
+        获取表的字段信息
+        :param table: 表名
+        :param database: 数据库名，默认为连接的数据库
+        :return:
+            column_name     字段名称 ： username
+            data_type       字段数据类型： varchar
+            column_type     字段类型 ： varchar(40)
+            is_nullable     是否为空 ： YES/NO
+            column_key      索引类型 ： PRI/UNI/MUL (主键索引/唯一索引/普通索引)
+            column_comment  字段注释： 用户名称
+            column_default  默认值 ：CURRENT_TIMESTAMP/其他
+                    extra ：扩展信息
+                                on update CURRENT_TIMESTAMP
+                                auto_increment
+        """
+        if not database:
+            database = self.__database
+        if self.__catalog is not None:
+            return self.__catalog.columns(database, table)
+        return self.select(
+            f"select column_name,data_type,column_type,is_nullable,column_key,column_comment,column_default,extra "
+            "from INFORMATION_SCHEMA.COLUMNS "
+            f"where table_schema = '{database}' and table_name = '{table}' "
+            "order by ordinal_position")
+
+    def getColumnInfo(self, table: str, column: str, database: str = None):
+        """
+        获取表字段信息
+        :param table: 表名
+        :param column: 字段名
+        :param database: 数据库名，默认为连接的数据库
+        :return:
+            column_name     字段名称 ： username
+            data_type       字段数据类型： varchar
+            column_type     字段类型 ： varchar(40)
+            is_nullable     是否为空 ： YES/NO
+            column_key      索引类型 ： PRI/UNI/MUL (主键索引/唯一索引/普通索引)
+            column_comment  字段注释： 用户名称
+            column_default  默认值 ：CURRENT_TIMESTAMP/其他
+                    extra ：扩展信息
+                                on update CURRENT_TIMESTAMP
+                                auto_increment
+        """
+        if not database:
+            database = self.__database
+        if self.__catalog is not None:
+            return self.__catalog.column(database, table, column)
+        return self.selectOne(
+            f"select column_name,data_type,column_type,is_nullable,column_key,column_comment,column_default,extra "
+            "from INFORMATION_SCHEMA.COLUMNS "
+            f"where table_schema = '{database}' and table_name = '{table}' and column_name= '{column}' "
+            "order by ordinal_position")
+
+
+class ConnectionPool(object):
+    """
+    数据库连接池（线程安全）
+    """
+
+    def __init__(self, creator, minSize: int = 1, maxSize: int = 10, maxIdleTime: float = 300,
+                 validator=None, validateOnBorrow: bool = True, timeout: float = 30) -> None:
+        """
+        数据库连接池
+        :param creator: 创建连接的函数 fun() -> connection
+        :param minSize: 最小连接数，回收空闲连接时至少保留的连接数
+        :param maxSize: 最大连接数
+        :param maxIdleTime: 空闲连接最大存活时间（秒），小于等于0不回收
+        :param validator: 连接校验函数 fun(connection) -> bool
+        :param validateOnBorrow: 借出连接时是否校验
+        :param timeout: 等待可用连接的超时时间（秒），None表示一直等待
+        """
+        import collections
+        if maxSize < 1:
+            raise ValueError(f"pool maxSize must be greater than 0 : {maxSize}")
+        if minSize < 0 or minSize > maxSize:
+            raise ValueError(f"pool minSize must be between 0 and {maxSize} : {minSize}")
+        self.__creator = creator
+        self.__minSize = minSize
+        self.__maxSize = maxSize
+        self.__maxIdleTime = maxIdleTime
+        self.__validator = validator
+        self.__validateOnBorrow = validateOnBorrow
+        self.__timeout = timeout
+        self.__closed = False
+        self.__size = 0
+        # 空闲连接：(connection, 归还时间)，左边最旧，右边最新
+        self.__idle = collections.deque()
+        self.__condition = threading.Condition()
+        for i in range(0, minSize):
+            self.__idle.append((self.__create(), time.time()))
+
+    def borrow(self, timeout: float = -1):
+        """
+        借出连接
+        :param timeout: 等待超时时间（秒），默认使用连接池配置
+        :return: 数据库连接
+        """
+        if timeout is not None and timeout < 0:
+            timeout = self.__timeout
+        deadline = timeout is not None and time.time() + timeout or None
+        while True:
+            connection = None
+            create = False
+            with self.__condition:
+                if self.__closed:
+                    raise RuntimeError("Connection pool is closed")
+                evicted = self.__evictIdle()
+                if self.__idle:
+                    connection = self.__idle.pop()[0]
+                elif self.__size < self.__maxSize:
+                    self.__size += 1
+                    create = True
+                else:
+                    remaining = deadline and deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise RuntimeError(f"Connection pool exhausted, maxSize : {self.__maxSize}")
+                    self.__condition.wait(remaining)
+                    continue
+            for conn in evicted:
+                self.__closeQuietly(conn)
+            if create:
+                try:
+                    return self.__creator()
+                except BaseException:
+                    with self.__condition:
+                        self.__size -= 1
+                        self.__condition.notify()
+                    raise
+            if not self.__validateOnBorrow or self.__validate(connection):
+                return connection
+            self.giveBack(connection, discard=True)
+
+    def giveBack(self, connection, discard: bool = False):
+        """
+        归还连接
+        :param connection: 数据库连接
+        :param discard: 是否丢弃（关闭）该连接
+        :return:
+        """
+        with self.__condition:
+            if not (discard or self.__closed):
+                self.__idle.append((connection, time.time()))
+                self.__condition.notify()
+                return
+            self.__size -= 1
+            self.__condition.notify()
+        self.__closeQuietly(connection)
+
+    def evictIdle(self):
+        """
+        回收超过空闲时间的连接
+        :return: 回收的连接数
+        """
+        with self.__condition:
+            evicted = self.__evictIdle()
+        for conn in evicted:
+            self.__closeQuietly(conn)
+        return len(evicted)
+
+    def size(self) -> int:
+        """
+        连接总数
+        :return:
+        """
+        return self.__size
+
+    def idleSize(self) -> int:
+        """
+        空闲连接数
+        :return:
+        """
+        return len(self.__idle)
+
+    def activeSize(self) -> int:
+        """
+        借出中的连接数
+        :return:
+        """
+        return self.__size - len(self.__idle)
+
+    def isClosed(self) -> bool:
+        """
+        连接池是否关闭
+        :return:
+        """
+        return self.__closed
+
+    def close(self):
+        """
+        关闭连接池，借出中的连接在归还时关闭
+        :return:
+        """
+        with self.__condition:
+            self.__closed = True
+            idle = [item[0] for item in self.__idle]
+            self.__size -= len(idle)
+            self.__idle.clear()
+            self.__condition.notify_all()
+        for conn in idle:
+            self.__closeQuietly(conn)
+
+    def __evictIdle(self) -> list:
+        evicted = []
+        if self.__maxIdleTime and self.__maxIdleTime > 0:
+            expireTime = time.time() - self.__maxIdleTime
+            while self.__idle and self.__size > self.__minSize and self.__idle[0][1] < expireTime:
+                evicted.append(self.__idle.popleft()[0])
+                self.__size -= 1
+        return evicted
+
+    def __create(self):
+        connection = self.__creator()
+        self.__size += 1
+        return connection
+
+    def __validate(self, connection) -> bool:
+        if not self.__validator:
+            return True
+        try:
+            return bool(self.__validator(connection))
+        except Exception:
+            return False
+
+    @staticmethod
+    def __closeQuietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class PooledDB(DB):
+    """
+    连接池数据库：每个线程绑定一个借出的连接，select/insertBatch等API与DB一致
+    """
+
+    def __init__(self, pool: ConnectionPool, dbType: str = None, debug: bool = False) -> None:
+        """
+        连接池数据库
+        :param pool: 连接池
+        :param dbType: 数据库类型
+        :param debug: 是否打印SQL
+        """
+        self.__pool = pool
+        self.__closed = False
+        self.__lock = threading.Lock()
+        # 线程绑定的连接：thread ident -> (thread, connection)
+        self.__bound = {}
+        DB.__init__(self, None, dbType=dbType, debug=debug)
+        self.release()
+
+    def getConnection(self):
+        """
+        获取当前线程绑定的连接，未绑定时从连接池借出并绑定
+        :return:
+        """
+        if self.isClosed():
+            raise RuntimeError("Database connection is closed")
+        thread = threading.current_thread()
+        bound = self.__bound.get(thread.ident)
+        if bound and bound[0] is thread:
+            return bound[1]
+        self.__reclaim()
+        connection = self.__pool.borrow()
+        with self.__lock:
+            self.__bound[thread.ident] = (thread, connection)
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """
+        借用连接：with db.connection() as conn，代码块内当前线程的所有操作使用同一个连接，
+        正常退出时提交并归还，异常时回滚并归还；当前线程已绑定连接时直接复用且不归还
+        :return:
+        """
+        borrowed = self.__current() is None
+        connection = self.getConnection()
+        try:
+            yield connection
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            if borrowed:
+                self.release()
+
+    def release(self):
+        """
+        提交并归还当前线程绑定的连接
+        :return:
+        """
+        with self.__lock:
+            bound = self.__bound.pop(threading.get_ident(), None)
+        if bound:
+            self.__giveBack(bound[1], commit=True)
+            self._DB__clearPending()
+
+    def discard(self):
+        """
+        丢弃当前线程绑定的连接（不提交、不放回连接池），连接已断开时使用，下一次操作时重新借出
+        :return:
+        """
+        with self.__lock:
+            bound = self.__bound.pop(threading.get_ident(), None)
+        if bound:
+            self.__pool.giveBack(bound[1], discard=True)
+            self._DB__clearPending()
+
+    def commit(self):
+        """
+        提交当前线程绑定连接的事务
+        :return:
+        """
+        connection = self.__current()
+        if connection:
+            connection.commit()
+            self._DB__clearPending()
+            queryCache = self.getQueryCache()
+            if queryCache is not None:
+                queryCache.flushPending()
+
+    def rollback(self):
+        """
+        回滚当前线程绑定连接的事务
+        :return:
+        """
+        connection = self.__current()
+        if connection:
+            connection.rollback()
+            self._DB__clearPending()
+            queryCache = self.getQueryCache()
+            if queryCache is not None:
+                queryCache.flushPending()
+
+    def getPool(self) -> ConnectionPool:
+        """
+        获取连接池
+        :return:
+        """
+        return self.__pool
+
+    def isClosed(self) -> bool:
+        """
+        连接池是否关闭
+        :return:
+        """
+        return self.__closed
+
+    def isThreadSafe(self) -> bool:
+        """
+        是否可以在多个线程中同时使用
+        :return:
+        """
+        return True
+
+    def close(self):
+        """
+        关闭连接池：提交当前线程的连接，关闭其他线程绑定的连接
+        :return:
+        """
+        if not self.isClosed():
+            self.release()
+            with self.__lock:
+                bounds = list(self.__bound.values())
+                self.__bound.clear()
+            for thread, connection in bounds:
+                self.__pool.giveBack(connection, discard=True)
+            self.__pool.close()
+            self.__closed = True
+            if self._DB__debug:
+                print(f"成功关闭DB：{self}, close pool: {self.__pool}")
+
+    def __current(self):
+        bound = self.__bound.get(threading.get_ident())
+        if bound and bound[0] is threading.current_thread():
+            return bound[1]
+
+    def __reclaim(self):
+        """
+        回收已结束线程绑定的连接
+        """
+        with self.__lock:
+            deadIdents = [ident for ident, bound in self.__bound.items() if not bound[0].is_alive()]
+            deadBounds = [self.__bound.pop(ident) for ident in deadIdents]
+        for thread, connection in deadBounds:
+            self.__giveBack(connection, commit=False)
+
+    def __giveBack(self, connection, commit: bool):
+        try:
+            if commit:
+                connection.commit()
+            else:
+                connection.rollback()
+        except Exception:
+            self.__pool.giveBack(connection, discard=True)
+        else:
+            self.__pool.giveBack(connection)
+
+
+class PooledSQLite(PooledDB, SQLite):
+    """
+    SQLite3连接池数据库
+    """
+
+    def __init__(self, database, minSize: int = 1, maxSize: int = 5, maxIdleTime: float = 300,
+                 validateOnBorrow: bool = False, timeout: float = 30, debug: bool = False,
+                 cachedStatements: int = 256, profile: str = None, pragmas: dict = None,
+                 rowFactory: str = None) -> None:
+        """
+        SQLite3连接池数据库
+        :param database: 数据库文件，":memory:"使用共享缓存的内存数据库
+        :param minSize: 最小连接数
+        :param maxSize: 最大连接数
+        :param maxIdleTime: 空闲连接最大存活时间（秒）
+        :param validateOnBorrow: 借出连接时是否校验
+        :param timeout: 等待可用连接的超时时间（秒）
+        :param debug: 是否打印SQL
+        :param cachedStatements: 每个连接缓存的预编译语句数量
+        :param profile: 性能配置：durable、read_heavy、bulk_load，见 SQLite.PROFILES
+        :param pragmas: 额外的PRAGMA设置，覆盖profile
+        :param rowFactory: 行工厂：dict（默认）、tuple、row，覆盖profile
+        """
+        import sqlite3
+        uri = False
+        if database == ":memory:":
+            # 每个连接都会打开独立的内存库，改用共享缓存让连接池内的连接看到同一份数据
+            database = f"file:dber_pool_{id(self)}?mode=memory&cache=shared"
+            uri = True
+            minSize = max(minSize, 1)
+
+        def creator():
+            connection = sqlite3.connect(database, check_same_thread=False, uri=uri,
+                                         cached_statements=cachedStatements)
+            return SQLite.configure(connection, profile, pragmas, rowFactory)
+
+        pool = ConnectionPool(creator, minSize=minSize, maxSize=maxSize, maxIdleTime=maxIdleTime,
+                              validator=self.__validate, validateOnBorrow=validateOnBorrow, timeout=timeout)
+        PooledDB.__init__(self, pool, dbType='sqlite', debug=debug)
+
+    @staticmethod
+    def __validate(connection) -> bool:
+        connection.execute("select 1").close()
+        return True
+
+
+class ConcurrentSQLite(PooledDB, SQLite):
+    """
+    SQLite3多读单写数据库：select等读操作使用只读的WAL连接池，可在多个线程中并发执行；
+    execute/insertBatch等写操作提交到写队列，由唯一的写线程分组提交（每个写操作一个SAVEPOINT，
+    一组写操作一次COMMIT），写操作返回时已经提交
+    """
+
+    def __init__(self, database, readers: int = 4, groupSize: int = 256, groupWait: float = 0,
+                 maxIdleTime: float = 300, timeout: float = 30, debug: bool = False,
+                 cachedStatements: int = 256, profile: str = None, pragmas: dict = None,
+                 rowFactory: str = None) -> None:
+        """
+        SQLite3多读单写数据库
+        :param database: 数据库文件，不支持":memory:"
+        :param readers: 只读连接的最大数量
+        :param groupSize: 一次提交的最大写操作数量
+        :param groupWait: 写队列为空时等待更多写操作加入同一组的时间（秒），0为不等待
+        :param maxIdleTime: 空闲只读连接最大存活时间（秒）
+        :param timeout: 等待可用只读连接的超时时间（秒）
+        :param debug: 是否打印SQL
+        :param cachedStatements: 每个连接缓存的预编译语句数量
+        :param profile: 性能配置：durable、read_heavy、bulk_load，见 SQLite.PROFILES，日志模式固定为WAL
+        :param pragmas: 额外的PRAGMA设置，覆盖profile
+        :param rowFactory: 只读连接的行工厂：dict（默认）、tuple、row，覆盖profile
+        """
+        import os
+        import queue
+        import sqlite3
+        if database == ":memory:":
+            raise ValueError("ConcurrentSQLite does not support in-memory database")
+        if groupSize < 1:
+            raise ValueError(f"groupSize must be greater than 0 : {groupSize}")
+        if profile is not None and profile not in SQLite.PROFILES:
+            raise ValueError(f"sqlite profile is not support : {profile}")
+        settings = dict(profile and SQLite.PROFILES[profile] or {})
+        settings.update(pragmas or {})
+        settings["journal_mode"] = "WAL"
+        readerSettings = {name: value for name, value in settings.items()
+                          if name not in ("journal_mode", "synchronous", "locking_mode")}
+        self.__groupSize = groupSize
+        self.__groupWait = groupWait
+        self.__queue = queue.Queue()
+        self.__stats = {"writes": 0, "groups": 0, "errors": 0}
+        self.__statsLock = threading.Lock()
+
+        # 写连接使用自动提交模式，事务由写线程显式控制
+        self.__writer = sqlite3.connect(database, isolation_level=None, check_same_thread=False,
+                                        cached_statements=cachedStatements)
+        try:
+            SQLite.configure(self.__writer, pragmas=settings, rowFactory="tuple")
+        except BaseException:
+            self.__writer.close()
+            raise
+        self.__writerThread = threading.Thread(target=self.__writeLoop, name=f"dber-writer-{id(self)}",
+                                               daemon=True)
+        self.__writerThread.start()
+
+        readerUri = f"file:{os.path.abspath(database)}?mode=ro"
+
+        def creator():
+            connection = sqlite3.connect(readerUri, uri=True, check_same_thread=False,
+                                         cached_statements=cachedStatements)
+            return SQLite.configure(connection, pragmas=readerSettings, rowFactory=rowFactory)
+
+        pool = ConnectionPool(creator, minSize=1, maxSize=readers, maxIdleTime=maxIdleTime,
+                              validateOnBorrow=False, timeout=timeout)
+        PooledDB.__init__(self, pool, dbType='sqlite', debug=debug)
+
+    def submitWrite(self, fun):
+        """
+        提交写操作到写线程，fun(connection)在写连接上执行，作为一个SAVEPOINT原子生效
+        :param fun: 写操作 fun(connection)，返回值作为结果
+        :return: concurrent.futures.Future，提交后完成
+        """
+        return self.__submit(fun, exclusive=False)
+
+    def write(self, fun):
+        """
+        执行写操作并等待提交，见 submitWrite
+        :param fun: 写操作 fun(connection)
+        :return: fun的返回值
+        """
+        return self.submitWrite(fun).result()
+
+    def execute(self, sql, *parameters, commit=True, **kwargs):
+        """
+        执行SQL：提交到写线程并等待分组提交完成，commit参数无效
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param commit: 兼容参数，写操作总是提交
+        :param kwargs: 其他配置
+        :return: 已关闭的游标（可读取rowcount、lastrowid）
+        """
+        sql = self._DB__sql(sql)
+        parameters = self._parameters(*parameters)
+
+        def fun(connection):
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql, parameters, **kwargs)
+                return cursor
+            finally:
+                cursor.close()
+
+        return self.__write(sql, parameters, fun, lambda cursor: cursor.rowcount)
+
+    def insertBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+        """
+        批量插入：提交到写线程并等待分组提交完成，commit参数无效
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :param commit: 兼容参数，写操作总是提交
+        :param kwargs: 其他配置
+        :return:
+        """
+        sql = self._DB__sql(sql)
+        rows = list(rows)
+
+        def fun(connection):
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(sql, rows, **kwargs)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+        self.__write(sql, rows, fun, lambda rowCount: rowCount)
+
+    def executeScript(self, sqlScript: str, *params, commit=True, **variables):
+        """
+        执行SQL脚本：在写线程中单独执行（不参与分组提交），commit参数无效
+        :param sqlScript: sql脚本
+        :param commit: 兼容参数，脚本总是提交
+        :return:
+        """
+        try:
+            sqlScript = sqlScript.format_map(variables)
+        except:
+            pass
+        return self.__write(sqlScript, None, lambda connection: connection.executescript(sqlScript),
+                            lambda result: -1, exclusive=True)
+
+    def runScript(self, source, delimiter: str = ";", commitEvery: int = 1000, batchSize: int = 500,
+                  maxBatchBytes: int = 1 << 20, stopOnError: bool = True, progress=None, onStatement=None,
+                  encoding: str = "utf-8") -> dict:
+        """
+        流式执行SQL脚本文件：在写线程中单独执行（不参与分组提交），参数同DB.runScript
+        :return: 统计信息
+        """
+        script = SqlScript(source, delimiter=delimiter, dialect="sqlite", encoding=encoding)
+
+        def fun(connection):
+            try:
+                return script.run(connection, commitEvery=commitEvery, batchSize=batchSize,
+                                  maxBatchBytes=maxBatchBytes, stopOnError=stopOnError, progress=progress,
+                                  onStatement=onStatement,
+                                  record=lambda sql, st, rows, error: self._DB__printSql(sql, None, st, rows, error))
+            except BaseException:
+                if connection.in_transaction:
+                    connection.rollback()
+                raise
+
+        try:
+            return self.__submit(fun, exclusive=True).result()
+        finally:
+            queryCache = self.getQueryCache()
+            if queryCache is not None:
+                queryCache.invalidate()
+
+    def bulkInsert(self, sql, rows: Iterable[Iterable], chunkSize: int = 1000, chunkBytes: int = 0,
+                   synchronous: str = None, progress=None, **kwargs) -> dict:
+        """
+        分块批量插入：每块作为一个写操作提交到写线程，synchronous参数无效（由profile决定）
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :param chunkSize: 每块的行数
+        :param chunkBytes: 每块的估算字节数上限，大于0时生效
+        :param synchronous: 兼容参数
+        :param progress: 进度回调 fun(stats)，每块提交后调用
+        :param kwargs: 其他配置
+        :return: 统计信息 {"rows", "chunks", "seconds", "rowsPerSec"}
+        """
+        return self._DB__bulkLoad(rows, lambda chunk: self.insertBatch(sql, chunk, **kwargs),
+                                  chunkSize, chunkBytes, progress)
+
+    def transaction(self):
+        """
+        写操作在写线程中提交，不支持跨多次调用的事务，多条SQL的原子写入使用 write(fun)
+        :return:
+        """
+        raise RuntimeError("ConcurrentSQLite does not support transaction(), use write(fun) instead")
+
+    def getWriterStats(self) -> dict:
+        """
+        写线程统计：写操作数、提交组数、平均每组写操作数、失败数、队列长度
+        :return:
+        """
+        with self.__statsLock:
+            stats = dict(self.__stats)
+        stats["avgGroupSize"] = stats["groups"] and stats["writes"] / stats["groups"] or 0.0
+        stats["queueSize"] = self.__queue.qsize()
+        return stats
+
+    def close(self):
+        """
+        关闭数据库：等待写队列中的写操作提交后关闭写连接与只读连接池
+        :return:
+        """
+        if not self.isClosed():
+            self.__queue.put(None)
+            self.__writerThread.join()
+            self.__writer.close()
+            PooledDB.close(self)
+
+    def __submit(self, fun, exclusive: bool):
+        from concurrent.futures import Future
+        if self.isClosed():
+            raise RuntimeError("Database connection is closed")
+        future = Future()
+        self.__queue.put((fun, future, exclusive))
+        return future
+
+    def __write(self, sql, params, fun, rowCount, exclusive: bool = False):
+        st = time.time()
+        rows = -1
+        error = None
+        try:
+            result = self.__submit(fun, exclusive).result()
+            rows = rowCount(result)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            queryCache = self.getQueryCache()
+            if queryCache is not None:
+                queryCache.invalidateSql(sql)
+            self._DB__printSql(sql, params, st, rows, error)
+
+    def __writeLoop(self):
+        import queue
+        pending = None
+        while True:
+            op = pending or self.__queue.get()
+            pending = None
+            if op is None:
+                break
+            group = [op]
+            stopping = False
+            # 独占操作（脚本）单独执行，其他写操作尽量合并到同一组
+            while not op[2] and len(group) < self.__groupSize:
+                try:
+                    op = self.__queue.get(timeout=self.__groupWait) if self.__groupWait > 0 \
+                        else self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op is None:
+                    stopping = True
+                    break
+                if op[2]:
+                    pending = op
+                    break
+                group.append(op)
+            if group[0][2]:
+                self.__runExclusive(group[0])
+            else:
+                self.__commitGroup(group)
+            if stopping:
+                break
+        # 处理关闭后仍然留在队列中的写操作
+        while not self.__queue.empty():
+            op = self.__queue.get_nowait()
+            if op is not None and op[1].set_running_or_notify_cancel():
+                op[1].set_exception(RuntimeError("Database connection is closed"))
+
+    def __runExclusive(self, op):
+        fun, future, exclusive = op
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fun(self.__writer)
+        except BaseException as e:
+            self.__count(1, 1)
+            future.set_exception(e)
+        else:
+            self.__count(1, 0)
+            future.set_result(result)
+
+    def __commitGroup(self, group):
+        writer = self.__writer
+        done = []
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            for fun, future, exclusive in group:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                writer.execute("SAVEPOINT dber_write")
+                try:
+                    result = fun(writer)
+                except BaseException as e:
+                    writer.execute("ROLLBACK TO dber_write")
+                    writer.execute("RELEASE dber_write")
+                    done.append((future, None, e))
+                else:
+                    writer.execute("RELEASE dber_write")
+                    done.append((future, result, None))
+            writer.execute("COMMIT")
+        except BaseException as e:
+            if writer.in_transaction:
+                writer.rollback()
+            self.__count(len(group), len(group))
+            for fun, future, exclusive in group:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+        self.__count(len(done), sum(1 for future, result, error in done if error is not None))
+        for future, result, error in done:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def __count(self, writes: int, errors: int):
+        with self.__statsLock:
+            self.__stats["writes"] += writes
+            self.__stats["errors"] += errors
+            self.__stats["groups"] += 1
+
+
+class PooledMySQL(PooledDB, MySQL):
+    """
+    Mysql连接池数据库
+    """
+
+    def __init__(self, host="localhost", port: int = 3306, username="root", password="", database="information_schema",
+                 charset: str = "utf8mb4",
+                 minSize: int = 1, maxSize: int = 10, maxIdleTime: float = 300,
+                 validateOnBorrow: bool = True, timeout: float = 30,
+                 debug: bool = False,
+                 **config) -> None:
+        """
+        Mysql连接池数据库
+        :param minSize: 最小连接数
+        :param maxSize: 最大连接数
+        :param maxIdleTime: 空闲连接最大存活时间（秒）
+        :param validateOnBorrow: 借出连接时是否ping校验
+        :param timeout: 等待可用连接的超时时间（秒）
+        """
+        import pymysql
+        from pymysql.constants import CLIENT
+
+        if config.__contains__("client_flag"):
+            config['client_flag'] |= CLIENT.MULTI_STATEMENTS
+        else:
+            config['client_flag'] = CLIENT.MULTI_STATEMENTS
+        import weakref
+        self._MySQL__database = database
+        self.__ping = validateOnBorrow
+        # 连接 -> 当前选择的数据库，pymysql的connection.db在认证时编码为bytes且select_db()不更新
+        self.__selectedDatabases = weakref.WeakKeyDictionary()
+        self.__selectedLock = threading.Lock()
+
+        def creator():
+            selected = self._MySQL__database
+            connection = pymysql.connect(host=host, port=port, user=username, password=password,
+                                         database=selected, charset=charset,
+                                         cursorclass=pymysql.cursors.DictCursor, **config)
+            with self.__selectedLock:
+                self.__selectedDatabases[connection] = selected
+            return connection
+
+        # 借出时总是校验：切换过数据库的空闲连接需要同步到当前数据库
+        pool = ConnectionPool(creator, minSize=minSize, maxSize=maxSize, maxIdleTime=maxIdleTime,
+                              validator=self.__validate, validateOnBorrow=True, timeout=timeout)
+        PooledDB.__init__(self, pool, dbType='mysql', debug=debug)
+
+    def resetConnection(self):
+        """
+        丢弃当前线程绑定的连接，下一次操作时从连接池借出（借出时ping校验）
+        :return:
+        """
+        self.discard()
+
+    def isConnected(self) -> bool:
+        return not self.isClosed()
+
+    def setDatabase(self, database: str):
+        """
+        切换数据库，空闲连接在下次借出时切换
+        :param database: 数据库名
+        :return:
+        """
+        self._MySQL__database = database or self._MySQL__database
+        self.__selectDatabase(self.getConnection())
+
+    def __validate(self, connection) -> bool:
+        if self.__ping:
+            connection.ping(reconnect=False)
+        self.__selectDatabase(connection)
+        return True
+
+    def __selectDatabase(self, connection):
+        """
+        连接当前选择的数据库与目标数据库不同时切换，避免每次借出都发送COM_INIT_DB
+        """
+        database = self._MySQL__database
+        with self.__selectedLock:
+            if self.__selectedDatabases.get(connection) == database:
+                return
+        connection.select_db(database)
+        with self.__selectedLock:
+            self.__selectedDatabases[connection] = database
+
+
+class RoutingDB(DB):
+    """
+    读写分离数据库：读操作路由到从库（轮询或最低延迟），写操作路由到主库；
+    从库读操作失败后暂停使用一段时间，所有从库都暂停时读主库；
+    事务中（transaction()内，或commit=False的写操作之后到commit/rollback之前）当前线程的读操作也路由到主库
+    """
+    STRATEGIES = ("round_robin", "least_latency")
+    # 最低延迟策略下每隔多少次读操作轮询一次，让变慢后恢复的从库重新参与选择
+    __probeInterval = 100
+    # 延迟的指数移动平均系数
+    __latencyAlpha = 0.2
+    # 读操作失败后从库暂停使用的时间（秒），所有从库都暂停时读主库
+    __failureCooldown = 5.0
+
+    def __init__(self, primary: DB, replicas: Iterable[DB] = (), strategy: str = "round_robin",
+                 debug: bool = False) -> None:
+        """
+        读写分离数据库
+        :param primary: 主库，多线程使用时应为连接池数据库（如PooledMySQL）
+        :param replicas: 从库列表，为空时读操作也使用主库
+        :param strategy: 从库选择策略：round_robin（轮询）、least_latency（最低延迟）
+        :param debug: 是否打印SQL
+        """
+        import itertools
+        if strategy not in RoutingDB.STRATEGIES:
+            raise ValueError(f"routing strategy is not support : {strategy}")
+        self.__primary = primary
+        self.__replicas = list(replicas)
+        self.__strategy = strategy
+        self.__counter = itertools.count()
+        self.__probeCounter = itertools.count()
+        self.__lock = threading.Lock()
+        # 未采样的从库延迟为None，第一次读操作的延迟作为初始值
+        self.__latencies = [None] * len(self.__replicas)
+        self.__replicaReads = [0] * len(self.__replicas)
+        self.__replicaErrors = [0] * len(self.__replicas)
+        self.__failedUntil = [0.0] * len(self.__replicas)
+        self.__primaryReads = 0
+        self.__writes = 0
+        self.__sticky = threading.local()
+        self.__closed = False
+        DB.__init__(self, None, dbType=primary.getDatabaseType(), debug=debug)
+
+    def select(self, sql, *parameters, limit: int = 0, hump: bool = True, humpOnly: bool = False,
+               cache: bool = True, **kwargs) -> list[dict]:
+        return self.__read("select", sql, *parameters, limit=limit, hump=hump, humpOnly=humpOnly, cache=cache,
+                           **kwargs)
+
+    def selectOne(self, sql, *parameters, hump: bool = True, humpOnly: bool = False, cache: bool = True) -> dict:
+        return self.__read("selectOne", sql, *parameters, hump=hump, humpOnly=humpOnly, cache=cache)
+
+    def iterSelect(self, sql, *parameters, chunkSize: int = 0, fetchSize: int = 1000, hump: bool = True,
+                   humpOnly: bool = False, **kwargs):
+        return self.__iterRead("iterSelect", sql, *parameters, chunkSize=chunkSize, fetchSize=fetchSize, hump=hump,
+                               humpOnly=humpOnly, **kwargs)
+
+    def selectColumns(self, sql, *parameters, mode: str = "list", hump: bool = False, **kwargs) -> dict:
+        return self.__read("selectColumns", sql, *parameters, mode=mode, hump=hump, **kwargs)
+
+    def iterSelectColumns(self, sql, *parameters, chunkSize: int = 100000, mode: str = "list", hump: bool = False,
+                          **kwargs):
+        return self.__iterRead("iterSelectColumns", sql, *parameters, chunkSize=chunkSize, mode=mode, hump=hump,
+                               **kwargs)
+
+    def callbackResultSet(self, sql, *parameters, callback=None, humpOnly: bool = False, **kwargs):
+        return self.__read("callbackResultSet", sql, *parameters, callback=callback, humpOnly=humpOnly, **kwargs)
+
+    def parallelCallbackResultSet(self, sql, *parameters, callback=None, **kwargs) -> dict:
+        return self.__read("parallelCallbackResultSet", sql, *parameters, callback=callback, **kwargs)
+
+    def selectIn(self, sql, values: Iterable, *parameters, **kwargs) -> list[dict]:
+        return self.__read("selectIn", sql, values, *parameters, **kwargs)
+
+    def executeIn(self, sql, values: Iterable, *parameters, commit=True, **kwargs) -> int:
+        return self.__write("executeIn", commit, sql, values, *parameters, commit=commit, **kwargs)
+
+    def execute(self, sql, *parameters, commit=True, **kwargs):
+        return self.__write("execute", commit, sql, *parameters, commit=commit, **kwargs)
+
+    def insertBatch(self, sql, rows: Iterable[Iterable], commit=True, **kwargs):
+        return self.__write("insertBatch", commit, sql, rows, commit=commit, **kwargs)
+
+    def executeScript(self, sqlScript: str, *params, commit=True, **variables):
+        return self.__write("executeScript", commit, sqlScript, *params, commit=commit, **variables)
+
+    def runScript(self, source, **kwargs) -> dict:
+        return self.__write("runScript", True, source, **kwargs)
+
+    def bulkInsert(self, sql, rows: Iterable[Iterable], chunkSize: int = 1000, chunkBytes: int = 0,
+                   synchronous: str = None, progress=None, **kwargs) -> dict:
+        return self.__write("bulkInsert", True, sql, rows, chunkSize=chunkSize, chunkBytes=chunkBytes,
+                            synchronous=synchronous, progress=progress, **kwargs)
+
+    def callProc(self, procName: str, args):
+        return self.__write("callProc", True, procName, args)
+
+    @contextmanager
+    def transaction(self):
+        """
+        主库事务：代码块内当前线程的读写操作都使用主库，正常退出时提交，异常时回滚
+        :return: 数据库
+        """
+        sticky = self.__sticky
+        sticky.depth = getattr(sticky, "depth", 0) + 1
+        try:
+            with self.__primary.transaction():
+                yield self
+        finally:
+            sticky.depth -= 1
+            if sticky.depth == 0:
+                sticky.dirty = False
+
+    def commit(self):
+        """
+        提交主库事务，之后读操作恢复路由到从库
+        :return:
+        """
+        self.__primary.commit()
+        self.__sticky.dirty = False
+
+    def rollback(self):
+        """
+        回滚主库事务，之后读操作恢复路由到从库
+        :return:
+        """
+        self.__primary.rollback()
+        self.__sticky.dirty = False
+
+    def enableWriteBatching(self, maxStatements: int = 100, maxDelay: float = 0.05):
+        self.__primary.enableWriteBatching(maxStatements, maxDelay)
+
+    def disableWriteBatching(self):
+        self.__primary.disableWriteBatching()
+
+    def flush(self):
+        self.__primary.flush()
+
+    def getPendingWrites(self) -> int:
+        return self.__primary.getPendingWrites()
+
+    def getConnection(self):
+        """
+        获取主库连接
+        :return:
+        """
+        return self.__primary.getConnection()
+
+    def enableQueryCache(self, maxSize: int = 1024, ttl: float = 60, cache: QueryCache = None) -> QueryCache:
+        """
+        启用查询结果缓存：主库和从库共享同一个缓存，主库的写操作按表名失效；
+        从库有复制延迟时，写操作之后从从库读到的旧数据会被缓存至ttl过期
+        :param maxSize: 最大缓存条数
+        :param ttl: 缓存有效期（秒）
+        :param cache: 使用已有的查询缓存
+        :return: 查询缓存
+        """
+        cache = super().enableQueryCache(maxSize=maxSize, ttl=ttl, cache=cache)
+        for db in [self.__primary] + self.__replicas:
+            db.enableQueryCache(cache=cache)
+        return cache
+
+    def disableQueryCache(self):
+        super().disableQueryCache()
+        for db in [self.__primary] + self.__replicas:
+            db.disableQueryCache()
+
+    def enableMetrics(self, slowThreshold: float = 1.0, sink=None, metrics: "SqlMetrics" = None,
+                      **config) -> "SqlMetrics":
+        """
+        启用SQL执行指标统计：主库和从库共享同一个指标统计
+        :param slowThreshold: 慢SQL阈值（秒）
+        :param sink: 事件回调 fun(event)
+        :param metrics: 使用已有的指标统计
+        :param config: 其他配置，见 SqlMetrics
+        :return: 指标统计
+        """
+        metrics = super().enableMetrics(slowThreshold=slowThreshold, sink=sink, metrics=metrics, **config)
+        for db in [self.__primary] + self.__replicas:
+            db.enableMetrics(metrics=metrics)
+        return metrics
+
+    def disableMetrics(self):
+        super().disableMetrics()
+        for db in [self.__primary] + self.__replicas:
+            db.disableMetrics()
+
+    def getPrimary(self) -> DB:
+        """
+        获取主库
+        :return:
+        """
+        return self.__primary
+
+    def getReplicas(self) -> list[DB]:
+        """
+        获取从库列表
+        :return:
+        """
+        return list(self.__replicas)
+
+    def getRoutingStats(self) -> dict:
+        """
+        路由统计：主库读写次数，每个从库的读次数、失败次数、延迟（指数移动平均，毫秒，未采样时为None）
+        和是否处于失败后的暂停期
+        :return:
+        """
+        now = time.time()
+        with self.__lock:
+            return {"primaryReads": self.__primaryReads, "writes": self.__writes,
+                    "replicas": [{"reads": reads, "errors": errors,
+                                  "latencyMs": None if latency is None else latency * 1000,
+                                  "coolingDown": failedUntil > now}
+                                 for reads, errors, latency, failedUntil in
+                                 zip(self.__replicaReads, self.__replicaErrors, self.__latencies,
+                                     self.__failedUntil)]}
+
+    def isClosed(self) -> bool:
+        return self.__closed
+
+    def isThreadSafe(self) -> bool:
+        return all(db.isThreadSafe() for db in [self.__primary] + self.__replicas)
+
+    def release(self):
+        """
+        释放当前线程在主库和从库占用的连接
+        :return:
+        """
+        for db in [self.__primary] + self.__replicas:
+            db.release()
+
+    def close(self):
+        """
+        关闭主库和从库
+        :return:
+        """
+        if not self.__closed:
+            self.__closed = True
+            for db in [self.__primary] + self.__replicas:
+                db.close()
+
+    def __isSticky(self) -> bool:
+        sticky = self.__sticky
+        return getattr(sticky, "depth", 0) > 0 or getattr(sticky, "dirty", False) \
+            or self.__primary.getPendingWrites() > 0
+
+    def __reader(self):
+        """
+        选择读操作的数据库
+        :return: (从库序号，主库为-1, 数据库)
+        """
+        if not self.__replicas or self.__isSticky():
+            return -1, self.__primary
+        now = time.time()
+        healthy = [i for i, failedUntil in enumerate(self.__failedUntil) if failedUntil <= now]
+        if not healthy:
+            return -1, self.__primary
+        count = next(self.__counter)
+        if self.__strategy != "least_latency":
+            index = healthy[count % len(healthy)]
+        elif count % RoutingDB.__probeInterval:
+            # 未采样的从库优先
+            latencies = self.__latencies
+            index = min(healthy, key=lambda i: -1.0 if latencies[i] is None else latencies[i])
+        else:
+            # 探测使用独立的轮询计数，依次覆盖每个从库
+            index = healthy[next(self.__probeCounter) % len(healthy)]
+        return index, self.__replicas[index]
+
+    def __read(self, method: str, *args, **kwargs):
+        index, db = self.__reader()
+        st = time.time()
+        error = None
+        try:
+            return getattr(db, method)(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.__record(index, time.time() - st, error)
+
+    def __iterRead(self, method: str, *args, **kwargs):
+        """
+        流式读操作，延迟按返回第一块数据的时间计算（不包括调用方处理数据的时间）
+        """
+        index, db = self.__reader()
+        st = time.time()
+        latency = None
+        error = None
+        try:
+            for item in getattr(db, method)(*args, **kwargs):
+                if latency is None:
+                    latency = time.time() - st
+                yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.__record(index, time.time() - st if latency is None else latency, error)
+
+    def __record(self, index: int, latency: float, error: BaseException = None):
+        """
+        记录读操作：失败的读操作不计入延迟，从库暂停使用一段时间
+        """
+        with self.__lock:
+            if index < 0:
+                self.__primaryReads += 1
+                return
+            self.__replicaReads[index] += 1
+            if error is not None:
+                self.__replicaErrors[index] += 1
+                self.__failedUntil[index] = time.time() + RoutingDB.__failureCooldown
+            elif self.__latencies[index] is None:
+                self.__latencies[index] = latency
+            else:
+                alpha = RoutingDB.__latencyAlpha
+                self.__latencies[index] = self.__latencies[index] * (1 - alpha) + latency * alpha
+
+    def __write(self, method: str, autoCommit, *args, **kwargs):
+        if not (autoCommit or autoCommit > 0):
+            self.__sticky.dirty = True
+        with self.__lock:
+            self.__writes += 1
+        return getattr(self.__primary, method)(*args, **kwargs)
+
+
+class AsyncDB(abc.ABC):
+    """
+    异步数据库基类（asyncio），子类实现 select/selectOne/execute/insertBatch/callProc/close
+    连接由连接池管理，写操作执行后立即提交
+    """
+
+    def __init__(self, dbType: str = None) -> None:
+        self.__dbType = dbType
+
+    @abc.abstractmethod
+    async def select(self, sql, *parameters, limit: int = 0, hump: bool = True, humpOnly: bool = False) -> list[dict]:
+        """
+        查询数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param limit: 结果限制
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :return: 字典列表
+        """
+
+    @abc.abstractmethod
+    async def selectOne(self, sql, *parameters, hump: bool = True, humpOnly: bool = False) -> dict:
+        """
+        查询一行数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param hump: 转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :return: 数据行字典
+        """
+
+    @abc.abstractmethod
+    async def execute(self, sql, *parameters):
+        """
+        执行SQL并提交
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :return:
+        """
+
+    @abc.abstractmethod
+    async def insertBatch(self, sql, rows: Iterable[Iterable]):
+        """
+        批量插入并提交
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :return:
+        """
+
+    @abc.abstractmethod
+    async def callProc(self, procName: str, args):
+        """
+        调用存储过程
+        :param procName: 存储过程名称
+        :param args: 存储过程参数
+        :return:
+        """
+
+    @abc.abstractmethod
+    async def close(self):
+        """
+        关闭连接池
+        :return:
+        """
+
+    async def selectTable(self, table, columns: str = "*", where: str = "1 = 1", limit: int = 0, hump: bool = True,
+                          humpOnly: bool = False, **conditions):
+        """
+        查询数据
+        :param table: 表名
+        :param columns: 查询的字段，默认所有字段
+        :param where: where条件
+        :param limit: 返回数据行限制
+        :param hump: 是否转驼峰
+        :param humpOnly: 转驼峰时只保留驼峰字段
+        :param conditions: where条件
+        :return: 列表字典
+        """
+        if not (where.__contains__("where ") or where.__contains__("WHERE ")):
+            where = f"where {where}"
+        sql = f"select {columns} from {table} {where}"
+        for key in conditions.keys():
+            value = conditions[key]
+            if isinstance(value, (int, float)):
+                sql += f" and {key} = {value}"
+            else:
+                sql += f" and {key} = '{value}'"
+        return await self.select(sql, limit=limit, hump=hump, humpOnly=humpOnly)
+
+    async def update(self, sql, *parameters):
+        """
+        更新数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :return:
+        """
+        return await self.execute(sql, *parameters)
+
+    async def insert(self, sql, *parameters):
         """
-        获取表的字段信息
+        插入数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :return:
+        """
+        return await self.execute(sql, *parameters)
+
+    async def replace(self, sql, *parameters):
+        """
+        替换数据（插入或按唯一键更新）
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :return:
+        """
+        return await self.execute(sql, *parameters)
+
+    async def replaceBatch(self, sql, rows: Iterable[Iterable]):
+        """
+        批量替换
+        :param sql: SQL语句
+        :param rows: SQL占位符参数
+        :return:
+        """
+        return await self.insertBatch(sql, rows)
+
+    async def delete(self, sql, *parameters):
+        """
+        删除数据
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :return:
+        """
+        return await self.execute(sql, *parameters)
+
+    async def clear(self, table):
+        """
+        清空表数据
         :param table: 表名
-        :param database: 数据库名，默认为连接的数据库
         :return:
-            column_name     字段名称 ： username
-            data_type       字段数据类型： varchar
-            column_type     字段类型 ： varchar(40)
-            is_nullable     是否为空 ： YES/NO
-            column_key      索引类型 ： PRI/UNI/MUL (主键索引/唯一索引/普通索引)
-            column_comment  字段注释： 用户名称
-            column_default  默认值 ：CURRENT_TIMESTAMP/其他
-                    extra ：扩展信息
-                                on update CURRENT_TIMESTAMP
-                                auto_increment
         """
-        if database:
-            database = self.__database
-        return self.select(
-            f"select column_name,data_type,column_type,is_nullable,column_key,column_comment,column_default,extra "
-            "from INFORMATION_SCHEMA.COLUMNS "
-            f"where table_schema = '{database}' and table_name = '{table}' "
-            "order by ordinal_position")
+        if self.__dbType == 'mysql':
+            await self.execute(f"TRUNCATE TABLE {table}")
+        else:
+            await self.execute(f"DELETE FROM {table}")
 
-    def getColumnInfo(self, table: str, column: str, database: str = None):
+    async def drop(self, table):
         """
-        获取表字段信息
+        删除表
         :param table: 表名
-        :param column: 字段名
-        :param database: 数据库名，默认为连接的数据库
         :return:
-            column_name     字段名称 ： username
-            data_type       字段数据类型： varchar
-            column_type     字段类型 ： varchar(40)
-            is_nullable     是否为空 ： YES/NO
-            column_key      索引类型 ： PRI/UNI/MUL (主键索引/唯一索引/普通索引)
-            column_comment  字段注释： 用户名称
-            column_default  默认值 ：CURRENT_TIMESTAMP/其他
-                    extra ：扩展信息
-                                on update CURRENT_TIMESTAMP
-                                auto_increment
         """
-        if database:
-            database = self.__database
-        return self.selectOne(
-            f"select column_name,data_type,column_type,is_nullable,column_key,column_comment,column_default,extra "
-            "from INFORMATION_SCHEMA.COLUMNS "
-            f"where table_schema = '{database}' and table_name = '{table}' and column_name= '{column}' "
-            "order by ordinal_position")
+        await self.execute(f"DROP TABLE IF EXISTS {table}")
+
+    async def count(self, table, where: str = None):
+        """
+        统计表的行数
+        :param table: 表名
+        :param where: 额外条件
+        :return:
+        """
+        sql = f"SELECT COUNT(1) AS cnt FROM {table}"
+        if where and len(where) > 0:
+            if not (where.__contains__("where ") or where.__contains__("WHERE ")):
+                sql = f"{sql} WHERE {where}"
+            else:
+                sql = f"{sql} {where}"
+        return await self.getColumnIntValue(sql, defValue=0)
+
+    async def getColumnValue(self, sql, *parameters, column: str = None, defValue=None):
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        if column and len(column) > 0:
+            row = await self.selectOne(sql, *parameters)
+            if row and row.__contains__(column):
+                return row[column]
+        else:
+            row = await self.selectOne(sql, *parameters, hump=False)
+            if row and len(row) == 1:
+                for cn in row:
+                    return row[cn]
+            else:
+                raise RuntimeError(f"There are multiple columns, but did not specify the only one : {set(row.keys())}")
+        return defValue
+
+    async def getColumnFloatValue(self, sql, *parameters, column: str = None, defValue: float = None) -> float:
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        value = await self.getColumnValue(sql, *parameters, column=column, defValue=defValue)
+        if value:
+            return float(value)
+
+    async def getColumnBoolValue(self, sql, *parameters, column: str = None, defValue: bool = None) -> bool:
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        value = await self.getColumnValue(sql, *parameters, column=column, defValue=defValue)
+        if value:
+            if isinstance(value, str):
+                if value in ('False', 'false', '0'):
+                    return False
+                if value in ('True', 'true', '1'):
+                    return True
+                raise ValueError("转换bool类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
+            if isinstance(value, (int, bool, float)):
+                return bool(value)
+            raise ValueError("转换bool类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
+
+    async def getColumnIntValue(self, sql, *parameters, column: str = None, defValue: int = None) -> int:
+        """
+        查询字段的值
+        :param sql: SQL语句
+        :param parameters: SQL占位符参数
+        :param column: 查询的字段值
+        :param defValue: 默认值
+        :return:
+        """
+        value = await self.getColumnFloatValue(sql, *parameters, column=column, defValue=defValue)
+        if value:
+            return int(value)
+
+    def getDatabaseType(self):
+        """
+        获取数据库类型
+        :return:
+        """
+        return self.__dbType
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.close()
+
+
+class AsyncSQLite(AsyncDB):
+    """
+    异步SQLite3数据库：SQL在线程池中执行，每个工作线程绑定PooledSQLite的一个连接
+    """
+
+    def __init__(self, database, maxSize: int = 5, debug: bool = False, **poolConfig) -> None:
+        """
+        异步SQLite3数据库
+        :param database: 数据库文件
+        :param maxSize: 最大连接数（即工作线程数）
+        :param debug: 是否打印SQL
+        :param poolConfig: 其他连接池配置，见 PooledSQLite
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        super().__init__(dbType='sqlite')
+        self.__db = PooledSQLite(database, maxSize=maxSize, debug=debug, **poolConfig)
+        self.__executor = ThreadPoolExecutor(max_workers=maxSize, thread_name_prefix="dber-async")
+
+    async def select(self, sql, *parameters, limit: int = 0, hump: bool = True, humpOnly: bool = False) -> list[dict]:
+        return await self.__run(self.__db.select, sql, *parameters, limit=limit, hump=hump, humpOnly=humpOnly)
+
+    async def selectOne(self, sql, *parameters, hump: bool = True, humpOnly: bool = False) -> dict:
+        return await self.__run(self.__db.selectOne, sql, *parameters, hump=hump, humpOnly=humpOnly)
+
+    async def execute(self, sql, *parameters):
+        return await self.__run(self.__db.execute, sql, *parameters)
+
+    async def insertBatch(self, sql, rows: Iterable[Iterable]):
+        return await self.__run(self.__db.insertBatch, sql, rows)
+
+    async def callProc(self, procName: str, args):
+        return await self.__run(self.__db.callProc, procName, args)
+
+    async def close(self):
+        import asyncio
+        # 等待执行中的SQL完成，不阻塞事件循环
+        await asyncio.get_running_loop().run_in_executor(None, self.__executor.shutdown, True)
+        self.__db.close()
+
+    def getDB(self) -> PooledSQLite:
+        """
+        获取同步数据库
+        :return:
+        """
+        return self.__db
+
+    async def __run(self, fn, *args, **kwargs):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, functools.partial(fn, *args, **kwargs))
+
+
+class AsyncMySQL(AsyncDB):
+    """
+    异步Mysql数据库（aiomysql连接池）
+    """
+
+    def __init__(self, host="localhost", port: int = 3306, username="root", password="", database="information_schema",
+                 charset: str = "utf8mb4", minSize: int = 1, maxSize: int = 10, debug: bool = False,
+                 **config) -> None:
+        """
+        异步Mysql数据库，连接池在第一次使用时创建
+        :param minSize: 最小连接数
+        :param maxSize: 最大连接数
+        :param config: 其他aiomysql连接配置
+        """
+        super().__init__(dbType='mysql')
+        self.__debug = debug
+        self.__config = dict(host=host, port=port, user=username, password=password, db=database,
+                             charset=charset, minsize=minSize, maxsize=maxSize, **config)
+        self.__pool = None
+        self.__poolLock = None
+
+    async def select(self, sql, *parameters, limit: int = 0, hump: bool = True, humpOnly: bool = False) -> list[dict]:
+        if limit > 0 and not sql.__contains__(" limit ") and not sql.__contains__(" LIMIT "):
+            if sql.__contains__(";"):
+                sql = sql.replace(";", f" limit {limit};")
+            else:
+                sql = f"{sql} limit {limit}"
+
+        async def fetch(cursor):
+            return list(await cursor.fetchall())
+
+        dataRows = await self.__execute(sql, parameters, fetch)
+        if hump and dataRows:
+            return DB._humpRows(dataRows, humpOnly)
+        return dataRows
+
+    async def selectOne(self, sql, *parameters, hump: bool = True, humpOnly: bool = False) -> dict:
+        async def fetch(cursor):
+            return await cursor.fetchone()
+
+        row = await self.__execute(sql, parameters, fetch)
+        if row:
+            if not hump:
+                return dict(row)
+            return DB._humpRow(row, humpOnly=humpOnly)
+
+    async def execute(self, sql, *parameters):
+        return await self.__execute(sql, parameters, commit=True)
+
+    async def insertBatch(self, sql, rows: Iterable[Iterable]):
+        st = time.time()
+        sql = DB._rewriteSql('mysql', sql)
+        pool = await self.__getPool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                try:
+                    res = await cursor.executemany(sql, rows)
+                    await connection.commit()
+                    return res
+                except BaseException:
+                    await connection.rollback()
+                    raise
+                finally:
+                    self.__printSql(sql, rows, st)
+
+    async def callProc(self, procName: str, args):
+        st = time.time()
+        pool = await self.__getPool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                try:
+                    return await cursor.callproc(procName, args)
+                finally:
+                    self.__printSql(f"call proc : {procName}", args, st)
+
+    async def close(self):
+        if self.__pool:
+            self.__pool.close()
+            await self.__pool.wait_closed()
+            self.__pool = None
+
+    async def __execute(self, sql, parameters, fetch=None, commit: bool = False):
+        st = time.time()
+        sql = DB._rewriteSql('mysql', sql)
+        parameters = DB._parameters(*parameters)
+        pool = await self.__getPool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                try:
+                    res = await cursor.execute(sql, parameters)
+                    if fetch:
+                        res = await fetch(cursor)
+                    if commit:
+                        await connection.commit()
+                    return res
+                except BaseException:
+                    if commit:
+                        await connection.rollback()
+                    raise
+                finally:
+                    self.__printSql(sql, parameters, st)
+
+    async def __getPool(self):
+        if self.__pool is None:
+            import asyncio
+            import aiomysql
+            if self.__poolLock is None:
+                self.__poolLock = asyncio.Lock()
+            async with self.__poolLock:
+                if self.__pool is None:
+                    self.__pool = await aiomysql.create_pool(cursorclass=aiomysql.DictCursor, **self.__config)
+        return self.__pool
+
+    def __printSql(self, sql, params, st):
+        if sql and self.__debug:
+            ct = (time.time() - st)
+            if ct > 1:
+                ct = f"{round(ct, 3)}s"
+            else:
+                ct = f"{round(ct * 1000, 3)}ms"
+            if params:
+                print(f"===> ExecuteSQL[{ct}]: {sql} ， params : {params}")
+            else:
+                print(f"===> ExecuteSQL[{ct}]: {sql}")
+
+
+class TableCopier(object):
+    """
+    并行表复制：按主键范围拆分源表，多个连接并行读取，经有界队列交给批量写入线程，支持断点续传
+    """
+
+    def __init__(self, source: DB, target: DB, table: str, targetTable: str = None, key: str = "id",
+                 columns: str = "*", where: str = None, readers: int = 4, writers: int = 1,
+                 rangeSize: int = 100000, batchSize: int = 1000, queueSize: int = 16,
+                 checkpoint: str = None, insertSql: str = None, progress=None) -> None:
+        """
+        并行表复制
+        :param source: 源数据库，readers大于1时需要线程安全（如PooledMySQL）
+        :param target: 目标数据库，writers大于1时需要线程安全；源或目标不是线程安全时（如SQLite），
+               只能使用1个读取和1个写入，在调用线程中按批顺序读写
+        :param table: 源表名
+        :param targetTable: 目标表名，默认与源表相同
+        :param key: 拆分范围的数值主键（或唯一索引字段）
+        :param columns: 复制的字段，默认所有字段
+        :param where: 源表额外条件
+        :param readers: 读取线程数
+        :param writers: 写入线程数
+        :param rangeSize: 每个主键范围的大小
+        :param batchSize: 每批读取和写入的行数
+        :param queueSize: 读写之间的队列容量（批）
+        :param checkpoint: 断点文件路径，已完成的范围在重新运行时跳过
+        :param insertSql: 写入SQL，默认 REPLACE INTO targetTable (字段...) VALUES (?...)
+        :param progress: 进度回调 fun(stats)
+        """
+        if readers > 1 and not source.isThreadSafe():
+            raise ValueError(f"source db is not thread safe, use a pooled db for {readers} readers : {source}")
+        if writers > 1 and not target.isThreadSafe():
+            raise ValueError(f"target db is not thread safe, use a pooled db for {writers} writers : {target}")
+        # 非线程安全的连接只能在创建它的线程中使用，读写都在调用线程中执行
+        inline = not (source.isThreadSafe() and target.isThreadSafe())
+        if inline and (readers > 1 or writers > 1):
+            raise ValueError(f"source or target db is not thread safe, readers and writers must be 1 : "
+                             f"{readers}, {writers}")
+        if rangeSize < 1 or batchSize < 1:
+            raise ValueError(f"rangeSize and batchSize must be greater than 0 : {rangeSize}, {batchSize}")
+        self.__source = source
+        self.__target = target
+        self.__table = table
+        self.__targetTable = targetTable or table
+        self.__key = key
+        self.__columns = columns
+        self.__where = where
+        self.__readers = max(readers, 1)
+        self.__writers = max(writers, 1)
+        self.__rangeSize = rangeSize
+        self.__batchSize = batchSize
+        self.__queueSize = max(queueSize, 1)
+        self.__checkpoint = checkpoint
+        self.__insertSql = insertSql
+        self.__progress = progress
+        self.__inline = inline
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__errors = []
+        self.__stats = {}
+        self.__pending = {}
+        self.__readDone = set()
+        self.__completed = set()
+        self.__state = None
+
+    def run(self) -> dict:
+        """
+        执行复制
+        :return: 统计信息 {"ranges", "skippedRanges", "completedRanges", "rowsRead", "rowsWritten", "seconds",
+                 "rowsPerSec"}
+        """
+        import queue
+        from concurrent.futures import ThreadPoolExecutor
+
+        st = time.time()
+        self.__state = self.__loadState()
+        # 归还调用线程占用的连接，留给读写线程使用
+        self.__source.release()
+        self.__target.release()
+        ranges = [i for i in range(0, self.__state["ranges"]) if i not in self.__completed]
+        self.__stats = {"ranges": self.__state["ranges"], "skippedRanges": self.__state["ranges"] - len(ranges),
+                        "completedRanges": 0, "rowsRead": 0, "rowsWritten": 0, "seconds": 0.0, "rowsPerSec": 0.0}
+        if self.__inline:
+            try:
+                for rangeId in ranges:
+                    self.__read(rangeId, lambda batch: self.__writeBatch(*batch, st))
+                    if self.__stop.is_set():
+                        break
+            except BaseException as e:
+                self.__fail(e)
+            return self.__result(st)
+        batches = queue.Queue(maxsize=self.__queueSize)
+        writerThreads = [threading.Thread(target=self.__write, args=(batches, st), name=f"dber-copy-writer-{i}",
+                                          daemon=True) for i in range(0, self.__writers)]
+        for thread in writerThreads:
+            thread.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.__readers, thread_name_prefix="dber-copy-reader") as executor:
+                for future in [executor.submit(self.__read, rangeId, lambda batch: self.__put(batches, batch))
+                               for rangeId in ranges]:
+                    future.result()
+        except BaseException as e:
+            self.__fail(e)
+        finally:
+            for i in range(0, self.__writers):
+                self.__put(batches, None, force=True)
+            for thread in writerThreads:
+                thread.join()
+        return self.__result(st)
+
+    def __result(self, st) -> dict:
+        self.__stats["seconds"] = time.time() - st
+        self.__stats["rowsPerSec"] = self.__stats["rowsWritten"] / max(self.__stats["seconds"], 1e-9)
+        if self.__errors:
+            raise RuntimeError(f"copy table {self.__table} failed : {self.__errors[0]!r}") from self.__errors[0]
+        return dict(self.__stats)
+
+    def stats(self) -> dict:
+        """
+        当前统计信息
+        :return:
+        """
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __loadState(self) -> dict:
+        import json
+        import os
+        if self.__checkpoint and os.path.exists(self.__checkpoint):
+            with open(self.__checkpoint, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("table") == self.__table and state.get("key") == self.__key and \
+                    state.get("rangeSize") == self.__rangeSize:
+                self.__completed = set(state.get("completed", []))
+                return state
+        where = self.__where and f" where {self.__where}" or ""
+        row = self.__source.selectOne(f"select min({self.__key}) as min_key, max({self.__key}) as max_key "
+                                      f"from {self.__table}{where}", hump=False, cache=False)
+        minKey = row and row["min_key"]
+        maxKey = row and row["max_key"]
+        if minKey is not None and not (isinstance(minKey, int) and isinstance(maxKey, int)):
+            raise ValueError(f"copy table key must be an integer column : {self.__key}")
+        ranges = minKey is not None and (maxKey - minKey) // self.__rangeSize + 1 or 0
+        self.__completed = set()
+        return {"table": self.__table, "key": self.__key, "rangeSize": self.__rangeSize, "minKey": minKey,
+                "maxKey": maxKey, "ranges": ranges, "completed": []}
+
+    def __read(self, rangeId: int, sink):
+        try:
+            start = self.__state["minKey"] + rangeId * self.__rangeSize
+            end = start + self.__rangeSize
+            lastKey = None
+            while not self.__stop.is_set():
+                filters = [f"{self.__key} >= ?", f"{self.__key} < ?"]
+                parameters = [start, end]
+                if lastKey is not None:
+                    filters.append(f"{self.__key} > ?")
+                    parameters.append(lastKey)
+                if self.__where:
+                    filters.append(f"({self.__where})")
+                rows = self.__source.select(f"select {self.__columns} from {self.__table} "
+                                            f"where {' and '.join(filters)} order by {self.__key} "
+                                            f"limit {self.__batchSize}", parameters, hump=False, cache=False)
+                if not rows:
+                    break
+                lastKey = rows[-1][self.__key]
+                with self.__lock:
+                    self.__pending[rangeId] = self.__pending.get(rangeId, 0) + 1
+                    self.__stats["rowsRead"] += len(rows)
+                sink((rangeId, rows))
+                if len(rows) < self.__batchSize:
+                    break
+            with self.__lock:
+                self.__readDone.add(rangeId)
+            self.__completeRange(rangeId)
+        finally:
+            self.__source.release()
+
+    def __write(self, batches, st):
+        import queue
+        try:
+            while True:
+                try:
+                    batch = batches.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if batch is None:
+                    break
+                if not self.__stop.is_set():
+                    self.__writeBatch(*batch, st)
+        finally:
+            self.__target.release()
+
+    def __writeBatch(self, rangeId: int, rows: list, st):
+        try:
+            sql = self.__insertSql or self.__defaultInsertSql(rows[0])
+            self.__target.insertBatch(sql, [tuple(row.values()) for row in rows])
+        except BaseException as e:
+            self.__fail(e)
+            return
+        with self.__lock:
+            self.__pending[rangeId] -= 1
+            self.__stats["rowsWritten"] += len(rows)
+            self.__stats["seconds"] = time.time() - st
+            self.__stats["rowsPerSec"] = self.__stats["rowsWritten"] / max(self.__stats["seconds"], 1e-9)
+            stats = dict(self.__stats)
+        self.__completeRange(rangeId)
+        if self.__progress:
+            self.__progress(stats)
+
+    def __completeRange(self, rangeId: int):
+        with self.__lock:
+            if rangeId in self.__completed or rangeId not in self.__readDone or self.__pending.get(rangeId, 0) > 0:
+                return
+            self.__completed.add(rangeId)
+            self.__stats["completedRanges"] += 1
+            self.__saveState()
+
+    def __saveState(self):
+        if not self.__checkpoint:
+            return
+        import json
+        import os
+        state = dict(self.__state, completed=sorted(self.__completed))
+        tmpFile = f"{self.__checkpoint}.tmp"
+        with open(tmpFile, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmpFile, self.__checkpoint)
+
+    def __defaultInsertSql(self, row: dict) -> str:
+        columns = list(row.keys())
+        return f"REPLACE INTO {self.__targetTable} ({','.join(columns)}) VALUES ({','.join(['?'] * len(columns))})"
+
+    def __put(self, batches, item, force: bool = False):
+        import queue
+        while force or not self.__stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __fail(self, error: BaseException):
+        with self.__lock:
+            self.__errors.append(error)
+        self.__stop.set()
@@ -42,6 +42,8 @@ REQUIRED = [
 # 可选的依赖包
 EXTRAS = {
     'mysql feature': ['pymysql'],
+    'async mysql feature': ['aiomysql'],
+    'numpy feature': ['numpy'],
 }
 
 # 控制台脚本小工具
@@ -0,0 +1,28 @@
+import asyncio
+import os
+
+from dber.dber import AsyncSQLite
+
+database = "async_test.db"
+
+
+async def main():
+    async with AsyncSQLite(database, maxSize=4) as db:
+        await db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
+        await db.insertBatch("replace into t_test values(?,?)", [(f"k{i}", f"v{i}") for i in range(0, 100)])
+        # 并发查询
+        rows = await asyncio.gather(*[db.selectOne("select * from t_test where data_key = ?", f"k{i}")
+                                      for i in range(0, 100)])
+        print(len(rows), rows[0])
+        print(await db.count("t_test"))
+        print(await db.selectTable("t_test", data_key="k1"))
+        print(await db.getColumnValue("select data_value from t_test where data_key = ?", "k2"))
+        await db.update("update t_test set data_value = ? where data_key = ?", "1", "k3")
+        print(await db.getColumnBoolValue("select data_value from t_test where data_key = ?", "k3"))
+        await db.drop("t_test")
+
+
+asyncio.run(main())
+
+if os.path.exists(database) and os.path.isfile(database):
+    os.remove(database)
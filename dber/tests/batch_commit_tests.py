@@ -0,0 +1,70 @@
+import os
+import time
+from dber.dber import SQLite
+
+database = "batch_commit_test.db"
+
+db = SQLite(database, profile="durable")
+db.execute("CREATE TABLE IF NOT EXISTS t_test (id integer PRIMARY KEY, data_value text);")
+
+
+def writes(start: int, count: int = 2000) -> float:
+    st = time.time()
+    for i in range(start, start + count):
+        db.execute("insert into t_test values(?,?)", i, f"v{i}")
+    db.flush()
+    return time.time() - st
+
+
+print(f"per statement commit : {2000 / writes(1):.0f} rows/s")
+db.enableWriteBatching(maxStatements=200, maxDelay=0.05)
+print(f"batched commit       : {2000 / writes(10001):.0f} rows/s")
+db.execute("insert into t_test values(?,?)", 20001, "pending")
+print(db.getPendingWrites())
+db.flush()
+print(db.getPendingWrites(), db.count("t_test"))
+# 超过maxDelay的写操作在下一次读操作前提交
+db.execute("insert into t_test values(?,?)", 20002, "overdue")
+time.sleep(0.06)
+print(db.selectOne("select data_value from t_test where id = ?", 20002), db.getPendingWrites())
+
+# bulkInsert每块直接提交，失败的块回滚不影响之前的块
+db.enableWriteBatching(maxStatements=100, maxDelay=60)
+try:
+    db.bulkInsert("insert into t_test values(?,?)", [(30001, "a"), (30002, "b"), (30003, "c"), (30004, "d"),
+                                                     (30005, "e"), (30001, "dup")], chunkSize=2, synchronous="OFF")
+except Exception as e:
+    print(type(e).__name__, e)
+print(db.count("t_test", "id > 30000"), db.getPendingWrites(), db.getColumnValue("PRAGMA synchronous"))
+db.execute("delete from t_test where id > 30000")
+db.disableWriteBatching()
+
+# 事务：异常时回滚代码块内的全部写操作
+try:
+    with db.transaction():
+        db.execute("delete from t_test")
+        db.execute("insert into t_test values(?,?)", 1, "first")
+        db.execute("insert into t_test values(?,?)", 1, "duplicate")
+except Exception as e:
+    print(type(e).__name__, e)
+print(db.count("t_test"))
+
+with db.transaction():
+    with db.transaction():
+        db.execute("delete from t_test where id > ?", 10000)
+    print(db.getPendingWrites())
+print(db.getPendingWrites(), db.count("t_test"))
+
+# SQLite的executescript会隐式提交，事务内拒绝执行
+try:
+    with db.transaction():
+        db.executeScript("delete from t_test;")
+except RuntimeError as e:
+    print(e)
+print(db.count("t_test"))
+db.drop("t_test")
+db.close()
+
+for suffix in ("", "-wal", "-shm"):
+    if os.path.exists(database + suffix):
+        os.remove(database + suffix)
@@ -0,0 +1,23 @@
+from dber.dber import SQLite
+
+db = SQLite(":memory:", debug=True)
+db.enableQueryCache(maxSize=100, ttl=60)
+db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
+db.insertBatch("replace into t_test values(?,?)", [(f"k{i}", f"v{i}") for i in range(0, 100)])
+
+# 第二次查询命中缓存
+print(db.count("t_test"))
+print(db.count("t_test"))
+print(db.select("select * from t_test where data_key = ?", "k1"))
+print(db.select("select * from t_test where data_key = ?", "k1"))
+print(db.getTableNames())
+print(db.getQueryCacheStats())
+
+# 写操作按表名失效
+db.delete("delete from t_test where data_key = ?", "k1")
+print(db.select("select * from t_test where data_key = ?", "k1"))
+print(db.count("t_test"))
+db.execute("CREATE TABLE IF NOT EXISTS t_test2 (id integer);")
+print(db.getTableNames())
+print(db.getQueryCacheStats())
+db.close()
@@ -0,0 +1,28 @@
+import time
+from dber.dber import MySQL
+
+# 需要本地Mysql服务
+db = MySQL(password="root", database="test", debug=False)
+db.execute("CREATE TABLE IF NOT EXISTS t_catalog (id bigint PRIMARY KEY, data_value text);")
+
+
+def timed(fun, number: int = 100) -> float:
+    st = time.time()
+    for i in range(0, number):
+        fun()
+    return (time.time() - st) / number * 1000
+
+
+print(f"information_schema : {timed(lambda: db.getTableColumns('t_catalog')):.3f}ms")
+catalog = db.enableMetadataCache(ttl=300)
+print(f"metadata catalog   : {timed(lambda: db.getTableColumns('t_catalog')):.3f}ms")
+print(db.getTableNames())
+print(db.getColumnInfo("t_catalog", "data_value"))
+
+# DDL后元数据失效，下次访问重新加载
+db.execute("ALTER TABLE t_catalog ADD COLUMN data_int int")
+print([column["column_name"] for column in db.getTableColumns("t_catalog")])
+print(catalog.stats())
+db.drop("t_catalog")
+print("t_catalog" in db.getTableNames())
+db.close()
@@ -0,0 +1,61 @@
+import os
+import threading
+from dber.dber import ConcurrentSQLite
+
+database = "concurrent_test.db"
+
+db = ConcurrentSQLite(database, readers=4, groupSize=256, profile="read_heavy")
+db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
+errors = []
+
+
+def writer(n):
+    try:
+        for i in range(0, 200):
+            db.execute("replace into t_test values(?,?)", f"t{n}_k{i}", f"v{i}")
+    except Exception as e:
+        errors.append(e)
+
+
+def reader(n):
+    try:
+        for i in range(0, 200):
+            db.count("t_test")
+            db.selectOne("select * from t_test where data_key = ?", f"t{n}_k{i}")
+        db.release()
+    except Exception as e:
+        errors.append(e)
+
+
+threads = [threading.Thread(target=writer, args=(n,)) for n in range(0, 8)]
+threads += [threading.Thread(target=reader, args=(n,)) for n in range(0, 8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+
+print(errors)
+print(db.count("t_test"))
+print(db.getWriterStats())
+
+# 写组内单个写操作失败只回滚自身
+try:
+    db.execute("insert into t_test values(?,?)", "t0_k0", "duplicate")
+except Exception as e:
+    print(type(e).__name__, e)
+print(db.getColumnValue("select data_value from t_test where data_key = ?", "t0_k0"))
+
+# 多条SQL作为一个原子写操作
+db.write(lambda conn: [conn.execute("delete from t_test where data_key like 't1_%'"),
+                       conn.execute("delete from t_test where data_key like 't2_%'")])
+print(db.count("t_test"))
+db.bulkInsert("insert into t_test values(?,?)", ((f"b{i}", "bulk") for i in range(0, 1000)), chunkSize=300)
+print(db.count("t_test", where="data_value = 'bulk'"))
+db.executeScript("delete from t_test where data_value = 'bulk';")
+print(db.count("t_test"))
+db.drop("t_test")
+db.close()
+
+for suffix in ("", "-wal", "-shm"):
+    if os.path.exists(database + suffix):
+        os.remove(database + suffix)
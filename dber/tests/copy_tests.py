@@ -0,0 +1,40 @@
+import os
+
+from dber.dber import PooledSQLite, SQLite, TableCopier
+
+for file in ("copy_source.db", "copy_target.db", "copy_checkpoint.json"):
+    if os.path.exists(file):
+        os.remove(file)
+
+source = PooledSQLite("copy_source.db", maxSize=4)
+source.execute("CREATE TABLE IF NOT EXISTS t_test (id integer PRIMARY KEY, data_value text);")
+source.bulkInsert("insert into t_test values(?,?)", ((i, f"v{i}") for i in range(1, 100001)), chunkSize=10000)
+target = PooledSQLite("copy_target.db", maxSize=1)
+target.execute("CREATE TABLE IF NOT EXISTS t_test (id integer PRIMARY KEY, data_value text);")
+
+# 4个连接并行读取主键范围，批量写入目标库，完成的范围记录到断点文件
+copier = TableCopier(source, target, "t_test", readers=4, rangeSize=10000, batchSize=2000,
+                     checkpoint="copy_checkpoint.json", progress=lambda stats: None)
+print(copier.run())
+print(target.count("t_test"))
+# 重新运行时跳过已完成的范围
+print(TableCopier(source, target, "t_test", readers=4, rangeSize=10000, checkpoint="copy_checkpoint.json").run())
+
+source.close()
+target.close()
+
+# 非线程安全的SQLite：在调用线程中顺序读写
+source = SQLite("copy_source.db")
+target = SQLite("copy_target.db")
+target.clear("t_test")
+print(TableCopier(source, target, "t_test", readers=1, writers=1, rangeSize=30000, batchSize=5000).run())
+print(target.count("t_test"))
+try:
+    TableCopier(source, target, "t_test", readers=2)
+except ValueError as e:
+    print(type(e).__name__, e)
+source.close()
+target.close()
+for file in ("copy_source.db", "copy_target.db", "copy_checkpoint.json"):
+    if os.path.exists(file):
+        os.remove(file)
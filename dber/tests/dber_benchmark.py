@@ -0,0 +1,231 @@
+"""
+dber基准测试：固定随机种子生成不同宽度、行数的数据表，统计DB公共方法的吞吐（rows/s）、
+单次操作延迟分位数和峰值内存（tracemalloc），结果写入JSON，可与其他提交的结果对比
+
+    python dber_benchmark.py --output before.json
+    python dber_benchmark.py --output after.json --compare before.json
+    python dber_benchmark.py --mysql "host=localhost,username=root,password=root,database=test"
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dber.dber import DB, MySQL, SQLite
+
+TABLE = "t_benchmark"
+
+
+def dataset(width: int, rowCount: int, seed: int):
+    """
+    固定种子的合成数据：id + int/float/短字符串/长字符串交替的字段
+    :return: (字段名列表, 数据行列表)
+    """
+    rnd = random.Random(seed)
+    columns = ["id"] + [f"column_name_{i}" for i in range(1, width)]
+    rows = []
+    for key in range(1, rowCount + 1):
+        row = [key]
+        for i in range(1, width):
+            kind = i % 4
+            if kind == 0:
+                row.append(rnd.randint(0, 1 << 31))
+            elif kind == 1:
+                row.append(rnd.random() * 10000)
+            elif kind == 2:
+                row.append(f"v{rnd.randint(0, 1 << 20)}")
+            else:
+                row.append("".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(0, 48)))
+        rows.append(tuple(row))
+    return columns, rows
+
+
+def createTable(db: DB, columns: list):
+    types = {0: "bigint", 1: "double", 2: "varchar(32)", 3: "varchar(64)"}
+    columnSql = ", ".join(f"{column} {types[i % 4]}" for i, column in enumerate(columns) if i > 0)
+    db.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    db.execute(f"CREATE TABLE {TABLE} (id bigint PRIMARY KEY, {columnSql})")
+
+
+def cases(db: DB, columns: list, rows: list, seed: int, pointOps: int):
+    """
+    基准用例：(名称, 准备函数, 操作函数 fun(i), 操作次数, 每次操作的行数)
+    """
+    placeholders = ",".join("?" * len(columns))
+    insertSql = f"INSERT INTO {TABLE} VALUES ({placeholders})"
+    selectSql = f"SELECT * FROM {TABLE}"
+    rnd = random.Random(seed)
+    keys = [rnd.randint(1, len(rows)) for _ in range(0, pointOps)]
+    rowCount = len(rows)
+    writes = min(pointOps, rowCount)
+    rawRows = []
+
+    def clear():
+        db.clear(TABLE)
+
+    def load():
+        # 读用例前保证表中是完整的数据集
+        if db.count(TABLE) != rowCount:
+            db.clear(TABLE)
+            db.insertBatch(insertSql, rows)
+        if not rawRows:
+            rawRows.extend(db.select(selectSql, hump=False))
+
+    yield "insertBatch", clear, lambda i: db.insertBatch(insertSql, rows), 1, rowCount
+    yield "bulkInsert", clear, lambda i: db.bulkInsert(insertSql, rows, chunkSize=1000), 1, rowCount
+    yield "execute", clear, lambda i: db.execute(insertSql, *rows[i]), writes, 1
+    yield "select", load, lambda i: db.select(selectSql), 1, rowCount
+    yield "selectNoHump", load, lambda i: db.select(selectSql, hump=False), 1, rowCount
+    yield "iterSelect", load, lambda i: sum(1 for row in db.iterSelect(selectSql)), 1, rowCount
+    yield "selectColumns", load, lambda i: db.selectColumns(selectSql), 1, rowCount
+    yield "callbackResultSet", load, lambda i: db.callbackResultSet(selectSql, callback=lambda row: None), 1, rowCount
+    yield "selectOne", load, lambda i: db.selectOne(f"SELECT * FROM {TABLE} WHERE id = ?", keys[i]), pointOps, 1
+    yield "count", load, lambda i: db.count(TABLE), min(pointOps, 100), 1
+    yield "humpRows", load, lambda i: DB._humpRows(rawRows), 1, rowCount
+
+
+def percentile(latencies: list, percent: float) -> float:
+    index = min(len(latencies) - 1, max(0, int(round(percent * len(latencies) + 0.5)) - 1))
+    return latencies[index]
+
+
+def measure(setup, op, count: int, rowsPerOp: int, repeat: int) -> dict:
+    latencies = []
+    for r in range(0, repeat):
+        if setup:
+            setup()
+        for i in range(0, count):
+            st = time.perf_counter()
+            op(i)
+            latencies.append(time.perf_counter() - st)
+    # 峰值内存单独测量一轮，避免tracemalloc影响耗时
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        for i in range(0, count):
+            op(i)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "rows": len(latencies) * rowsPerOp,
+        "seconds": round(total, 6),
+        "rowsPerSec": round(total > 0 and len(latencies) * rowsPerOp / total or 0.0, 1),
+        "p50Ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p95Ms": round(percentile(latencies, 0.95) * 1000, 4),
+        "p99Ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peakKb": round(peak / 1024, 1),
+    }
+
+
+def run(name: str, db: DB, widths: list, rowCounts: list, seed: int, repeat: int, pointOps: int,
+        only: list = None) -> dict:
+    results = {}
+    for width in widths:
+        for rowCount in rowCounts:
+            columns, rows = dataset(width, rowCount, seed)
+            createTable(db, columns)
+            for case, setup, op, count, rowsPerOp in cases(db, columns, rows, seed, pointOps):
+                if only and case not in only:
+                    continue
+                key = f"{name}/w{width}/r{rowCount}/{case}"
+                results[key] = measure(setup, op, count, rowsPerOp, repeat)
+                print(f"{key:<48} {results[key]['rowsPerSec']:>12.0f} rows/s  p50={results[key]['p50Ms']:.3f}ms "
+                      f"p99={results[key]['p99Ms']:.3f}ms  peak={results[key]['peakKb']:.0f}KB")
+            db.drop(TABLE)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    与基线结果对比吞吐
+    :return: 变慢超过阈值的用例
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or not base["rowsPerSec"]:
+            continue
+        ratio = result["rowsPerSec"] / base["rowsPerSec"]
+        flag = ratio < 1 - threshold and "REGRESSION" or (ratio > 1 + threshold and "faster" or "")
+        print(f"{key:<48} {base['rowsPerSec']:>12.0f} -> {result['rowsPerSec']:>12.0f} rows/s  {ratio:6.2f}x  {flag}")
+        if ratio < 1 - threshold:
+            regressions.append(key)
+    return regressions
+
+
+def mysqlConfig(value: str) -> dict:
+    config = dict(item.split("=", 1) for item in value.split(",") if item)
+    if "port" in config:
+        config["port"] = int(config["port"])
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dber benchmark")
+    parser.add_argument("--widths", default="4,16,64", help="表的字段数，逗号分隔")
+    parser.add_argument("--rows", default="1000,20000", help="表的行数，逗号分隔")
+    parser.add_argument("--seed", type=int, default=20240101)
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例的重复次数")
+    parser.add_argument("--point-ops", type=int, default=1000, help="单行操作（selectOne、execute）的次数")
+    parser.add_argument("--cases", default="", help="只运行的用例，逗号分隔")
+    parser.add_argument("--mysql", default="", help="Mysql连接参数，如 host=localhost,username=root,database=test")
+    parser.add_argument("--output", default="", help="结果JSON文件")
+    parser.add_argument("--compare", default="", help="对比的基线JSON文件")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定变慢的吞吐下降比例")
+    args = parser.parse_args()
+
+    widths = [int(width) for width in args.widths.split(",")]
+    rowCounts = [int(rows) for rows in args.rows.split(",")]
+    only = [case for case in args.cases.split(",") if case]
+    results = {}
+
+    path = os.path.join(tempfile.mkdtemp(prefix="dber_benchmark_"), "benchmark.db")
+    db = SQLite(path)
+    try:
+        results.update(run("sqlite", db, widths, rowCounts, args.seed, args.repeat, args.point_ops, only))
+    finally:
+        db.close()
+        os.remove(path)
+    if args.mysql:
+        db = MySQL(**mysqlConfig(args.mysql))
+        try:
+            results.update(run("mysql", db, widths, rowCounts, args.seed, args.repeat, args.point_ops, only))
+        finally:
+            db.close()
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions : {regressions}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ db = SQLite(database, debug=True)
 db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
 print(db.getTableNames())
 print(db.insertBatch("replace into t_test values(%s,?)", rows))
+print(db.bulkInsert("replace into t_test values(?,?)", (row for row in rows), chunkSize=30, synchronous="OFF"))
 print(db.replace("replace into t_test values(%s,%s)", ('kancy', '25')))
 print(db.selectTable("t_test", "data_value", data_key='kancy'))
 print(db.selectTable("t_test", "data_value", where='data_key="kancy"'))
@@ -23,6 +24,11 @@ print(db.select("select data_key from t_test where data_key in (?,?)", ["k1"], [
 print(db.select("select data_key from t_test where data_key in (?,?)", ["k1"], "k2"))
 print(db.select("select data_key from t_test", limit=3))
 print(db.selectOne("select data_key from t_test"))
+print(sum(1 for row in db.iterSelect("select data_key from t_test")))
+print([len(rows) for rows in db.iterSelect("select data_key from t_test", chunkSize=30)])
+print([len(page) for page in db.scanTable("t_test", key="data_key", pageSize=40)])
+print(db.selectColumns("select data_key, data_value from t_test limit 5", hump=True))
+print([len(chunk["data_key"]) for chunk in db.iterSelectColumns("select data_key from t_test", chunkSize=40)])
 print(db.update("update t_test set data_value = ? where data_key = ?", 100, 'k0'))
 print(db.selectOne("select data_value from t_test"))
 print(db.getColumnIntValue("select data_value from t_test where data_key = ?", 'k0'))
@@ -32,6 +38,12 @@ print(db.getColumnBoolValue("select data_value from t_test where data_key = ?",
 print(db.getColumnIntValue("select count(1) as cnt from t_test"))
 print(db.delete("delete from t_test"))
 print(db.selectOne("select data_value from t_test"))
+# 失败的块回滚，之前已提交的块保留
+try:
+    db.bulkInsert("insert into t_test values(?,?)", rows[:40] + rows[35:], chunkSize=30)
+except Exception as e:
+    print(type(e).__name__, e)
+print(db.count("t_test"))
 db.close()
 
 if os.path.exists(database) and os.path.isfile(database):
@@ -0,0 +1,38 @@
+import timeit
+
+from dber.dber import DB
+
+
+def str2Hump(columnName):
+    arr = filter(None, columnName.lower().split('_'))
+    res = ''
+    for item in arr:
+        res = res + item[0].upper() + item[1:]
+    res = res[0].lower() + res[1:]
+    return res
+
+
+def humpRow(row) -> dict:
+    """
+    优化前的实现：每行每个字段都重新计算驼峰名
+    """
+    if row:
+        newRow = dict(row)
+        for key in row.keys():
+            newRow[str2Hump(key)] = row[key]
+        return newRow
+
+
+def benchmark(columnCount: int, rowCount: int = 10000, number: int = 5):
+    rows = [{f"column_name_{i}": i for i in range(0, columnCount)} for j in range(0, rowCount)]
+    before = timeit.timeit(lambda: [humpRow(row) for row in rows], number=number)
+    after = timeit.timeit(lambda: DB._humpRows(rows), number=number)
+    only = timeit.timeit(lambda: DB._humpRows(rows, humpOnly=True), number=number)
+    perRow = 1000000 / (rowCount * number)
+    print(f"columns={columnCount:<4} before={before * perRow:8.3f}us/row "
+          f"after={after * perRow:8.3f}us/row humpOnly={only * perRow:8.3f}us/row "
+          f"speedup={before / after:5.1f}x")
+
+
+for columns in (5, 20, 50, 100):
+    benchmark(columns)
@@ -0,0 +1,22 @@
+import json
+import logging
+
+from dber.dber import SQLite, SqlMetrics
+
+logging.basicConfig(level=logging.INFO)
+
+db = SQLite(":memory:")
+metrics = db.enableMetrics(slowThreshold=0.001, sink=SqlMetrics.loggingSink(level=logging.INFO))
+db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
+db.insertBatch("replace into t_test values(?,?)", [(f"k{i}", f"v{i}") for i in range(0, 1000)])
+for i in range(0, 100):
+    db.select("select * from t_test where data_key = ?", f"k{i}")
+    db.select(f"select * from t_test where data_key = 'k{i}'")
+try:
+    db.select("select * from t_not_exists")
+except Exception as e:
+    print(e)
+
+print(json.dumps(metrics.snapshot(), indent=2, ensure_ascii=False))
+print(metrics.slowQueries())
+db.close()
@@ -0,0 +1,51 @@
+import os
+import time
+from dber.dber import CallbackError, SQLite
+
+
+def slowCallback(row):
+    # 模拟较慢的回调（如HTTP推送）
+    time.sleep(0.001)
+    return row["id"]
+
+
+def sumBatch(rows):
+    # 进程池中执行的CPU密集型批量回调
+    return sum(sum(i * i for i in range(0, 200)) + row["id"] for row in rows)
+
+
+def failOdd(row):
+    if row["id"] % 1000 == 1:
+        raise ValueError(f"bad row {row['id']}")
+
+
+if __name__ == "__main__":
+    database = "parallel_callback_test.db"
+    db = SQLite(database)
+    db.execute("CREATE TABLE IF NOT EXISTS t_test (id integer PRIMARY KEY, data_value text);")
+    db.bulkInsert("insert into t_test values(?,?)", ((i, f"v{i}") for i in range(1, 3001)))
+
+    st = time.time()
+    db.callbackResultSet("select * from t_test", callback=slowCallback)
+    print(f"callbackResultSet         : {time.time() - st:.3f}s")
+
+    ids = []
+    stats = db.parallelCallbackResultSet("select * from t_test order by id", callback=slowCallback, workers=8,
+                                         fetchSize=100, ordered=True, onResult=ids.extend)
+    print(f"parallelCallbackResultSet : {stats['seconds']:.3f}s", stats["rows"], stats["batches"])
+    print(ids == list(range(1, 3001)))
+
+    totals = []
+    stats = db.parallelCallbackResultSet("select * from t_test", callback=sumBatch, batch=True, workers=4,
+                                         executor="process", fetchSize=500, onResult=totals.append)
+    print("process batches", stats["batches"], len(totals))
+
+    try:
+        db.parallelCallbackResultSet("select * from t_test", callback=failOdd, workers=4, fetchSize=250)
+    except CallbackError as e:
+        print(e, [offset for offset, error in e.errors], e.stats["rows"])
+
+    db.drop("t_test")
+    db.close()
+    if os.path.exists(database):
+        os.remove(database)
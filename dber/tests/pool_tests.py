@@ -0,0 +1,40 @@
+import os
+import threading
+from dber.dber import PooledSQLite
+
+database = "pool_test.db"
+
+db = PooledSQLite(database, minSize=1, maxSize=4, debug=False)
+db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
+
+
+def worker(n):
+    rows = [(f"t{n}_k{i}", f"v{i}") for i in range(0, 100)]
+    db.insertBatch("replace into t_test values(?,?)", rows)
+    print(threading.current_thread().name, db.count("t_test", where=f"data_key like 't{n}_%'"))
+    db.release()
+
+
+threads = [threading.Thread(target=worker, args=(n,)) for n in range(0, 8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+
+print(db.count("t_test"))
+print(db.getPool().size(), db.getPool().idleSize(), db.getPool().activeSize())
+
+# 借用连接：代码块内使用同一个连接，异常时回滚
+try:
+    with db.connection():
+        db.execute("delete from t_test", commit=False)
+        raise RuntimeError("rollback")
+except RuntimeError as e:
+    print(e)
+print(db.count("t_test"))
+print(db.getTableNames())
+db.drop("t_test")
+db.close()
+
+if os.path.exists(database) and os.path.isfile(database):
+    os.remove(database)
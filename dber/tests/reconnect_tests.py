@@ -0,0 +1,61 @@
+import time
+import pymysql
+from dber.dber import MySQL, CircuitOpenError
+
+# 需要本地Mysql服务：用另一个连接KILL当前连接，模拟服务端断开
+db = MySQL(password="root", database="test", debug=False, connect_timeout=2, read_timeout=5)
+admin = MySQL(password="root", database="test", debug=False)
+breaker = db.enableReconnect(retries=3, backoff=0.05, pingIdle=1, failureThreshold=3, resetTimeout=2)
+
+
+def kill():
+    admin.execute(f"KILL {db.selectOne('select connection_id() as id')['id']}")
+
+
+# 读操作：重连后重试
+kill()
+st = time.time()
+print(db.selectOne("select 1 as a"), f"{(time.time() - st) * 1000:.1f}ms")
+
+# 写操作：不重试，下一次操作时重连
+kill()
+try:
+    db.execute("select 1")
+except Exception as e:
+    print(type(e).__name__, e, db.isConnected())
+print(db.selectOne("select 2 as a"), db.isConnected())
+
+# 未提交的写操作：连接断开后不重试
+db.execute("CREATE TABLE IF NOT EXISTS t_reconnect (id bigint PRIMARY KEY)")
+db.execute("insert into t_reconnect values (?)", 1, commit=False)
+kill()
+try:
+    db.select("select * from t_reconnect")
+except Exception as e:
+    print(type(e).__name__, e)
+print(db.count("t_reconnect"))
+
+# 空闲连接：使用前ping
+kill()
+time.sleep(1.1)
+print(db.selectOne("select 3 as a"))
+db.drop("t_reconnect")
+
+# 熔断：服务端不可用时快速失败
+db.disableReconnect()
+down = MySQL(password="root", database="test", debug=False, connect_timeout=1)
+down.enableReconnect(retries=1, backoff=0.01, failureThreshold=2, resetTimeout=2)
+down._MySQL__creator = lambda: pymysql.connect(port=1, connect_timeout=1)
+down.resetConnection()
+for i in range(0, 4):
+    st = time.time()
+    try:
+        down.select("select 1")
+    except CircuitOpenError as e:
+        print("fail fast", e, f"{(time.time() - st) * 1000:.1f}ms")
+    except Exception as e:
+        print(type(e).__name__, f"{(time.time() - st) * 1000:.1f}ms")
+print(down.getConnectionStats())
+down.close()
+admin.close()
+db.close()
@@ -0,0 +1,71 @@
+import os
+import threading
+from dber.dber import PooledSQLite, RoutingDB
+
+database = "routing_test.db"
+
+# 使用同一个SQLite文件模拟一主两从
+primary = PooledSQLite(database, maxSize=8)
+replicas = [PooledSQLite(database, maxSize=8) for i in range(0, 2)]
+db = RoutingDB(primary, replicas, strategy="least_latency")
+db.execute("CREATE TABLE IF NOT EXISTS t_test (data_key varchar(255) PRIMARY KEY, data_value text);")
+
+
+def worker(n):
+    db.insertBatch("replace into t_test values(?,?)", [(f"t{n}_k{i}", f"v{i}") for i in range(0, 50)])
+    for i in range(0, 50):
+        db.selectOne("select * from t_test where data_key = ?", f"t{n}_k{i}")
+    db.release()
+
+
+threads = [threading.Thread(target=worker, args=(n,)) for n in range(0, 4)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(db.count("t_test"))
+print(db.getRoutingStats())
+
+# commit=False的写操作之后，读操作路由到主库，可以读到未提交的数据
+db.execute("delete from t_test where data_key like 't0_%'", commit=False)
+print(db.count("t_test"), db.getRoutingStats()["primaryReads"])
+db.rollback()
+print(db.count("t_test"), db.getRoutingStats()["primaryReads"])
+
+with db.transaction():
+    db.execute("delete from t_test where data_key like 't1_%'")
+    print(db.count("t_test"))
+print(db.count("t_test"))
+print(db.getRoutingStats())
+
+# 查询缓存和指标统计由主库和从库共享，主库的写操作失效从库读到的缓存
+db.enableQueryCache(maxSize=100, ttl=60)
+metrics = db.enableMetrics(slowThreshold=0)
+print(db.count("t_test"), db.count("t_test"), db.getQueryCacheStats()["hits"])
+db.execute("delete from t_test where data_key like 't2_%'")
+print(db.count("t_test"), replicas[0].getQueryCache() is primary.getQueryCache(), len(metrics.snapshot()) > 0)
+db.disableQueryCache()
+db.disableMetrics()
+print(replicas[1].getQueryCache(), primary.getMetrics())
+
+# 从库失败后暂停使用，读操作转到其他从库；探测轮询覆盖每个从库
+for strategy in ("least_latency", "round_robin"):
+    routing = RoutingDB(primary, [PooledSQLite(database, maxSize=2) for i in range(0, 2)], strategy=strategy)
+    routing.getReplicas()[0].close()
+    errors = 0
+    for i in range(0, 300):
+        try:
+            routing.count("t_test")
+        except Exception:
+            errors += 1
+    print(strategy, errors, [(r["errors"], r["coolingDown"]) for r in routing.getRoutingStats()["replicas"]])
+    reads = routing.getRoutingStats()["replicas"][1]["reads"]
+    print(sum(1 for rows in routing.iterSelect("select * from t_test", chunkSize=30)),
+          routing.getRoutingStats()["replicas"][1]["reads"] - reads)
+    routing.getReplicas()[1].close()
+
+db.drop("t_test")
+db.close()
+
+if os.path.exists(database):
+    os.remove(database)
@@ -0,0 +1,64 @@
+import io
+import os
+import time
+from dber.dber import SqlScript, SQLite, ConcurrentSQLite
+
+database = "script_test.db"
+scriptFile = "script_test.sql"
+
+script = """
+-- 建表
+CREATE TABLE t_test (id integer PRIMARY KEY, data_value text); /* 块注释; */
+INSERT INTO t_test (id, data_value) VALUES (1, 'a;b');
+INSERT INTO t_test (id, data_value) VALUES (2, 'it''s -- not a comment');
+insert into t_test (id, data_value) values (3, "double ; quoted"), (4, 'x');
+INSERT INTO t_test (id, data_value) VALUES (5, 'upsert') ON CONFLICT(id) DO UPDATE SET data_value = excluded.data_value;
+UPDATE t_test SET data_value = 'u' WHERE id = 4;
+DELIMITER //
+CREATE TRIGGER tr_test AFTER DELETE ON t_test BEGIN
+  INSERT INTO t_test (id, data_value) VALUES (old.id + 100000, 'deleted');
+END//
+DELIMITER ;
+DELETE FROM t_test WHERE id = 1
+"""
+statements = list(SqlScript(io.StringIO(script), dialect="sqlite", chunkSize=64).statements())
+print(len(statements))
+for statement in statements:
+    print(repr(statement[:60]))
+
+with open(scriptFile, "w", encoding="utf-8") as f:
+    f.write(script)
+    f.write(";\n")
+    for i in range(10, 20010):
+        f.write(f"INSERT INTO t_test (id, data_value) VALUES ({i}, 'v{i};');\n")
+
+db = SQLite(database, profile="bulk_load")
+events = []
+st = time.time()
+stats = db.runScript(scriptFile, commitEvery=5000, onStatement=events.append)
+print(f"runScript : {stats['statements'] / (time.time() - st):.0f} statements/s")
+print(stats["statements"], stats["executes"], stats["commits"], stats["errors"])
+print(db.count("t_test"), db.selectOne("select * from t_test where id = 2"), db.selectOne("select * from t_test where id = 100001"))
+print(stats["slowest"][0]["seconds"] >= stats["slowest"][-1]["seconds"], len(events) == stats["executes"])
+
+# 失败时停止并回滚未提交的语句
+try:
+    db.runScript(io.StringIO("INSERT INTO t_test VALUES (-1, 'a'); INSERT INTO t_test VALUES (-1, 'b');"), batchSize=1)
+except Exception as e:
+    print(type(e).__name__, e)
+print(db.count("t_test", "id < 0"))
+stats = db.runScript(io.StringIO("INSERT INTO t_test VALUES (-1, 'a'); INSERT INTO t_test VALUES (-1, 'b');"),
+                     batchSize=1, stopOnError=False)
+print(stats["errors"], db.count("t_test", "id < 0"))
+db.close()
+os.remove(database)
+
+db = ConcurrentSQLite(database)
+stats = db.runScript(scriptFile, commitEvery=5000)
+print(stats["statements"], db.count("t_test"), db.getWriterStats()["writes"])
+db.close()
+
+for suffix in ("", "-wal", "-shm"):
+    if os.path.exists(database + suffix):
+        os.remove(database + suffix)
+os.remove(scriptFile)
@@ -0,0 +1,38 @@
+import os
+import random
+import tempfile
+import time
+
+from dber.dber import SQLite
+
+
+def timed(fun) -> float:
+    st = time.perf_counter()
+    fun()
+    return time.perf_counter() - st
+
+
+def benchmark(profile: str, rowCount: int = 100000, commitCount: int = 2000, lookupCount: int = 20000):
+    path = os.path.join(tempfile.mkdtemp(), f"{profile or 'default'}.db")
+    db = SQLite(path, profile=profile)
+    db.execute("create table t_bench (id integer primary key, name text, price real, amount integer, remark text)")
+    rows = [(i, f"name_{i}", i * 0.5, i % 100, "x" * 32) for i in range(1, rowCount + 1)]
+    bulk = timed(lambda: db.bulkInsert("insert into t_bench values (?, ?, ?, ?, ?)", rows, chunkSize=10000))
+
+    def commits():
+        for i in range(0, commitCount):
+            db.execute("update t_bench set amount = amount + 1 where id = ?", i + 1)
+
+    commit = timed(commits)
+    rnd = random.Random(42)
+    keys = [rnd.randint(1, rowCount) for _ in range(0, lookupCount)]
+    lookup = timed(lambda: [db.selectOne("select * from t_bench where id = ?", key, hump=False) for key in keys])
+    scan = timed(lambda: db.select("select * from t_bench", hump=False))
+    print(f"profile={str(profile):<10} bulkInsert={rowCount / bulk:10.0f}rows/s "
+          f"commit={commitCount / commit:8.0f}tx/s lookup={lookupCount / lookup:8.0f}q/s "
+          f"scan={rowCount / scan:10.0f}rows/s")
+    db.close()
+
+
+for name in (None, "durable", "read_heavy", "bulk_load"):
+    benchmark(name)
@@ -1,12 +1,131 @@
+import json
+import pickle
+import struct
+import zlib
+
+
+class ValueCodec:
+    """
+    值编解码器：编码后的值 = 魔数(3字节) + 值类型 + 压缩算法 + 数据，读取时按值类型直接还原，不再猜测类型；
+    int、float、str、bytes、bool按原始类型存储，其他值按serializer序列化（json、msgpack、pickle），
+    超过compressThreshold的数据压缩（zlib、lz4），压缩后更大时保持不压缩；
+    没有魔数或值类型、压缩算法无效的值（旧版本写入的原始值）原样返回，
+    注意旧版本写入的以 b"\\xffMD" 开头、且随后两个字节恰好是有效值类型和压缩算法的bytes值会被误解码
+    """
+    MAGIC = b"\xffMD"
+    # 值类型
+    RAW, STR, INT, FLOAT, BOOL, JSON, MSGPACK, PICKLE = range(0, 8)
+    # 压缩算法
+    NONE, ZLIB, LZ4 = range(0, 3)
+    __float = struct.Struct("<d")
+    # 预先拼接的头部：__headers[值类型][压缩算法]
+    __headers = tuple(tuple(b"\xffMD" + bytes((valueType, compression)) for compression in range(0, 3))
+                      for valueType in range(0, 8))
+
+    def __init__(self, serializer: str = "json", compression: str = None, compressThreshold: int = 1024,
+                 compressLevel: int = 6):
+        """
+        :param serializer: 非基础类型的序列化方式：json、msgpack、pickle（协议5，只能读取可信的数据）
+        :param compression: 压缩算法：None、zlib、lz4
+        :param compressThreshold: 数据超过该字节数时压缩
+        :param compressLevel: zlib压缩级别
+        """
+        if serializer not in ("json", "msgpack", "pickle"):
+            raise ValueError(f"codec serializer is not support : {serializer}")
+        if compression not in (None, "zlib", "lz4"):
+            raise ValueError(f"codec compression is not support : {compression}")
+        self.__msgpack = None
+        self.__lz4 = None
+        if serializer == "msgpack":
+            import msgpack
+            self.__msgpack = msgpack
+        if compression == "lz4":
+            import lz4.frame
+            self.__lz4 = lz4.frame
+        self.__serializer = serializer
+        self.__compression = compression
+        self.__compressThreshold = compressThreshold
+        self.__compressLevel = compressLevel
+
+    def encode(self, value) -> bytes:
+        if isinstance(value, bytes):
+            valueType, data = ValueCodec.RAW, value
+        elif isinstance(value, (bytearray, memoryview)):
+            valueType, data = ValueCodec.RAW, bytes(value)
+        elif isinstance(value, str):
+            valueType, data = ValueCodec.STR, value.encode("utf-8")
+        elif isinstance(value, bool):
+            valueType, data = ValueCodec.BOOL, value and b"\x01" or b"\x00"
+        elif isinstance(value, int):
+            valueType, data = ValueCodec.INT, str(value).encode()
+        elif isinstance(value, float):
+            valueType, data = ValueCodec.FLOAT, ValueCodec.__float.pack(value)
+        elif self.__serializer == "msgpack":
+            valueType, data = ValueCodec.MSGPACK, self.__msgpack.packb(value, use_bin_type=True)
+        elif self.__serializer == "pickle":
+            valueType, data = ValueCodec.PICKLE, pickle.dumps(value, protocol=5)
+        else:
+            valueType, data = ValueCodec.JSON, json.dumps(isinstance(value, set) and list(value) or value).encode()
+        compression = ValueCodec.NONE
+        if self.__compression and len(data) > self.__compressThreshold:
+            if self.__lz4 is not None:
+                compressed = self.__lz4.compress(data)
+            else:
+                compressed = zlib.compress(data, self.__compressLevel)
+            if len(compressed) < len(data):
+                compression = self.__lz4 is not None and ValueCodec.LZ4 or ValueCodec.ZLIB
+                data = compressed
+        return ValueCodec.__headers[valueType][compression] + data
+
+    def decode(self, value):
+        if not isinstance(value, (bytes, bytearray, memoryview)) or len(value) < 5:
+            return value
+        view = memoryview(value)
+        valueType, compression = view[3], view[4]
+        if view[:3] != ValueCodec.MAGIC or valueType > ValueCodec.PICKLE or compression > ValueCodec.LZ4:
+            return value
+        # 数据部分不复制，直接传给解压缩和反序列化
+        data = view[5:]
+        if compression == ValueCodec.ZLIB:
+            data = memoryview(zlib.decompress(data))
+        elif compression == ValueCodec.LZ4:
+            if self.__lz4 is None:
+                import lz4.frame
+                self.__lz4 = lz4.frame
+            data = memoryview(self.__lz4.decompress(data))
+        if valueType == ValueCodec.RAW:
+            return bytes(data)
+        if valueType == ValueCodec.STR:
+            return str(data, "utf-8")
+        if valueType == ValueCodec.INT:
+            return int(str(data, "ascii"))
+        if valueType == ValueCodec.FLOAT:
+            return ValueCodec.__float.unpack(data)[0]
+        if valueType == ValueCodec.BOOL:
+            return data[0] == 1
+        if valueType == ValueCodec.JSON:
+            return json.loads(str(data, "utf-8"))
+        if valueType == ValueCodec.MSGPACK:
+            if self.__msgpack is None:
+                import msgpack
+                self.__msgpack = msgpack
+            return self.__msgpack.unpackb(data, raw=False)
+        # pickle可以执行任意代码，只在配置为pickle时读取
+        if self.__serializer != "pickle":
+            raise ValueError("pickle value can only be decoded by codec with serializer 'pickle'")
+        return pickle.loads(data)
+
+
 class MapDB:
     """
     mapdb基类
     """
     from dber import DB
 
-    def __init__(self, db: DB, topic='default') -> None:
+    def __init__(self, db: DB, topic='default', codec: ValueCodec = None) -> None:
         self.db = db
         self.__topic = topic
+        self.__codec = codec
         self.__initDataTable()
 
     def __initDataTable(self):
@@ -27,10 +146,18 @@ class MapDB:
     def disableDebug(self):
         self.db.disableDebug()
 
+    def getCodec(self) -> ValueCodec:
+        return self.__codec
+
+    def returnsWrittenTypes(self) -> bool:
+        """
+        读回的值是否与写入的int、float、str、bytes类型相同：SQLite按写入的类型返回，其他库（如Mysql的blob返回bytes）不同
+        """
+        return self.db.getDatabaseType() == 'sqlite'
+
     def putBytes(self, key: str, byteArrays: bytes):
         if byteArrays:
-            sql = f"REPLACE INTO {self.__tableName()}(data_key, data_value) values (?,?)"
-            self.db.execute(sql, (key, byteArrays))
+            self.__upsert([(key, byteArrays if self.__codec is None else self.__codec.encode(byteArrays))])
 
     def putFile(self, key: str, filePath: str):
         import os
@@ -41,28 +168,37 @@ class MapDB:
     def put(self, key: str, value):
         if isinstance(value, bytes):
             return self.putBytes(key, value)
-        if isinstance(value, (int, float, str)):
+        if self.__codec:
+            realValue = self.__codec.encode(value)
+        elif isinstance(value, (int, float, str)):
             realValue = value
         else:
             import json
             realValue = json.dumps(value)
-        sql = f"REPLACE INTO {self.__tableName()}(data_key, data_value) values (?,?)"
-        self.db.execute(sql, (key, realValue))
+        self.__upsert([(key, realValue)])
 
     def puts(self, kv_items: dict):
         import json
         rows = []
         for key in kv_items:
             value = kv_items[key]
-            if isinstance(value, (int, float, str, bytes)):
+            if self.__codec:
+                realValue = self.__codec.encode(value)
+            elif isinstance(value, (int, float, str, bytes)):
                 realValue = value
             elif isinstance(value, set):
                 realValue = json.dumps(list(value))
             else:
                 realValue = json.dumps(value)
             rows.append((key, realValue))
-        sql = f"REPLACE INTO {self.__tableName()}(data_key,data_value) values (?,?)"
-        self.db.replaceBatch(sql, rows)
+        self.__upsert(rows)
+
+    def __upsert(self, rows: list):
+        # 冲突时原地更新data_value，不像REPLACE INTO那样删除旧行再插入；不支持upsert的库使用REPLACE INTO
+        if not self.db.isUpsertSupported():
+            sql = f"REPLACE INTO {self.__tableName()}(data_key,data_value) values (?,?)"
+            return self.db.replaceBatch(sql, rows)
+        self.db.upsert(self.__tableName(), rows, keys="data_key", columns=("data_key", "data_value"))
 
     def keys(self, limit: int = 0) -> list:
         rows = self.db.selectTable(self.__tableName(), "data_key", limit=limit)
@@ -84,20 +220,22 @@ class MapDB:
         sql = f"SELECT data_value from {self.__tableName()} WHERE data_key = ?"
         result = self.db.selectOne(sql, key, hump=False)
         if result:
-            return result['data_value']
+            return self.__decode(result['data_value'])
         else:
             return defValue
 
     def gets(self, keys: (list, set), limit: int = 0) -> dict:
-        from dber import inSql
-        sql = f"SELECT data_key,data_value FROM {self.__tableName()} WHERE data_key {inSql(keys)}"
-        rows = self.db.select(sql, limit=limit, hump=False)
+        sql = f"SELECT data_key,data_value FROM {self.__tableName()} WHERE data_key {{in}}"
+        rows = self.db.selectIn(sql, keys, limit=limit, hump=False)
         kv = {}
         if rows:
             for row in rows:
-                kv[row['data_key']] = row['data_value']
+                kv[row['data_key']] = self.__decode(row['data_value'])
         return kv
 
+    def __decode(self, value):
+        return value if self.__codec is None else self.__codec.decode(value)
+
     def getFile(self, key: str, file: str = None):
         fileBytes = self.get(key)
         if fileBytes:
@@ -121,7 +259,7 @@ class MapDB:
         kv = {}
         if rows:
             for row in rows:
-                kv[row['data_key']] = row['data_value']
+                kv[row['data_key']] = self.__decode(row['data_value'])
         return kv
 
     def remove(self, key: str):
@@ -129,9 +267,8 @@ class MapDB:
         self.db.delete(sql, key)
 
     def removes(self, keys: (list, tuple, set)):
-        from dber import inSql
-        sql = f"DELETE FROM {self.__tableName()} WHERE data_key {inSql(keys)}"
-        self.db.delete(sql)
+        sql = f"DELETE FROM {self.__tableName()} WHERE data_key {{in}}"
+        self.db.executeIn(sql, keys)
 
     def clear(self):
         self.db.drop(self.__tableName())
@@ -154,6 +291,8 @@ class MapDB:
 
     def getBool(self, key: str, defValue: bool = None) -> bool:
         value = self.get(key, defValue)
+        if isinstance(value, bool):
+            return value
         if value:
             if isinstance(value, str):
                 if value in ('False', 'false', '0'):
@@ -174,6 +313,8 @@ class MapDB:
         value = self.get(key)
         if not value:
             return list(defValue or [])
+        if isinstance(value, (list, tuple, set)):
+            return list(value)
         if isinstance(value, bytes):
             return [value]
         import json
@@ -203,6 +344,8 @@ class MapDB:
     def getJson(self, key: str):
         value = self.get(key)
         if value:
+            if isinstance(value, (dict, list)):
+                return value
             if isinstance(value, bytes):
                 raise ValueError("转换dict类型失败：result={0} , 实际类型：{1}".format(value, type(value)))
             import json
@@ -215,31 +358,686 @@ class MapDB:
         self.close()
 
 
+class AppendLogStore:
+    """
+    追加日志kv存储引擎（Bitcask）：所有写操作追加到日志文件，内存哈希索引记录每个key最新值的位置，
+    读操作一次定位读取；删除写入墓碑记录；失效数据超过比例时压缩（只重写存活记录后原子替换）；
+    启动时顺序扫描日志重建索引，校验失败的尾部（写入中途崩溃）被截断；
+    同一个日志文件只能被一个实例打开（.lock文件上的排他锁），已被占用时抛出RuntimeError
+    记录格式：crc32 | key长度 | 值长度（-1为墓碑） | 值类型 | key | 值
+    """
+    import struct
+    __header = struct.Struct("<IIiB")
+    del struct
+
+    def __init__(self, path: str, sync: bool = False, compactRatio: float = 0.5, compactMinBytes: int = 4 << 20):
+        """
+        :param path: 日志文件路径
+        :param sync: 每次写入后是否fsync
+        :param compactRatio: 失效数据占比超过该值时自动压缩，小于等于0不自动压缩
+        :param compactMinBytes: 日志文件小于该大小时不自动压缩
+        """
+        import os
+        import threading
+        self.__path = os.path.abspath(path)
+        self.__sync = sync
+        self.__compactRatio = compactRatio
+        self.__compactMinBytes = compactMinBytes
+        self.__lock = threading.RLock()
+        # key -> (值的偏移, 值长度, 值类型)
+        self.__index = {}
+        self.__size = 0
+        self.__garbage = 0
+        self.__fd = None
+        self.__reader = None
+        self.__lockFile = None
+        directory = os.path.dirname(self.__path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.__acquireLock()
+        try:
+            # 压缩中途崩溃时原日志文件仍然完整，丢弃未完成的压缩文件
+            if os.path.exists(self.__path + ".compact"):
+                os.remove(self.__path + ".compact")
+            self.__open()
+        except BaseException:
+            self.__releaseLock()
+            raise
+
+    def get(self, key: str):
+        """
+        :return: (值, 值类型)，不存在时为None
+        """
+        with self.__lock:
+            self.__checkOpen()
+            entry = self.__index.get(key)
+            if entry is None:
+                return None
+            return self.__read(entry[0], entry[1]), entry[2]
+
+    def put(self, key: str, value: bytes, valueType: int = 0):
+        self.puts([(key, value, valueType)])
+
+    def puts(self, items: list):
+        """
+        批量写入，一次追加
+        :param items: [(key, 值, 值类型)]，值为None表示删除
+        """
+        header = AppendLogStore.__header
+        with self.__lock:
+            self.__checkOpen()
+            chunks = []
+            entries = []
+            written = set()
+            offset = self.__size
+            for key, value, valueType in items:
+                keyBytes = key.encode("utf-8")
+                if value is None and key not in self.__index and key not in written:
+                    continue
+                written.add(key)
+                record = AppendLogStore.__record(keyBytes, value, valueType)
+                chunks.append(record)
+                entries.append((key, value is not None and (offset + header.size + len(keyBytes), len(value),
+                                                           valueType) or None, len(record)))
+                offset += len(record)
+            if not chunks:
+                return
+            self.__append(b"".join(chunks))
+            for key, entry, recordSize in entries:
+                old = self.__index.pop(key, None)
+                if old is not None:
+                    self.__garbage += header.size + len(key.encode("utf-8")) + old[1]
+                if entry is None:
+                    self.__garbage += recordSize
+                else:
+                    self.__index[key] = entry
+            self.__maybeCompact()
+
+    def remove(self, key: str):
+        self.puts([(key, None, 0)])
+
+    def removes(self, keys):
+        self.puts([(key, None, 0) for key in keys])
+
+    def contains(self, key: str) -> bool:
+        self.__checkOpen()
+        return key in self.__index
+
+    def keys(self) -> list:
+        with self.__lock:
+            self.__checkOpen()
+            return list(self.__index)
+
+    def size(self) -> int:
+        self.__checkOpen()
+        return len(self.__index)
+
+    def clear(self):
+        import os
+        with self.__lock:
+            self.__checkOpen()
+            os.ftruncate(self.__fd, 0)
+            self.__fsync()
+            self.__index.clear()
+            self.__size = 0
+            self.__garbage = 0
+
+    def compact(self):
+        """
+        压缩：存活记录按当前顺序写入新文件，fsync后原子替换原日志文件
+        """
+        import os
+        header = AppendLogStore.__header
+        with self.__lock:
+            self.__checkOpen()
+            tmpPath = self.__path + ".compact"
+            index = {}
+            offset = 0
+            with open(tmpPath, "wb") as f:
+                for key, (valueOffset, valueSize, valueType) in self.__index.items():
+                    keyBytes = key.encode("utf-8")
+                    record = AppendLogStore.__record(keyBytes, self.__read(valueOffset, valueSize), valueType)
+                    f.write(record)
+                    index[key] = (offset + header.size + len(keyBytes), valueSize, valueType)
+                    offset += len(record)
+                f.flush()
+                os.fsync(f.fileno())
+            self.__closeFiles()
+            os.replace(tmpPath, self.__path)
+            self.__fsyncDirectory()
+            self.__openFiles()
+            self.__index = index
+            self.__size = offset
+            self.__garbage = 0
+
+    def stats(self) -> dict:
+        """
+        统计信息：key数量、日志文件大小、失效数据大小
+        """
+        with self.__lock:
+            return {"keys": len(self.__index), "fileBytes": self.__size, "garbageBytes": self.__garbage}
+
+    def close(self):
+        with self.__lock:
+            if self.__fd is not None:
+                self.__fsync()
+                self.__closeFiles()
+                self.__releaseLock()
+
+    def isClosed(self) -> bool:
+        return self.__fd is None
+
+    def __open(self):
+        """
+        打开日志文件并扫描重建索引，截断校验失败的尾部
+        """
+        import os
+        import zlib
+        header = AppendLogStore.__header
+        self.__openFiles()
+        offset = 0
+        with open(self.__path, "rb") as f:
+            while True:
+                head = f.read(header.size)
+                if len(head) < header.size:
+                    break
+                crc, keySize, valueSize, valueType = header.unpack(head)
+                body = f.read(keySize + max(valueSize, 0))
+                if len(body) < keySize + max(valueSize, 0) or zlib.crc32(head[4:] + body) != crc:
+                    break
+                key = body[:keySize].decode("utf-8")
+                recordSize = header.size + len(body)
+                old = self.__index.pop(key, None)
+                if old is not None:
+                    self.__garbage += header.size + keySize + old[1]
+                if valueSize < 0:
+                    self.__garbage += recordSize
+                else:
+                    self.__index[key] = (offset + header.size + keySize, valueSize, valueType)
+                offset += recordSize
+        if offset < os.fstat(self.__fd).st_size:
+            os.ftruncate(self.__fd, offset)
+            self.__fsync()
+        self.__size = offset
+
+    def __acquireLock(self):
+        """
+        日志文件会在压缩时被替换，排他锁加在单独的.lock文件上
+        """
+        lockFile = open(self.__path + ".lock", "a+b")
+        try:
+            try:
+                import fcntl
+                fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                msvcrt.locking(lockFile.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError as e:
+            lockFile.close()
+            raise RuntimeError(f"append log store is already opened by another instance : {self.__path}") from e
+        self.__lockFile = lockFile
+
+    def __releaseLock(self):
+        if self.__lockFile is not None:
+            # 关闭文件即释放锁，保留.lock文件，删除会与其他实例的加锁产生竞争
+            self.__lockFile.close()
+            self.__lockFile = None
+
+    def __fsyncDirectory(self):
+        """
+        替换文件后fsync目录，保证重命名持久化（Windows不支持打开目录，跳过）
+        """
+        import os
+        try:
+            fd = os.open(os.path.dirname(self.__path), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __openFiles(self):
+        import os
+        self.__fd = os.open(self.__path, os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+        self.__reader = open(self.__path, "rb", buffering=0)
+
+    def __closeFiles(self):
+        import os
+        self.__reader.close()
+        os.close(self.__fd)
+        self.__reader = None
+        self.__fd = None
+
+    def __read(self, offset: int, size: int) -> bytes:
+        self.__reader.seek(offset)
+        return self.__reader.read(size)
+
+    def __append(self, data: bytes):
+        import os
+        view = memoryview(data)
+        while view:
+            written = os.write(self.__fd, view)
+            view = view[written:]
+        self.__size += len(data)
+        if self.__sync:
+            self.__fsync()
+
+    def __fsync(self):
+        import os
+        if hasattr(os, "fdatasync"):
+            os.fdatasync(self.__fd)
+        else:
+            os.fsync(self.__fd)
+
+    def __maybeCompact(self):
+        if 0 < self.__compactRatio <= self.__garbage / max(self.__size, 1) \
+                and self.__size >= self.__compactMinBytes:
+            self.compact()
+
+    def __checkOpen(self):
+        if self.__fd is None:
+            raise RuntimeError(f"append log store is closed : {self.__path}")
+
+    @staticmethod
+    def __record(keyBytes: bytes, value: bytes, valueType: int) -> bytes:
+        import zlib
+        valueSize = -1 if value is None else len(value)
+        body = keyBytes if value is None else keyBytes + value
+        head = AppendLogStore.__header.pack(0, len(keyBytes), valueSize, valueType)
+        return AppendLogStore.__header.pack(zlib.crc32(head[4:] + body), len(keyBytes), valueSize, valueType) + body
+
+
 class ShelveMapDB(MapDB):
-    pass
+    """
+    本地文件mapdb：基于追加日志存储引擎，不经过SQL和dber，每个topic一个日志文件
+    """
+    # 值类型：bytes、str（包括json）、int、float、编解码器编码的值
+    __bytesType, __strType, __intType, __floatType, __codecType = 0, 1, 2, 3, 4
+
+    def __init__(self, database='shelvemap', topic='default', sync: bool = False, compactRatio: float = 0.5,
+                 compactMinBytes: int = 4 << 20, inner=False, codec: ValueCodec = None):
+        """
+        :param database: 日志文件目录
+        :param topic: 主题，对应目录下的 kv_{topic}.log
+        :param sync: 每次写入后是否fsync
+        :param compactRatio: 失效数据占比超过该值时自动压缩
+        :param compactMinBytes: 日志文件小于该大小时不自动压缩
+        :param codec: 值编解码器，默认按基础类型存储，其他值存储为json字符串
+        """
+        import os
+        if inner:
+            database = os.path.join(os.path.expanduser('~'), "shelvemap")
+        self.db = None
+        self.__codec = codec
+        self.__store = None
+        self.__store = AppendLogStore(os.path.join(database, f"kv_{topic}.log"), sync=sync,
+                                      compactRatio=compactRatio, compactMinBytes=compactMinBytes)
+
+    def getStore(self) -> AppendLogStore:
+        return self.__store
+
+    def getCodec(self) -> ValueCodec:
+        return self.__codec
+
+    def enableDebug(self):
+        pass
+
+    def disableDebug(self):
+        pass
+
+    def returnsWrittenTypes(self) -> bool:
+        return True
+
+    def putBytes(self, key: str, byteArrays: bytes):
+        if byteArrays:
+            self.put(key, bytes(byteArrays))
+
+    def put(self, key: str, value):
+        self.__store.puts([self.__encode(key, value)])
+
+    def puts(self, kv_items: dict):
+        self.__store.puts([self.__encode(key, kv_items[key]) for key in kv_items])
+
+    def keys(self, limit: int = 0) -> list:
+        keys = self.__store.keys()
+        return limit > 0 and keys[:limit] or keys
+
+    def randomKeys(self, limit: int = 10) -> list:
+        import random
+        keys = self.__store.keys()
+        return random.sample(keys, min(limit, len(keys)))
+
+    def get(self, key: str, defValue=None):
+        item = self.__store.get(key)
+        if item is None:
+            return defValue
+        return self.__decode(*item)
+
+    def gets(self, keys: (list, set), limit: int = 0) -> dict:
+        kv = {}
+        for key in keys:
+            item = self.__store.get(key)
+            if item is not None:
+                kv[key] = self.__decode(*item)
+                if 0 < limit <= len(kv):
+                    break
+        return kv
+
+    def like(self, likeKey: str, limit: int = 0) -> dict:
+        import re
+        # SQL LIKE：%匹配任意字符串，_匹配单个字符，不区分大小写
+        pattern = re.compile("".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in likeKey),
+                             re.I | re.S)
+        keys = [key for key in self.__store.keys() if pattern.fullmatch(key)]
+        return self.gets(limit > 0 and keys[:limit] or keys)
+
+    def remove(self, key: str):
+        self.__store.remove(key)
+
+    def removes(self, keys: (list, tuple, set)):
+        self.__store.removes(keys)
+
+    def clear(self):
+        self.__store.clear()
+
+    def size(self):
+        return self.__store.size()
+
+    def contains(self, key: str) -> bool:
+        return self.__store.contains(key)
+
+    def compact(self):
+        self.__store.compact()
+
+    def close(self):
+        if self.__store is not None:
+            self.__store.close()
+
+    def __encode(self, key: str, value):
+        import json
+        if self.__codec is not None:
+            return key, self.__codec.encode(value), ShelveMapDB.__codecType
+        if isinstance(value, bytes):
+            return key, value, ShelveMapDB.__bytesType
+        if isinstance(value, bool):
+            return key, str(int(value)).encode(), ShelveMapDB.__intType
+        if isinstance(value, int):
+            return key, str(value).encode(), ShelveMapDB.__intType
+        if isinstance(value, float):
+            return key, repr(value).encode(), ShelveMapDB.__floatType
+        if isinstance(value, set):
+            value = list(value)
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        return key, value.encode("utf-8"), ShelveMapDB.__strType
+
+    def __decode(self, value: bytes, valueType: int):
+        if valueType == ShelveMapDB.__codecType:
+            if self.__codec is None:
+                raise ValueError("codec value can only be decoded by ShelveMapDB with codec")
+            return self.__codec.decode(value)
+        if valueType == ShelveMapDB.__strType:
+            return value.decode("utf-8")
+        if valueType == ShelveMapDB.__intType:
+            return int(value)
+        if valueType == ShelveMapDB.__floatType:
+            return float(value)
+        return value
+
+
+class CachedMapDB(MapDB):
+    """
+    带本地缓存的mapdb：包装任意MapDB，读操作先查进程内的LRU缓存（按条数、字节数限制，支持TTL），
+    不存在的key也缓存（负缓存）；写操作先写后端再更新缓存（写穿透），多进程共享同一个库时由TTL控制数据过期
+    """
+    __missing = object()
+
+    def __init__(self, mapDB: MapDB, maxSize: int = 10000, maxBytes: int = 64 << 20, ttl: float = 60,
+                 negativeTtl: float = None, maxValueBytes: int = 1 << 20):
+        """
+        :param mapDB: 被包装的MapDB
+        :param maxSize: 最大缓存条数
+        :param maxBytes: 缓存值的最大总字节数（估算）
+        :param ttl: 缓存有效期（秒），小于等于0不过期
+        :param negativeTtl: 不存在的key的缓存有效期（秒），默认同ttl，0表示不缓存不存在的key
+        :param maxValueBytes: 超过该大小的值（如文件）不缓存
+        """
+        import collections
+        import threading
+        if maxSize < 1:
+            raise ValueError(f"cache maxSize must be greater than 0 : {maxSize}")
+        self.db = mapDB.db
+        self.__mapDB = mapDB
+        self.__maxSize = maxSize
+        self.__maxBytes = maxBytes
+        self.__ttl = ttl
+        self.__negativeTtl = ttl if negativeTtl is None else negativeTtl
+        self.__maxValueBytes = maxValueBytes
+        # key -> (值, 过期时间, 字节数)，左边最久未使用
+        self.__entries = collections.OrderedDict()
+        self.__bytes = 0
+        # 正在从后端读取的key -> 令牌，读取期间写入或失效该key时移除令牌，读到的旧值不再写入缓存
+        self.__loading = {}
+        self.__lock = threading.Lock()
+        self.__stats = {"hits": 0, "misses": 0, "negativeHits": 0, "evictions": 0, "expirations": 0}
+
+    def getMapDB(self) -> MapDB:
+        return self.__mapDB
+
+    def getCodec(self) -> ValueCodec:
+        return self.__mapDB.getCodec()
+
+    def enableDebug(self):
+        self.__mapDB.enableDebug()
+
+    def disableDebug(self):
+        self.__mapDB.disableDebug()
+
+    def returnsWrittenTypes(self) -> bool:
+        return self.__mapDB.returnsWrittenTypes()
+
+    def get(self, key: str, defValue=None):
+        hit, value = self.__get(key)
+        if not hit:
+            token = value
+            value = self.__mapDB.get(key, CachedMapDB.__missing)
+            self.__set(key, value, token)
+        return defValue if value is CachedMapDB.__missing else value
+
+    def gets(self, keys: (list, set), limit: int = 0) -> dict:
+        kv = {}
+        misses = {}
+        for key in dict.fromkeys(keys):
+            hit, value = self.__get(key)
+            if not hit:
+                misses[key] = value
+            elif value is not CachedMapDB.__missing:
+                kv[key] = value
+            if 0 < limit <= len(kv):
+                self.__release(misses)
+                return kv
+        if misses:
+            loaded = self.__mapDB.gets(list(misses), limit=limit and limit - len(kv))
+            for key, token in misses.items():
+                # 有limit时未返回的key不一定不存在，不做负缓存
+                if key in loaded or not limit:
+                    self.__set(key, loaded.get(key, CachedMapDB.__missing), token)
+                else:
+                    self.__release({key: token})
+            kv.update(loaded)
+        return kv
+
+    def contains(self, key: str) -> bool:
+        hit, value = self.__get(key)
+        if hit:
+            return value is not CachedMapDB.__missing
+        self.__release({key: value})
+        return self.__mapDB.contains(key)
+
+    def putBytes(self, key: str, byteArrays: bytes):
+        if byteArrays:
+            self.__mapDB.putBytes(key, byteArrays)
+            # 复制一份，调用方之后修改bytearray不影响缓存
+            self.__set(key, bytes(byteArrays))
+
+    def put(self, key: str, value):
+        self.__mapDB.put(key, value)
+        self.__written([key], {key: value})
+
+    def puts(self, kv_items: dict):
+        self.__mapDB.puts(kv_items)
+        self.__written(kv_items.keys(), kv_items)
+
+    def remove(self, key: str):
+        self.__mapDB.remove(key)
+        self.__set(key, CachedMapDB.__missing)
+
+    def removes(self, keys: (list, tuple, set)):
+        self.__mapDB.removes(keys)
+        for key in keys:
+            self.__set(key, CachedMapDB.__missing)
+
+    def clear(self):
+        self.__mapDB.clear()
+        self.invalidate()
+
+    def keys(self, limit: int = 0) -> list:
+        return self.__mapDB.keys(limit)
+
+    def randomKeys(self, limit: int = 10) -> list:
+        return self.__mapDB.randomKeys(limit)
+
+    def like(self, likeKey: str, limit: int = 0) -> dict:
+        return self.__mapDB.like(likeKey, limit)
+
+    def size(self):
+        return self.__mapDB.size()
+
+    def invalidate(self, keys: (list, tuple, set) = None):
+        """
+        失效缓存
+        :param keys: key列表，None表示清空缓存
+        """
+        with self.__lock:
+            if keys is None:
+                self.__entries.clear()
+                self.__loading.clear()
+                self.__bytes = 0
+                return
+            for key in keys:
+                self.__loading.pop(key, None)
+                entry = self.__entries.pop(key, None)
+                if entry:
+                    self.__bytes -= entry[2]
+
+    def getCacheStats(self) -> dict:
+        """
+        缓存统计：命中（包括负缓存命中）、未命中、淘汰、过期次数，命中率，当前条数和字节数
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["size"] = len(self.__entries)
+            stats["bytes"] = self.__bytes
+        total = stats["hits"] + stats["misses"]
+        stats["hitRate"] = total and stats["hits"] / total or 0.0
+        return stats
+
+    def close(self):
+        self.invalidate()
+        self.__mapDB.close()
+
+    def __written(self, keys, kv_items: dict):
+        # 后端按写入的类型返回int、float、str、bytes时直接缓存写入的值；
+        # 其他值（json）和其他后端（如Mysql的blob返回bytes）读回的类型不同，只失效缓存
+        if not self.__mapDB.returnsWrittenTypes():
+            return self.invalidate(keys)
+        for key in keys:
+            value = kv_items[key]
+            # 空bytes可能被后端忽略（putBytes不写入），只失效缓存
+            if isinstance(value, (int, float, str, bytes)) and not isinstance(value, bool) and value != b"":
+                self.__set(key, value)
+            else:
+                self.invalidate([key])
+
+    def __get(self, key):
+        """
+        :return: (是否命中, 命中时为值，未命中时为读取后端的令牌)
+        """
+        import time
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[1] and entry[1] < time.time():
+                del self.__entries[key]
+                self.__bytes -= entry[2]
+                self.__stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.__stats["misses"] += 1
+                token = self.__loading[key] = object()
+                return False, token
+            self.__entries.move_to_end(key)
+            self.__stats["hits"] += 1
+            if entry[0] is CachedMapDB.__missing:
+                self.__stats["negativeHits"] += 1
+            return True, entry[0]
+
+    def __release(self, tokens: dict):
+        with self.__lock:
+            for key, token in tokens.items():
+                if self.__loading.get(key) is token:
+                    del self.__loading[key]
+
+    def __set(self, key, value, token=None):
+        """
+        :param token: 读取后端前获取的令牌，读取期间该key被写入或失效时不缓存；写入时为None
+        """
+        import sys
+        import time
+        ttl = self.__negativeTtl if value is CachedMapDB.__missing else self.__ttl
+        size = value is CachedMapDB.__missing and 0 or sys.getsizeof(value)
+        with self.__lock:
+            if token is None:
+                self.__loading.pop(key, None)
+            elif self.__loading.get(key) is not token:
+                return
+            else:
+                del self.__loading[key]
+            entry = self.__entries.pop(key, None)
+            if entry:
+                self.__bytes -= entry[2]
+            if (value is CachedMapDB.__missing and not ttl) or size > self.__maxValueBytes:
+                return
+            self.__entries[key] = (value, ttl > 0 and time.time() + ttl or 0, size)
+            self.__bytes += size
+            while len(self.__entries) > self.__maxSize or self.__bytes > self.__maxBytes:
+                evicted = self.__entries.popitem(last=False)[1]
+                self.__bytes -= evicted[2]
+                self.__stats["evictions"] += 1
 
 
 class SQLiteMapDB(MapDB):
 
-    def __init__(self, database='sqlitemap.db', topic='default', debug: bool = False, inner=False):
+    def __init__(self, database='sqlitemap.db', topic='default', debug: bool = False, inner=False,
+                 codec: ValueCodec = None):
         from dber import SQLite
         if inner:
             import os
             database = os.path.join(os.path.expanduser('~'), "sqlitemap.db")
         db = SQLite(database=database, debug=debug)
-        super().__init__(db, topic)
+        super().__init__(db, topic, codec)
 
 
 class MySQLMapDB(MapDB):
 
     def __init__(self, topic='default', host="localhost", port: int = 3306, username="root", password="",
-                 database="test", charset: str = "utf8mb4", debug: bool = False, **config):
+                 database="test", charset: str = "utf8mb4", debug: bool = False, codec: ValueCodec = None, **config):
         from dber import MySQL
         db = MySQL(host=host, port=port, username=username, password=password, database=database,
                    charset=charset,
                    debug=debug,
                    **config)
-        super().__init__(db, topic)
+        super().__init__(db, topic, codec)
 
     def randomKeys(self, limit: int = 10) -> list:
         rows = self.db.selectTable(self._MapDB__tableName(), "data_key", where="1=1 order by rand()", limit=limit)
@@ -257,7 +1055,7 @@ class MySQLMapDB(MapDB):
         kv = {}
         if rows:
             for row in rows:
-                kv[row['data_key']] = row['data_value']
+                kv[row['data_key']] = self._MapDB__decode(row['data_value'])
         return kv
 
 
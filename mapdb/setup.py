@@ -42,6 +42,7 @@ REQUIRED = [
 # 可选的依赖包
 EXTRAS = {
     'mysql feature': ['pymysql'],
+    'codec feature': ['msgpack', 'lz4'],
 }
 
 # 控制台脚本小工具
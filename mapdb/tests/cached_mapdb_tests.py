@@ -0,0 +1,68 @@
+import os
+import shutil
+import time
+import mapdb
+
+database = "cached_mapdb_test.db"
+db = mapdb.CachedMapDB(mapdb.SQLiteMapDB(database), maxSize=1000, ttl=60)
+
+db.put("int", 20)
+db.put("json", {"name": "kancy", "hobby": ["play games"]})
+db.puts({"string": "kancy", "float": 1.75})
+print(db.get("int"), db.getInt("int"), db.getDict("json"), db.gets(["string", "float", "missing"]))
+print(db.get("missing", "default"), db.contains("missing"), db.contains("string"))
+db.remove("int")
+print(db.get("int"), db.size())
+
+# 空bytes不写入后端，也不缓存；bytearray缓存副本
+db.put("empty", b"")
+print(db.get("empty"), db.contains("empty"))
+data = bytearray(b"abc")
+db.putBytes("bytes", data)
+data[0] = ord("x")
+print(db.get("bytes"), db.getMapDB().get("bytes"))
+db.removes(["bytes"])
+
+
+def timed(fun, number: int = 10000) -> float:
+    st = time.perf_counter()
+    for i in range(0, number):
+        fun()
+    return (time.perf_counter() - st) / number * 1000000
+
+
+print(f"uncached get : {timed(lambda: db.getMapDB().get('string')):.1f}us")
+print(f"cached get   : {timed(lambda: db.get('string')):.1f}us")
+print(f"missing get  : {timed(lambda: db.get('missing')):.1f}us")
+
+# 读取后端期间另一个线程写入：读到的旧值不覆盖写穿透的新值
+class RacyMapDB(mapdb.SQLiteMapDB):
+    def get(self, key: str, defValue=None):
+        value = super().get(key, defValue)
+        if key == "race":
+            racy.put("race", "new")
+        return value
+
+
+racy = mapdb.CachedMapDB(RacyMapDB(database, topic="race"))
+racy.getMapDB().put("race", "old")
+print(racy.get("race"), racy.get("race"))
+racy.getMapDB().clear()
+
+# 淘汰：最久未使用的key
+small = mapdb.CachedMapDB(db.getMapDB(), maxSize=2)
+small.puts({"a": 1, "b": 2, "c": 3})
+print(small.getCacheStats()["size"], small.getCacheStats()["evictions"])
+print(db.getCacheStats())
+db.close()
+os.remove(database)
+
+# 包装本地文件mapdb：写入的值直接缓存
+shelve = mapdb.CachedMapDB(mapdb.ShelveMapDB("cached_shelvemap_test"), ttl=60)
+shelve.enableDebug()
+shelve.put("a", 1)
+shelve.puts({"b": "kancy", "c": [1, 2]})
+print(shelve.get("a"), shelve.get("b"), shelve.get("c"), shelve.getCacheStats()["size"])
+shelve.clear()
+shelve.close()
+shutil.rmtree("cached_shelvemap_test")
@@ -0,0 +1,61 @@
+import os
+import shutil
+import time
+import mapdb
+
+database = "codec_test.db"
+
+# 旧版本写入的原始值
+legacy = mapdb.SQLiteMapDB(database)
+legacy.put("int", 20)
+legacy.put("json", {"name": "kancy"})
+legacy.putBytes("bytes", b"I am bytearray.")
+legacy.close()
+
+codec = mapdb.ValueCodec(serializer="json", compression="zlib", compressThreshold=256)
+db = mapdb.SQLiteMapDB(database, codec=codec)
+print(db.get("int"), db.getDict("json"), db.get("bytes"))
+
+values = {"str": "kancy", "int": 1 << 70, "float": 1.75, "bool": False, "zero": 0, "list": [1, "a"],
+          "dict": {"k": [1, 2]}, "bytes": b"\x00\xff", "set": {1, 2}}
+db.puts(values)
+print({key: db.get(key) for key in values})
+print(db.getBool("bool", True), db.getList("list"), db.getDict("dict"), db.getSet("set"))
+# 以魔数开头但值类型、压缩算法无效的旧值原样返回
+print(codec.decode(b"\xffMD\x09\x00legacy"), codec.decode(memoryview(codec.encode(b"view"))))
+
+# 大值压缩
+big = {"rows": [{"id": i, "name": f"name{i}"} for i in range(0, 2000)]}
+db.put("big", big)
+raw = db.db.selectOne("select data_value from t_kv_default where data_key = ?", "big", hump=False)["data_value"]
+print(len(raw), len(mapdb.ValueCodec().encode(big)), db.getDict("big") == big)
+
+
+def timed(name: str, fun, number: int = 2000):
+    st = time.perf_counter()
+    for i in range(0, number):
+        fun()
+    print(f"{name:<24} {(time.perf_counter() - st) / number * 1000000:>8.1f}us")
+
+
+legacy = mapdb.SQLiteMapDB(database, topic="legacy")
+legacy.put("dict", {"k": [1, 2], "name": "kancy"})
+db.put("dict", {"k": [1, 2], "name": "kancy"})
+timed("legacy getDict", lambda: legacy.getDict("dict"))
+timed("codec getDict", lambda: db.getDict("dict"))
+for serializer, compression in (("msgpack", "lz4"), ("pickle", None)):
+    try:
+        other = mapdb.ValueCodec(serializer=serializer, compression=compression, compressThreshold=64)
+    except ImportError as e:
+        print(f"skip {serializer} : {e}")
+        continue
+    print(serializer, other.decode(other.encode(big)) == big, len(other.encode(big)))
+legacy.close()
+db.close()
+
+shelve = mapdb.ShelveMapDB("codec_test_shelve", codec=codec)
+shelve.put("big", big)
+print(shelve.getDict("big") == big, shelve.getStore().stats()["fileBytes"] < len(mapdb.ValueCodec().encode(big)))
+shelve.close()
+shutil.rmtree("codec_test_shelve")
+os.remove(database)
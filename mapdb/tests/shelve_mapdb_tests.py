@@ -0,0 +1,71 @@
+import os
+import shutil
+import time
+import mapdb
+
+database = "shelvemap_test"
+db = mapdb.ShelveMapDB(database, compactMinBytes=1 << 10)
+
+db.put("int", 20)
+db.put("float", 1.75)
+db.put("bool", False)
+db.put("string", 'kancy')
+db.put("hobby", ["play games"])
+db.putBytes("bytes", b"I am bytearray.")
+db.puts({"json": {"name": "kancy", "age": 20}, "set": {1, 2}})
+print(db.gets(['int', 'float', 'bool', 'string', 'hobby', 'bytes']))
+print(db.getInt("int"), db.getBool("bool"), db.getDict("json"), db.getSet("set"), db.like("%in%"))
+db.remove("int")
+print(db.get("int"), db.contains("int"), db.size(), sorted(db.keys()))
+db.close()
+
+# 重新打开：扫描日志重建索引
+db = mapdb.ShelveMapDB(database)
+print(db.size(), db.get("string"), db.get("int"))
+
+# 同一个日志文件不能被两个实例同时打开
+try:
+    mapdb.ShelveMapDB(database)
+except RuntimeError as e:
+    print(type(e).__name__, e)
+db.close()
+
+# 关闭后读写操作都抛出RuntimeError
+for fun in (lambda: db.get("string"), lambda: db.keys(), lambda: db.size(), lambda: db.contains("string"),
+            lambda: db.like("str%"), lambda: db.put("string", "v")):
+    try:
+        fun()
+    except RuntimeError as e:
+        print(type(e).__name__, e)
+
+# 崩溃恢复：截断写了一半的尾部记录
+path = os.path.join(database, "kv_default.log")
+size = os.path.getsize(path)
+with open(path, "ab") as f:
+    f.write(b"\x01\x02\x03\x04partial")
+db = mapdb.ShelveMapDB(database, compactMinBytes=1 << 16)
+print(os.path.getsize(path) == size, db.size())
+
+
+def timed(name: str, fun, number: int):
+    st = time.perf_counter()
+    for i in range(0, number):
+        fun(i)
+    print(f"{name:<20} {number / (time.perf_counter() - st):>10.0f} ops/s")
+
+
+sqliteDb = mapdb.SQLiteMapDB("shelvemap_test.db")
+for name, target in (("shelve", db), ("sqlite", sqliteDb)):
+    timed(f"{name} put", lambda i: target.put(f"key{i % 1000}", f"value{i}"), 5000)
+    timed(f"{name} get", lambda i: target.get(f"key{i % 1000}"), 20000)
+sqliteDb.close()
+os.remove("shelvemap_test.db")
+
+# 覆盖写产生失效数据，超过比例后自动压缩
+print(db.getStore().stats())
+db.compact()
+print(db.getStore().stats(), db.get("key999"))
+db.clear()
+print(db.size(), db.getStore().stats())
+db.close()
+shutil.rmtree(database)